@@ -1,3 +1,28 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import DubbingJob, PipelineRun, PipelineStageMetric, TranslationMemoryEntry
+
+
+@admin.register(TranslationMemoryEntry)
+class TranslationMemoryEntryAdmin(admin.ModelAdmin):
+    list_display = ("id", "model_name", "source_text", "translated_text", "created_at")
+    list_filter = ("model_name",)
+    search_fields = ("source_text", "translated_text")
+
+
+class PipelineStageMetricInline(admin.TabularInline):
+    model = PipelineStageMetric
+    extra = 0
+
+
+@admin.register(PipelineRun)
+class PipelineRunAdmin(admin.ModelAdmin):
+    list_display = ("id", "video", "status", "audio_duration", "wall_time", "real_time_factor", "created_at")
+    list_filter = ("status",)
+    inlines = [PipelineStageMetricInline]
+
+
+@admin.register(DubbingJob)
+class DubbingJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "video", "user", "status", "lane", "duration_seconds", "created_at")
+    list_filter = ("status", "lane")
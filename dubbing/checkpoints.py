@@ -0,0 +1,58 @@
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from django.utils import timezone
+
+STAGE_ORDER = ["extract", "transcribe", "translate", "synthesize", "mux"]
+MANIFEST_NAME = "manifest.json"
+
+
+class CheckpointManifest:
+    def __init__(self, work_dir):
+        self.work_dir = Path(work_dir)
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        self.path = self.work_dir / MANIFEST_NAME
+        self.data = self._load()
+
+    def first_incomplete_stage(self, stage_options):
+        for stage in STAGE_ORDER:
+            record = self.data["stages"].get(stage)
+            if record is None or record.get("options") != stage_options[stage]:
+                return stage
+        return None
+
+    def is_done(self, stage, stage_options):
+        first_incomplete = self.first_incomplete_stage(stage_options)
+        if first_incomplete is None:
+            return True
+        return STAGE_ORDER.index(stage) < STAGE_ORDER.index(first_incomplete)
+
+    def mark_done(self, stage, options, job):
+        stages = self.data["stages"]
+        stages[stage] = {"options": options, "completed_at": timezone.now().isoformat()}
+        for later_stage in STAGE_ORDER[STAGE_ORDER.index(stage) + 1 :]:
+            stages.pop(later_stage, None)
+        self.data["job"] = job
+        self._save()
+
+    @property
+    def job(self):
+        return dict(self.data.get("job") or {})
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as source:
+                data = json.load(source)
+        except (FileNotFoundError, ValueError):
+            data = {}
+        data.setdefault("stages", {})
+        data.setdefault("job", {})
+        return data
+
+    def _save(self):
+        fd, temp_path = tempfile.mkstemp(prefix=".manifest-", dir=self.work_dir)
+        with os.fdopen(fd, "w", encoding="utf-8") as target:
+            json.dump(self.data, target, ensure_ascii=False)
+        os.replace(temp_path, self.path)
@@ -0,0 +1,403 @@
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from dubbing.services.asr_engines import ASR_ENGINES
+from dubbing.services.instrumentation import StageTimer, current_rss
+from dubbing.services.stubs import StubTranslationService, StubTTSService, StubWhisperService
+from dubbing.tasks import STAGE_FUNCTIONS, build_pipeline, run_checkpointed_stages
+
+# Three seconds of tone followed by one of silence, so VAD and segmenting have edges to find.
+SYNTHETIC_AUDIO = "0.4*sin(2*PI*220*t)*gt(mod(t\\,4)\\,1)"
+
+PATH_CHECKPOINTED = "checkpointed"
+PATH_IN_PROCESS = "in-process"
+
+
+def generate_video(ffmpeg_bin, duration, output_path, size="320x240", rate=25):
+    command = [
+        ffmpeg_bin,
+        "-y",
+        "-nostdin",
+        "-f",
+        "lavfi",
+        "-i",
+        f"testsrc=size={size}:rate={rate}:duration={duration}",
+        "-f",
+        "lavfi",
+        "-i",
+        f"aevalsrc={SYNTHETIC_AUDIO}:s=16000:d={duration}",
+        "-c:v",
+        "libx264",
+        "-preset",
+        "ultrafast",
+        "-c:a",
+        "aac",
+        "-shortest",
+        str(output_path),
+    ]
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise CommandError(f"Failed to generate synthetic video: {result.stderr.strip()}")
+    return output_path
+
+
+def summarize(values):
+    values = [value for value in values if value is not None]
+    if not values:
+        return None
+    return {
+        "mean": statistics.mean(values),
+        "median": statistics.median(values),
+        "min": min(values),
+        "max": max(values),
+        "stdev": statistics.stdev(values) if len(values) > 1 else 0.0,
+    }
+
+
+def git_revision():
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            cwd=settings.BASE_DIR,
+        )
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+
+def _bench_extract(pipeline, job, timer):
+    result = pipeline.extract_stage(
+        job["input_video_path"], job["extracted_audio_path"], timer, job.get("source_media")
+    )
+    return {**job, **result}
+
+
+def _bench_mux(pipeline, job, timer):
+    pipeline.mux_stage(
+        job["input_video_path"],
+        job["tts_audio_path"],
+        job["output_video_path"],
+        timer,
+        job.get("source_media"),
+    )
+    return job
+
+
+class Command(BaseCommand):
+    help = "Benchmark the dubbing pipeline per stage on synthetic videos."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--duration",
+            type=float,
+            action="append",
+            help="Synthetic video length in seconds; repeat the flag for several lengths.",
+        )
+        parser.add_argument("--repeat", type=int, default=3)
+        parser.add_argument("--warmup", type=int, default=1)
+        parser.add_argument("--engines", choices=["stub", "real"], default="stub")
+        parser.add_argument(
+            "--asr-engine",
+            action="append",
+            choices=sorted(ASR_ENGINES),
+            help="ASR backend for real runs; repeat the flag to compare backends.",
+        )
+        parser.add_argument(
+            "--path",
+            choices=["auto", PATH_CHECKPOINTED, PATH_IN_PROCESS],
+            default="auto",
+            help="Code path to time; auto picks the one process_video_dubbing would take.",
+        )
+        parser.add_argument("--segmented", action="store_true")
+        parser.add_argument("--stream-audio", action="store_true")
+        parser.add_argument("--use-cache", action="store_true")
+        parser.add_argument("--output", help="Write the JSON report to this path.")
+        parser.add_argument("--baseline", help="Earlier JSON report to compare against.")
+        parser.add_argument("--threshold", type=float, default=10.0)
+        parser.add_argument("--fail-on-regression", action="store_true")
+
+    def handle(self, *args, **options):
+        durations = options["duration"] or [30.0]
+        repeat = max(options["repeat"], 1)
+        ffmpeg_bin = getattr(settings, "FFMPEG_BIN", "ffmpeg")
+        path = self._resolve_path(options)
+
+        asr_engines = [None]
+        if options["engines"] == "real" and options["asr_engine"]:
+            asr_engines = options["asr_engine"]
+
+        pipelines = []
+        for asr_engine in asr_engines:
+            load_started = time.perf_counter()
+            pipeline = self._build_pipeline(options, asr_engine)
+            if options["engines"] == "real":
+                pipeline.warm_up()
+            pipelines.append((pipeline, time.perf_counter() - load_started))
+
+        pipeline = pipelines[0][0]
+        report = {
+            "created_at": timezone.now().isoformat(),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "engines": options["engines"],
+            "pipeline": {
+                **pipeline.stage_options()["synthesize"],
+                "stream_audio": pipeline.stream_audio,
+                "artifact_cache": pipeline.artifact_cache is not None,
+                "path": path,
+            },
+            "repeat": repeat,
+            "warmup": options["warmup"],
+            "results": [],
+        }
+
+        with tempfile.TemporaryDirectory(prefix="bench_dubbing_") as temp_dir:
+            for duration in durations:
+                video_path = Path(temp_dir) / f"synthetic_{duration:g}s.mp4"
+                generate_video(ffmpeg_bin, duration, video_path)
+                for pipeline, load_seconds in pipelines:
+                    for _ in range(max(options["warmup"], 0)):
+                        self._run_once(pipeline, video_path, temp_dir, path)
+                    runs = [
+                        self._run_once(pipeline, video_path, temp_dir, path) for _ in range(repeat)
+                    ]
+                    result = self._aggregate(duration, runs)
+                    result["asr_engine"] = pipeline.whisper_service.engine_name
+                    result["path"] = path
+                    result["model_load_seconds"] = load_seconds
+                    report["results"].append(result)
+                    self._print_result(result)
+
+        if len(pipelines) > 1:
+            report["asr_comparison"] = self._compare_asr_engines(report["results"])
+
+        regressions = []
+        if options["baseline"]:
+            regressions = self._compare(report, options["baseline"], options["threshold"])
+            report["regressions"] = regressions
+
+        payload = json.dumps(report, indent=2)
+        if options["output"]:
+            Path(options["output"]).write_text(payload, encoding="utf-8")
+            self.stdout.write(f"Wrote {options['output']}")
+        else:
+            self.stdout.write(payload)
+
+        if regressions and options["fail_on_regression"]:
+            raise CommandError(f"{len(regressions)} stage(s) regressed beyond the threshold")
+
+    def _resolve_path(self, options):
+        # Mirrors process_video_dubbing: checkpoints are skipped when audio is streamed.
+        path = options["path"]
+        if path == "auto":
+            checkpoints = getattr(settings, "DUBBING_CHECKPOINTS_ENABLED", True)
+            if checkpoints and not options["stream_audio"]:
+                return PATH_CHECKPOINTED
+            return PATH_IN_PROCESS
+        if path == PATH_CHECKPOINTED and options["stream_audio"]:
+            raise CommandError("The checkpointed path never streams audio; drop --stream-audio")
+        return path
+
+    def _build_pipeline(self, options, asr_engine=None):
+        overrides = {
+            "segmented": options["segmented"],
+            "stream_audio": options["stream_audio"],
+            "progress": None,
+        }
+        if asr_engine:
+            overrides["asr_engine"] = asr_engine
+        if not options["use_cache"]:
+            overrides["artifact_cache"] = None
+            overrides["translation_memory"] = None
+
+        pipeline = build_pipeline(**overrides)
+        if options["engines"] == "stub":
+            pipeline.whisper_service = StubWhisperService()
+            pipeline.translation_service = StubTranslationService(
+                batch_size=pipeline.translation_service.batch_size,
+                translation_memory=pipeline.translation_service.translation_memory,
+            )
+            pipeline.tts_service = StubTTSService()
+        return pipeline
+
+    def _run_once(self, pipeline, video_path, temp_dir, path=PATH_IN_PROCESS):
+        with tempfile.TemporaryDirectory(dir=temp_dir) as run_dir:
+            timer = StageTimer()
+            rss_before = current_rss()
+            started = time.perf_counter()
+            if path == PATH_CHECKPOINTED:
+                self._run_checkpointed(pipeline, video_path, Path(run_dir), timer)
+            else:
+                pipeline.run(
+                    input_video_path=str(video_path),
+                    extracted_audio_path=str(Path(run_dir) / "extracted.wav"),
+                    tts_audio_path=str(Path(run_dir) / "tts.wav"),
+                    output_video_path=str(Path(run_dir) / f"output{video_path.suffix}"),
+                    timer=timer,
+                )
+            wall_time = time.perf_counter() - started
+
+        return {
+            "wall_time": wall_time,
+            "audio_duration": timer.audio_duration,
+            "rss_before_bytes": rss_before,
+            "stages": timer.as_list(),
+        }
+
+    def _run_checkpointed(self, pipeline, video_path, run_dir, timer):
+        # The same manifest and stage hand-offs as the task, minus the Video row and storage.
+        job = {
+            "original_video": video_path.name,
+            "work_dir": str(run_dir),
+            "input_video_path": str(video_path),
+            "extracted_audio_path": str(run_dir / "extracted.wav"),
+            "transcript_path": str(run_dir / "transcript.json"),
+            "translation_path": str(run_dir / "translation.json"),
+            "tts_audio_path": str(run_dir / "tts.wav"),
+            "output_video_path": str(run_dir / f"output{video_path.suffix}"),
+            "source_media": None,
+        }
+        stage_functions = {**STAGE_FUNCTIONS, "extract": _bench_extract, "mux": _bench_mux}
+        run_checkpointed_stages(pipeline, job, timer, stage_functions)
+
+    def _aggregate(self, duration, runs):
+        stage_names = []
+        for run in runs:
+            for stage in run["stages"]:
+                if stage["stage"] not in stage_names:
+                    stage_names.append(stage["stage"])
+
+        stages = {}
+        for name in stage_names:
+            measured = [stage for run in runs for stage in run["stages"] if stage["stage"] == name]
+            stages[name] = {
+                "wall_time": summarize([stage["wall_time"] for stage in measured]),
+                "cpu_time": summarize([stage["cpu_time"] for stage in measured]),
+                "real_time_factor": summarize([stage["real_time_factor"] for stage in measured]),
+                "peak_rss_bytes": max(stage["peak_rss_bytes"] for stage in measured),
+                "cached_runs": sum(1 for stage in measured if stage["cached"]),
+            }
+
+        wall_times = [run["wall_time"] for run in runs]
+        audio_duration = runs[0]["audio_duration"] or duration
+        median_wall = statistics.median(wall_times)
+        return {
+            "duration": duration,
+            "audio_duration": audio_duration,
+            "runs": len(runs),
+            "total": {
+                "wall_time": summarize(wall_times),
+                "real_time_factor": median_wall / audio_duration if audio_duration else None,
+                "audio_seconds_per_second": audio_duration / median_wall if median_wall else None,
+                "videos_per_hour": 3600.0 / median_wall if median_wall else None,
+                "peak_rss_bytes": max(
+                    stage["peak_rss_bytes"] for run in runs for stage in run["stages"]
+                ),
+            },
+            "stages": stages,
+        }
+
+    def _print_result(self, result):
+        self.stderr.write(
+            f"{result['duration']:g}s video, {result['asr_engine']}, {result['runs']} runs: "
+            f"RTF {result['total']['real_time_factor']:.3f}, "
+            f"peak RSS {result['total']['peak_rss_bytes'] / (1024 * 1024):.0f} MB"
+        )
+        for name, stage in result["stages"].items():
+            self.stderr.write(
+                f"  {name:<12} median {stage['wall_time']['median'] * 1000:9.1f} ms"
+                f"  cpu {stage['cpu_time']['median'] * 1000:9.1f} ms"
+            )
+
+    def _compare_asr_engines(self, results):
+        comparison = []
+        reference = {}
+        for result in results:
+            transcribe = result["stages"].get("transcribe") or {}
+            median = (transcribe.get("wall_time") or {}).get("median")
+            reference.setdefault(result["duration"], (result["asr_engine"], median))
+            reference_engine, reference_median = reference[result["duration"]]
+            if result["asr_engine"] == reference_engine:
+                continue
+
+            speedup = reference_median / median if reference_median and median else None
+            comparison.append(
+                {
+                    "duration": result["duration"],
+                    "reference_engine": reference_engine,
+                    "asr_engine": result["asr_engine"],
+                    "transcribe_speedup": speedup,
+                    "total_speedup": self._total_speedup(results, result, reference_engine),
+                }
+            )
+            if speedup:
+                self.stderr.write(
+                    f"{result['asr_engine']} transcribes {result['duration']:g}s "
+                    f"{speedup:.2f}x faster than {reference_engine}"
+                )
+        return comparison
+
+    def _total_speedup(self, results, result, reference_engine):
+        for candidate in results:
+            if (
+                candidate["duration"] == result["duration"]
+                and candidate["asr_engine"] == reference_engine
+            ):
+                before = candidate["total"]["wall_time"]["median"]
+                after = result["total"]["wall_time"]["median"]
+                return before / after if after else None
+        return None
+
+    def _compare(self, report, baseline_path, threshold):
+        with open(baseline_path, "r", encoding="utf-8") as source:
+            baseline = json.load(source)
+
+        # Reports from before --path existed always timed the in-process path.
+        baseline_results = {}
+        for result in baseline.get("results", []):
+            key = (result["duration"], result.get("asr_engine"), result.get("path", PATH_IN_PROCESS))
+            baseline_results[key] = result
+        regressions = []
+        for result in report["results"]:
+            previous = baseline_results.get(
+                (result["duration"], result["asr_engine"], result["path"])
+            )
+            if previous is None:
+                continue
+
+            for name, stage in result["stages"].items():
+                before = (previous["stages"].get(name) or {}).get("wall_time")
+                after = stage["wall_time"]
+                if not before or not after or not before["median"]:
+                    continue
+
+                change = (after["median"] - before["median"]) / before["median"] * 100.0
+                if change > threshold:
+                    regressions.append(
+                        {
+                            "duration": result["duration"],
+                            "asr_engine": result["asr_engine"],
+                            "stage": name,
+                            "baseline_median": before["median"],
+                            "median": after["median"],
+                            "change_percent": change,
+                        }
+                    )
+                    self.stderr.write(
+                        f"Regression: {name} at {result['duration']:g}s is {change:.1f}% slower"
+                    )
+        return regressions
@@ -0,0 +1,198 @@
+import json
+import statistics
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from dubbing.services.audio_service import AudioAssemblyService
+from dubbing.services.cpu_inference import configure_torch_threads
+from dubbing.services.translation_service import HuggingFaceTranslationService
+from dubbing.services.tts_service import CoquiTTSService
+
+DEFAULT_SENTENCES = [
+    "Welcome back to the channel.",
+    "Today we are going to look at how rivers shape the landscape over thousands of years.",
+    "Please remember to turn off the lights when you leave the room.",
+    "The results were better than we expected, but there is still a lot of work to do.",
+    "Can you tell me where the nearest train station is?",
+    "Add two cups of flour and stir until the mixture is smooth.",
+    "Thank you for watching, and see you next time.",
+]
+
+
+def char_f_score(hypothesis, reference, order=6, beta=2.0):
+    precisions = []
+    recalls = []
+    for n in range(1, order + 1):
+        hypothesis_grams = Counter(hypothesis[i : i + n] for i in range(len(hypothesis) - n + 1))
+        reference_grams = Counter(reference[i : i + n] for i in range(len(reference) - n + 1))
+        if not hypothesis_grams or not reference_grams:
+            continue
+        overlap = sum((hypothesis_grams & reference_grams).values())
+        precisions.append(overlap / sum(hypothesis_grams.values()))
+        recalls.append(overlap / sum(reference_grams.values()))
+
+    if not precisions:
+        return 1.0 if hypothesis == reference else 0.0
+    precision = statistics.mean(precisions)
+    recall = statistics.mean(recalls)
+    if not precision and not recall:
+        return 0.0
+    return (1 + beta**2) * precision * recall / (beta**2 * precision + recall)
+
+
+def signal_to_noise_db(reference, candidate):
+    length = min(len(reference), len(candidate))
+    if not length:
+        return None
+    noise = reference[:length] - candidate[:length]
+    noise_power = float(np.mean(noise * noise))
+    if not noise_power:
+        return None
+    return 10.0 * np.log10(float(np.mean(reference[:length] ** 2)) / noise_power)
+
+
+class Command(BaseCommand):
+    help = "Compare fp32 and int8 CPU inference latency and output for translation and MMS TTS."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sentences", help="Text file with one source sentence per line.")
+        parser.add_argument("--repeat", type=int, default=3)
+        parser.add_argument("--threads", type=int, default=0)
+        parser.add_argument("--skip-translation", action="store_true")
+        parser.add_argument("--skip-tts", action="store_true")
+        parser.add_argument("--output", help="Write the JSON report to this path.")
+
+    def handle(self, *args, **options):
+        sentences = DEFAULT_SENTENCES
+        if options["sentences"]:
+            with open(options["sentences"], "r", encoding="utf-8") as source:
+                sentences = [line.strip() for line in source if line.strip()]
+        if not sentences:
+            raise CommandError("No sentences to compare")
+
+        configure_torch_threads(options["threads"])
+        self.translated_texts = None
+        repeat = max(options["repeat"], 1)
+        report = {"sentences": len(sentences), "repeat": repeat, "threads": options["threads"]}
+
+        if not options["skip_translation"]:
+            report["translation"] = self._compare_translation(sentences, repeat)
+        if not options["skip_tts"]:
+            report["tts"] = self._compare_tts(self.translated_texts or sentences, repeat)
+
+        payload = json.dumps(report, indent=2, ensure_ascii=False)
+        if options["output"]:
+            Path(options["output"]).write_text(payload, encoding="utf-8")
+        self.stdout.write(payload)
+
+    def _compare_translation(self, sentences, repeat):
+        model_name = getattr(settings, "HF_TRANSLATION_MODEL_NAME", "")
+        batch_size = getattr(settings, "HF_TRANSLATION_BATCH_SIZE", 16)
+        results = {}
+        outputs = {}
+        for mode, quantize in (("fp32", False), ("int8", True)):
+            service = HuggingFaceTranslationService(
+                model_name, batch_size=batch_size, quantize=quantize
+            )
+            load_started = time.perf_counter()
+            service.warm_up()
+            load_seconds = time.perf_counter() - load_started
+
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                outputs[mode] = service.translate_batch(sentences)
+                timings.append(time.perf_counter() - started)
+
+            results[mode] = {
+                "load_seconds": load_seconds,
+                "batch_seconds": statistics.median(timings),
+                "ms_per_sentence": statistics.median(timings) * 1000 / len(sentences),
+            }
+
+        scores = [
+            char_f_score(candidate, reference)
+            for candidate, reference in zip(outputs["int8"], outputs["fp32"])
+        ]
+        self.translated_texts = outputs["fp32"]
+        results["model"] = model_name
+        results["speedup"] = results["fp32"]["batch_seconds"] / results["int8"]["batch_seconds"]
+        results["exact_match_rate"] = sum(
+            candidate == reference for candidate, reference in zip(outputs["int8"], outputs["fp32"])
+        ) / len(sentences)
+        results["chrf_vs_fp32"] = statistics.mean(scores)
+        results["samples"] = [
+            {"source": source, "fp32": reference, "int8": candidate}
+            for source, reference, candidate in list(
+                zip(sentences, outputs["fp32"], outputs["int8"])
+            )[:3]
+        ]
+        return results
+
+    def _compare_tts(self, texts, repeat):
+        model_name = getattr(settings, "COQUI_TTS_MODEL_NAME", "")
+        # Speaks the fp32 translations when available, since that is what production synthesizes.
+        if not model_name.startswith("facebook/mms-tts-"):
+            return {
+                "model": model_name,
+                "skipped": "Quantized mode only applies to MMS VITS models",
+            }
+
+        audio_service = AudioAssemblyService()
+        results = {"model": model_name}
+        waveforms = {}
+
+        import torch
+
+        with tempfile.TemporaryDirectory(prefix="compare_inference_") as temp_dir:
+            for mode, quantize in (("fp32", False), ("int8", True)):
+                service = CoquiTTSService(model_name, quantize=quantize)
+                load_started = time.perf_counter()
+                service.warm_up()
+                load_seconds = time.perf_counter() - load_started
+
+                timings = []
+                audio_seconds = 0.0
+                for _ in range(repeat):
+                    waveforms[mode] = []
+                    audio_seconds = 0.0
+                    started = time.perf_counter()
+                    for index, text in enumerate(texts):
+                        # VITS samples noise; a fixed seed makes the two modes comparable.
+                        torch.manual_seed(index)
+                        path = str(Path(temp_dir) / f"{mode}_{index}.wav")
+                        service.synthesize_to_file(text=text, output_audio_path=path)
+                        samples, sample_rate = audio_service.read_track(path)
+                        waveforms[mode].append(samples)
+                        audio_seconds += len(samples) / float(sample_rate)
+                    timings.append(time.perf_counter() - started)
+
+                elapsed = statistics.median(timings)
+                results[mode] = {
+                    "load_seconds": load_seconds,
+                    "synthesis_seconds": elapsed,
+                    "audio_seconds": audio_seconds,
+                    "real_time_factor": elapsed / audio_seconds if audio_seconds else None,
+                }
+
+        snr = [
+            signal_to_noise_db(reference, candidate)
+            for reference, candidate in zip(waveforms["fp32"], waveforms["int8"])
+        ]
+        snr = [value for value in snr if value is not None]
+        results["speedup"] = (
+            results["fp32"]["synthesis_seconds"] / results["int8"]["synthesis_seconds"]
+        )
+        results["duration_ratio"] = (
+            results["int8"]["audio_seconds"] / results["fp32"]["audio_seconds"]
+            if results["fp32"]["audio_seconds"]
+            else None
+        )
+        results["snr_db_vs_fp32"] = statistics.mean(snr) if snr else None
+        return results
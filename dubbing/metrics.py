@@ -0,0 +1,106 @@
+from django.db.models import Count, Q, Sum
+
+from .models import PipelineRun, PipelineStageMetric
+
+WALL_TIME_BUCKETS = [0.5, 1, 2, 5, 10, 30, 60, 120, 300, 600, 1800, 3600]
+REAL_TIME_FACTOR_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8]
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _histogram(lines, name, help_text, field, buckets, queryset):
+    aggregates = {
+        f"bucket_{index}": Count("id", filter=Q(**{f"{field}__lte": bound}))
+        for index, bound in enumerate(buckets)
+    }
+    rows = (
+        queryset.filter(**{f"{field}__isnull": False})
+        .values("stage")
+        .order_by("stage")
+        .annotate(total=Sum(field), count=Count("id"), **aggregates)
+    )
+
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for row in rows:
+        stage = row["stage"]
+        for index, bound in enumerate(buckets):
+            lines.append(
+                f'{name}_bucket{{stage="{stage}",le="{_format_value(float(bound))}"}} '
+                f'{row[f"bucket_{index}"]}'
+            )
+        lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {row["count"]}')
+        lines.append(f'{name}_sum{{stage="{stage}"}} {_format_value(float(row["total"] or 0.0))}')
+        lines.append(f'{name}_count{{stage="{stage}"}} {row["count"]}')
+
+
+def render_prometheus_metrics():
+    lines = []
+    stages = PipelineStageMetric.objects.filter(cached=False)
+
+    _histogram(
+        lines,
+        "dubbing_stage_wall_seconds",
+        "Wall-clock time spent in each dubbing pipeline stage.",
+        "wall_time",
+        WALL_TIME_BUCKETS,
+        stages,
+    )
+    _histogram(
+        lines,
+        "dubbing_stage_cpu_seconds",
+        "CPU time spent in each dubbing pipeline stage.",
+        "cpu_time",
+        WALL_TIME_BUCKETS,
+        stages,
+    )
+    _histogram(
+        lines,
+        "dubbing_stage_real_time_factor",
+        "Stage wall time divided by the audio duration.",
+        "real_time_factor",
+        REAL_TIME_FACTOR_BUCKETS,
+        stages,
+    )
+
+    lines.append("# HELP dubbing_stage_cache_hits_total Stages served from the artifact cache.")
+    lines.append("# TYPE dubbing_stage_cache_hits_total counter")
+    for row in (
+        PipelineStageMetric.objects.filter(cached=True)
+        .values("stage")
+        .order_by("stage")
+        .annotate(count=Count("id"))
+    ):
+        lines.append(f'dubbing_stage_cache_hits_total{{stage="{row["stage"]}"}} {row["count"]}')
+
+    translation_memory = PipelineRun.objects.aggregate(
+        memory_hit=Sum("tm_memory_hits"),
+        database_hit=Sum("tm_database_hits"),
+        miss=Sum("tm_misses"),
+    )
+    lines.append(
+        "# HELP dubbing_translation_memory_lookups_total Translation memory sentence lookups."
+    )
+    lines.append("# TYPE dubbing_translation_memory_lookups_total counter")
+    for result, count in translation_memory.items():
+        lines.append(f'dubbing_translation_memory_lookups_total{{result="{result}"}} {count or 0}')
+
+    lookups = sum(count or 0 for count in translation_memory.values())
+    hits = (translation_memory["memory_hit"] or 0) + (translation_memory["database_hit"] or 0)
+    lines.append(
+        "# HELP dubbing_translation_memory_hit_ratio "
+        "Share of sentences served by translation memory."
+    )
+    lines.append("# TYPE dubbing_translation_memory_hit_ratio gauge")
+    lines.append(
+        f"dubbing_translation_memory_hit_ratio {_format_value(hits / lookups if lookups else 0.0)}"
+    )
+
+    lines.append("# HELP dubbing_pipeline_runs_total Dubbing pipeline runs by final status.")
+    lines.append("# TYPE dubbing_pipeline_runs_total counter")
+    for row in PipelineRun.objects.values("status").order_by("status").annotate(count=Count("id")):
+        lines.append(f'dubbing_pipeline_runs_total{{status="{row["status"]}"}} {row["count"]}')
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.11 on 2026-10-18 16:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dubbing', '0001_initial'),
+        ('videos', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PipelineRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='running', max_length=20)),
+                ('audio_duration', models.FloatField(blank=True, null=True)),
+                ('wall_time', models.FloatField(default=0.0)),
+                ('cpu_time', models.FloatField(default=0.0)),
+                ('peak_rss_bytes', models.BigIntegerField(default=0)),
+                ('real_time_factor', models.FloatField(blank=True, null=True)),
+                ('error_message', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('video', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pipeline_runs', to='videos.video')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PipelineStageMetric',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stage', models.CharField(max_length=32)),
+                ('wall_time', models.FloatField(default=0.0)),
+                ('cpu_time', models.FloatField(default=0.0)),
+                ('peak_rss_bytes', models.BigIntegerField(default=0)),
+                ('real_time_factor', models.FloatField(blank=True, null=True)),
+                ('cached', models.BooleanField(default=False)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stages', to='dubbing.pipelinerun')),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.11 on 2026-10-18 16:28
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dubbing', '0002_pipelinerun_pipelinestagemetric'),
+        ('videos', '0005_video_media_metadata'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DubbingJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('dispatched', 'Dispatched'), ('finished', 'Finished')], default='pending', max_length=20)),
+                ('lane', models.CharField(max_length=20)),
+                ('queue', models.CharField(max_length=100)),
+                ('priority', models.PositiveSmallIntegerField(default=0)),
+                ('duration_seconds', models.FloatField(blank=True, null=True)),
+                ('task_id', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('dispatched_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dubbing_jobs', to=settings.AUTH_USER_MODEL)),
+                ('video', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dubbing_jobs', to='videos.video')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'status'], name='dubbing_job_user_status'), models.Index(fields=['status', 'dispatched_at'], name='dubbing_job_status_dispatched')],
+            },
+        ),
+    ]
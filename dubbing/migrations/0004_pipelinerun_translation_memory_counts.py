@@ -0,0 +1,28 @@
+# Generated by Django 5.2.11 on 2026-10-18 16:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dubbing', '0003_dubbing_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pipelinerun',
+            name='tm_database_hits',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='pipelinerun',
+            name='tm_memory_hits',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='pipelinerun',
+            name='tm_misses',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
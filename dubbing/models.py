@@ -1,3 +1,105 @@
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+
+class TranslationMemoryEntry(models.Model):
+    model_name = models.CharField(max_length=255)
+    source_hash = models.CharField(max_length=64)
+    source_text = models.TextField()
+    translated_text = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["model_name", "source_hash"],
+                name="unique_translation_memory_entry",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.model_name}: {self.source_text[:50]}"
+
+
+class PipelineRun(models.Model):
+    STATUS_RUNNING = "running"
+    STATUS_COMPLETED = "completed"
+    STATUS_FAILED = "failed"
+
+    STATUS_CHOICES = [
+        (STATUS_RUNNING, "Running"),
+        (STATUS_COMPLETED, "Completed"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    video = models.ForeignKey(
+        "videos.Video", on_delete=models.CASCADE, related_name="pipeline_runs"
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_RUNNING)
+    audio_duration = models.FloatField(null=True, blank=True)
+    wall_time = models.FloatField(default=0.0)
+    cpu_time = models.FloatField(default=0.0)
+    peak_rss_bytes = models.BigIntegerField(default=0)
+    real_time_factor = models.FloatField(null=True, blank=True)
+    tm_memory_hits = models.PositiveIntegerField(default=0)
+    tm_database_hits = models.PositiveIntegerField(default=0)
+    tm_misses = models.PositiveIntegerField(default=0)
+    error_message = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"PipelineRun #{self.id} for video #{self.video_id} ({self.status})"
+
+
+class PipelineStageMetric(models.Model):
+    run = models.ForeignKey(PipelineRun, on_delete=models.CASCADE, related_name="stages")
+    stage = models.CharField(max_length=32)
+    wall_time = models.FloatField(default=0.0)
+    cpu_time = models.FloatField(default=0.0)
+    peak_rss_bytes = models.BigIntegerField(default=0)
+    real_time_factor = models.FloatField(null=True, blank=True)
+    cached = models.BooleanField(default=False)
+
+    class Meta:
+        ordering = ["id"]
+
+    def __str__(self):
+        return f"{self.stage} ({self.wall_time:.2f}s)"
+
+
+class DubbingJob(models.Model):
+    STATUS_PENDING = "pending"
+    STATUS_DISPATCHED = "dispatched"
+    STATUS_FINISHED = "finished"
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_DISPATCHED, "Dispatched"),
+        (STATUS_FINISHED, "Finished"),
+    ]
+
+    video = models.ForeignKey(
+        "videos.Video", on_delete=models.CASCADE, related_name="dubbing_jobs"
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="dubbing_jobs"
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    lane = models.CharField(max_length=20)
+    queue = models.CharField(max_length=100)
+    priority = models.PositiveSmallIntegerField(default=0)
+    duration_seconds = models.FloatField(null=True, blank=True)
+    task_id = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    dispatched_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "status"], name="dubbing_job_user_status"),
+            models.Index(fields=["status", "dispatched_at"], name="dubbing_job_status_dispatched"),
+        ]
+
+    def __str__(self):
+        return f"DubbingJob #{self.id} for video #{self.video_id} ({self.status}, {self.lane})"
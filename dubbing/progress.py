@@ -0,0 +1,217 @@
+import asyncio
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.db.models import F
+from django.utils import timezone
+
+from videos.models import Video
+
+# Share of the overall progress bar given to each stage, in pipeline order.
+STAGE_WEIGHTS = [
+    ("extract", 5),
+    ("transcribe", 30),
+    ("translate", 15),
+    ("synthesize", 40),
+    ("mux", 10),
+]
+STAGE_QUEUED = "queued"
+STAGE_DONE = "done"
+FINAL_STATUSES = {Video.STATUS_COMPLETED, Video.STATUS_FAILED}
+PROGRESS_CACHE_ALIAS = "dubbing_progress"
+
+
+def progress_cache_key(video_id):
+    return f"dubbing:progress:{video_id}"
+
+
+def _progress_cache():
+    # Only a cache shared by web and worker processes is useful here; without one the
+    # readers fall back to the progress columns on Video.
+    if PROGRESS_CACHE_ALIAS not in settings.CACHES:
+        return None
+    return caches[PROGRESS_CACHE_ALIAS]
+
+
+def progress_cache_configured():
+    return _progress_cache() is not None
+
+
+def overall_percent(stage, fraction):
+    completed = 0
+    for name, weight in STAGE_WEIGHTS:
+        if name == stage:
+            fraction = min(max(float(fraction), 0.0), 1.0)
+            return int(completed + weight * fraction)
+        completed += weight
+    return 100 if stage == STAGE_DONE else 0
+
+
+def progress_snapshot(video):
+    return {
+        "video_id": video.id,
+        "status": video.status,
+        "stage": video.progress_stage,
+        "percent": video.progress_percent,
+        "error_message": video.error_message,
+    }
+
+
+def publish_progress(snapshot, timeout=3600):
+    cache = _progress_cache()
+    if cache is not None:
+        cache.set(progress_cache_key(snapshot["video_id"]), snapshot, timeout)
+
+
+def reset_progress(video):
+    video.progress_stage = STAGE_QUEUED
+    video.progress_percent = 0
+    video.progress_updated_at = timezone.now()
+    return ["progress_stage", "progress_percent", "progress_updated_at"]
+
+
+def load_progress(video_id):
+    cache = _progress_cache()
+    snapshot = cache.get(progress_cache_key(video_id)) if cache is not None else None
+    if snapshot is not None:
+        return snapshot
+
+    video = Video.objects.filter(id=video_id).first()
+    if video is None:
+        return None
+    # Seed the cache so the next poll of an idle video does not hit the database again.
+    snapshot = progress_snapshot(video)
+    publish_progress(snapshot)
+    return snapshot
+
+
+async def aload_progress(video_id):
+    cache = _progress_cache()
+    snapshot = await cache.aget(progress_cache_key(video_id)) if cache is not None else None
+    if snapshot is not None:
+        return snapshot
+
+    video = await Video.objects.filter(id=video_id).afirst()
+    if video is None:
+        return None
+    snapshot = progress_snapshot(video)
+    if cache is not None:
+        await cache.aset(progress_cache_key(video_id), snapshot, 3600)
+    return snapshot
+
+
+class ProgressReporter:
+    def __init__(self, video_id, min_interval=1.0, cache_timeout=3600):
+        self.video_id = video_id
+        self.min_interval = min_interval
+        self.cache_timeout = cache_timeout
+        self._owner = threading.current_thread()
+        self._lock = threading.Lock()
+        self._stage = ""
+        self._percent = 0
+        self._written = None
+        self._last_write = 0.0
+
+    def __call__(self, stage, fraction=0.0):
+        percent = overall_percent(stage, fraction)
+        with self._lock:
+            if percent < self._percent or (stage, percent) == (self._stage, self._percent):
+                return
+            stage_changed = stage != self._stage
+            self._stage = stage
+            self._percent = percent
+
+            # Segment updates arrive far faster than anyone can watch them; only a stage
+            # change or the throttle interval elapsing turns them into a write.
+            if stage_changed or time.monotonic() - self._last_write >= self.min_interval:
+                self._write()
+
+    def flush(self):
+        with self._lock:
+            if self._stage and self._written != (self._stage, self._percent):
+                self._write()
+
+    def _write(self):
+        state = (self._stage, self._percent)
+        self._last_write = time.monotonic()
+        self._written = state
+        now = timezone.now()
+        Video.objects.filter(id=self.video_id).update(
+            progress_stage=self._stage,
+            progress_percent=self._percent,
+            progress_updated_at=now,
+            version=F("version") + 1,
+            updated_at=now,
+        )
+        publish_progress(
+            {
+                "video_id": self.video_id,
+                "status": Video.STATUS_PROCESSING,
+                "stage": self._stage,
+                "percent": self._percent,
+                "error_message": "",
+            },
+            self.cache_timeout,
+        )
+
+        if threading.current_thread() is not self._owner:
+            # Pipeline worker threads would otherwise leak their own connection.
+            connections.close_all()
+
+
+def format_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class ProgressEventStream:
+    def __init__(self, video_id, poll_interval=1.0, heartbeat_interval=15.0, max_duration=3600):
+        self.video_id = video_id
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.max_duration = max_duration
+
+    def __iter__(self):
+        state = self._initial_state()
+        while True:
+            chunk, finished = self._step(state, load_progress(self.video_id))
+            if chunk:
+                yield chunk
+            if finished:
+                return
+            time.sleep(self.poll_interval)
+
+    async def __aiter__(self):
+        state = self._initial_state()
+        while True:
+            chunk, finished = self._step(state, await aload_progress(self.video_id))
+            if chunk:
+                yield chunk
+            if finished:
+                return
+            await asyncio.sleep(self.poll_interval)
+
+    def _initial_state(self):
+        now = time.monotonic()
+        return {"started": now, "last_sent": now, "last_snapshot": None}
+
+    def _step(self, state, snapshot):
+        now = time.monotonic()
+        if snapshot is None:
+            return format_event("error", {"error": "Video not found"}), True
+
+        chunk = ""
+        if snapshot != state["last_snapshot"]:
+            chunk = format_event("progress", snapshot)
+            state["last_snapshot"] = snapshot
+            state["last_sent"] = now
+        elif now - state["last_sent"] >= self.heartbeat_interval:
+            chunk = ": keep-alive\n\n"
+            state["last_sent"] = now
+
+        if snapshot["status"] in FINAL_STATUSES:
+            return chunk, True
+        return chunk, now - state["started"] >= self.max_duration
@@ -0,0 +1,100 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import DubbingJob
+
+DEFAULT_LANES = [
+    {"name": "short", "max_seconds": 120, "queue": "dubbing_short", "priority": 0},
+    {"name": "medium", "max_seconds": 900, "queue": "dubbing_medium", "priority": 3},
+    {"name": "long", "max_seconds": None, "queue": "dubbing_long", "priority": 6},
+]
+
+
+def scheduler_lanes():
+    return getattr(settings, "DUBBING_SCHEDULER_LANES", None) or DEFAULT_LANES
+
+
+def lane_for_duration(duration_seconds):
+    lanes = scheduler_lanes()
+    # Unprobed videos could be any length, so they never jump ahead of known short clips.
+    if duration_seconds is None:
+        return lanes[-1]
+
+    for lane in lanes:
+        if lane["max_seconds"] is None or duration_seconds <= lane["max_seconds"]:
+            return lane
+    return lanes[-1]
+
+
+def enqueue_video(video):
+    lane = lane_for_duration(video.duration_seconds)
+    return DubbingJob.objects.create(
+        video=video,
+        user_id=video.user_id,
+        lane=lane["name"],
+        queue=lane["queue"],
+        priority=lane["priority"],
+        duration_seconds=video.duration_seconds,
+    )
+
+
+def claim_pending_jobs(user_id):
+    limit = getattr(settings, "DUBBING_MAX_IN_FLIGHT_PER_USER", 2)
+
+    with transaction.atomic():
+        # Locking the user row serializes concurrent releases for the same user, so two
+        # finishing jobs can never both hand out the last free slot.
+        get_user_model().objects.select_for_update().filter(pk=user_id).first()
+
+        jobs = DubbingJob.objects.filter(user_id=user_id)
+        pending = jobs.filter(status=DubbingJob.STATUS_PENDING).order_by(
+            F("duration_seconds").asc(nulls_last=True), "created_at", "id"
+        )
+        if limit:
+            free_slots = limit - jobs.filter(status=DubbingJob.STATUS_DISPATCHED).count()
+            if free_slots <= 0:
+                return []
+            pending = pending[:free_slots]
+
+        claimed = list(pending)
+        if claimed:
+            DubbingJob.objects.filter(id__in=[job.id for job in claimed]).update(
+                status=DubbingJob.STATUS_DISPATCHED,
+                dispatched_at=timezone.now(),
+            )
+    return claimed
+
+
+def finish_video_jobs(video_id):
+    return DubbingJob.objects.filter(
+        video_id=video_id,
+        status=DubbingJob.STATUS_DISPATCHED,
+    ).update(status=DubbingJob.STATUS_FINISHED, finished_at=timezone.now())
+
+
+def expire_stale_jobs(timeout_hours):
+    # A worker killed mid-run never reports back; its slot is freed once the job has been
+    # in flight for longer than any real run should take.
+    cutoff = timezone.now() - timedelta(hours=timeout_hours)
+    stale = DubbingJob.objects.filter(
+        status=DubbingJob.STATUS_DISPATCHED,
+        dispatched_at__lte=cutoff,
+    )
+    video_ids = list(stale.values_list("video_id", flat=True))
+    stale.filter(video_id__in=video_ids).update(
+        status=DubbingJob.STATUS_FINISHED, finished_at=timezone.now()
+    )
+    return video_ids
+
+
+def users_with_pending_jobs():
+    return list(
+        DubbingJob.objects.filter(status=DubbingJob.STATUS_PENDING)
+        .values_list("user_id", flat=True)
+        .distinct()
+    )
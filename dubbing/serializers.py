@@ -0,0 +1,37 @@
+from rest_framework import serializers
+
+from .models import PipelineRun, PipelineStageMetric
+
+
+class PipelineStageMetricSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PipelineStageMetric
+        fields = [
+            "stage",
+            "wall_time",
+            "cpu_time",
+            "peak_rss_bytes",
+            "real_time_factor",
+            "cached",
+        ]
+
+
+class PipelineRunSerializer(serializers.ModelSerializer):
+    stages = PipelineStageMetricSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = PipelineRun
+        fields = [
+            "id",
+            "video",
+            "status",
+            "audio_duration",
+            "wall_time",
+            "cpu_time",
+            "peak_rss_bytes",
+            "real_time_factor",
+            "error_message",
+            "created_at",
+            "finished_at",
+            "stages",
+        ]
@@ -1,3 +1,5 @@
+from .artifact_cache import ArtifactCache
+from .model_registry import ModelRegistry
 from .pipeline_service import DubbingPipelineService
 
-__all__ = ["DubbingPipelineService"]
+__all__ = ["ArtifactCache", "DubbingPipelineService", "ModelRegistry"]
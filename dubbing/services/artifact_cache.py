@@ -0,0 +1,177 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import wave
+from pathlib import Path
+
+import numpy as np
+
+# Other processes write to the same directory, so the local size estimate is re-synced with
+# a full scan at least this often.
+EVICT_INTERVAL_SECONDS = 300
+# Eviction frees down to this share of the limit, so a full cache is not rescanned on the
+# very next write.
+EVICT_LOW_WATER = 0.9
+
+
+def hash_wav_pcm(path, chunk_frames=1 << 18):
+    digest = hashlib.sha256()
+    with wave.open(str(path), "rb") as wav_file:
+        for chunk in iter(lambda: wav_file.readframes(chunk_frames), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_samples(samples):
+    pcm = (np.clip(samples, -1.0, 1.0) * 32768.0).clip(-32768, 32767).astype("<i2")
+    return hashlib.sha256(pcm.tobytes()).hexdigest()
+
+
+class ArtifactCache:
+    def __init__(self, root, max_size_mb=0, evict_interval=EVICT_INTERVAL_SECONDS):
+        self.root = Path(root)
+        self.max_size_bytes = int(max_size_mb or 0) * 1024 * 1024
+        self.evict_interval = evict_interval
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._estimated_bytes = None
+        self._last_evict = 0.0
+        self._lock = threading.Lock()
+
+    def make_key(self, stage, audio_hash, options):
+        payload = json.dumps(
+            {"stage": stage, "audio": audio_hash, "options": options},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get_json(self, key):
+        path = self._path(key, ".json")
+        try:
+            with open(path, "r", encoding="utf-8") as source:
+                value = json.load(source)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        self._touch(path)
+        return value
+
+    def put_json(self, key, value):
+        payload = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        self._atomic_write(self._path(key, ".json"), lambda target: target.write(payload))
+
+    def get_file(self, key, destination_path, suffix=".wav"):
+        path = self._path(key, suffix)
+        try:
+            shutil.copyfile(path, destination_path)
+        except FileNotFoundError:
+            return False
+
+        self._touch(path)
+        return True
+
+    def get_path(self, key, suffix=".wav"):
+        path = self._path(key, suffix)
+        if not path.exists():
+            return None
+
+        self._touch(path)
+        return path
+
+    def put_file(self, key, source_path, suffix=".wav"):
+        def copy(target):
+            with open(source_path, "rb") as source:
+                shutil.copyfileobj(source, target)
+
+        self._atomic_write(self._path(key, suffix), copy)
+
+    def put_with(self, key, writer, suffix=".wav"):
+        self._atomic_write(self._path(key, suffix), writer)
+
+    def evict(self):
+        if not self.max_size_bytes:
+            return 0
+
+        entries = []
+        total = 0
+        for path in self.root.glob("*/*"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            if path.name.startswith("."):
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        if total <= self.max_size_bytes:
+            target = total
+        else:
+            target = int(self.max_size_bytes * EVICT_LOW_WATER)
+
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+
+        with self._lock:
+            self._estimated_bytes = total
+            self._last_evict = time.monotonic()
+        return removed
+
+    def _path(self, key, suffix):
+        return self.root / key[:2] / f"{key}{suffix}"
+
+    def _touch(self, path):
+        try:
+            os.utime(path, None)
+        except FileNotFoundError:
+            pass
+
+    def _atomic_write(self, path, writer):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(prefix=".tmp-", dir=path.parent)
+        try:
+            with os.fdopen(fd, "wb") as target:
+                writer(target)
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+        self._after_write(path)
+
+    def _after_write(self, path):
+        # Scanning the whole directory on every write gets slower as the cache grows, so the
+        # scan only runs once the running estimate passes the limit or the interval is up.
+        if not self.max_size_bytes:
+            return
+
+        try:
+            size = path.stat().st_size
+        except FileNotFoundError:
+            size = 0
+
+        with self._lock:
+            if self._estimated_bytes is not None:
+                self._estimated_bytes += size
+            due = (
+                self._estimated_bytes is None
+                or self._estimated_bytes > self.max_size_bytes
+                or time.monotonic() - self._last_evict >= self.evict_interval
+            )
+        if due:
+            self.evict()
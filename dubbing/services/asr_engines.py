@@ -0,0 +1,157 @@
+ENGINE_OPENAI_WHISPER = "openai-whisper"
+ENGINE_FASTER_WHISPER = "faster-whisper"
+
+LANGUAGE_DETECTION_SAMPLES = 30 * 16000
+
+# Parameter counts in millions, checked in order so "large-v3-turbo" matches turbo. Unknown
+# names are sized as large, which keeps memory planning on the safe side.
+WHISPER_PARAMETERS_M = [
+    ("turbo", 809),
+    ("large", 1550),
+    ("medium", 769),
+    ("small", 244),
+    ("base", 74),
+    ("tiny", 39),
+]
+# Weights plus decoder caches and runtime buffers.
+MODEL_MEMORY_OVERHEAD = 1.5
+
+
+def estimate_model_bytes(model_name, bytes_per_parameter):
+    name = (model_name or "").lower()
+    parameters = next(
+        (count for key, count in WHISPER_PARAMETERS_M if key in name), WHISPER_PARAMETERS_M[1][1]
+    )
+    return int(parameters * 1_000_000 * bytes_per_parameter * MODEL_MEMORY_OVERHEAD)
+
+
+class OpenAIWhisperEngine:
+    name = ENGINE_OPENAI_WHISPER
+    registry_key = "whisper"
+
+    def __init__(self, model_name, threads=0, **kwargs):
+        self.model_name = model_name
+        self.threads = threads
+
+    def load(self):
+        try:
+            import whisper
+        except ImportError as exc:
+            raise RuntimeError(
+                "whisper package is not installed. Install with: pip install openai-whisper"
+            ) from exc
+
+        if self.threads:
+            import torch
+
+            torch.set_num_threads(self.threads)
+        return whisper.load_model(self.model_name)
+
+    def estimated_bytes(self):
+        return estimate_model_bytes(self.model_name, 4)
+
+    def transcribe(
+        self, model, audio, language=None, condition_on_previous_text=True, progress=None
+    ):
+        # openai-whisper has no per-segment callback; progress is reported per stage only.
+        kwargs = {"condition_on_previous_text": condition_on_previous_text}
+        if language:
+            kwargs["language"] = language
+
+        result = model.transcribe(audio, **kwargs)
+        return {
+            "text": result.get("text") or "",
+            "language": result.get("language"),
+            "segments": result.get("segments") or [],
+        }
+
+    def detect_language(self, model, audio):
+        import whisper
+
+        mel = whisper.log_mel_spectrogram(
+            whisper.pad_or_trim(audio), n_mels=model.dims.n_mels
+        ).to(model.device)
+        _, probabilities = model.detect_language(mel)
+        return max(probabilities, key=probabilities.get)
+
+
+class FasterWhisperEngine:
+    name = ENGINE_FASTER_WHISPER
+
+    def __init__(self, model_name, threads=0, compute_type="int8", beam_size=1, **kwargs):
+        self.model_name = model_name
+        self.threads = threads
+        self.compute_type = compute_type
+        self.beam_size = beam_size
+        # An int8 and a float model of the same size must not share a registry slot.
+        self.registry_key = f"faster_whisper_{compute_type}"
+
+    def load(self):
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError as exc:
+            raise RuntimeError(
+                "faster-whisper package is not installed. Install with: pip install faster-whisper"
+            ) from exc
+
+        return WhisperModel(
+            self.model_name,
+            device="cpu",
+            compute_type=self.compute_type,
+            cpu_threads=self.threads or 0,
+        )
+
+    def estimated_bytes(self):
+        compute_type = (self.compute_type or "").lower()
+        if compute_type.startswith("int8"):
+            bytes_per_parameter = 1
+        elif "16" in compute_type:
+            bytes_per_parameter = 2
+        else:
+            bytes_per_parameter = 4
+        return estimate_model_bytes(self.model_name, bytes_per_parameter)
+
+    def transcribe(
+        self, model, audio, language=None, condition_on_previous_text=True, progress=None
+    ):
+        segments, info = model.transcribe(
+            audio,
+            language=language or None,
+            beam_size=self.beam_size,
+            condition_on_previous_text=condition_on_previous_text,
+        )
+        # Segments are decoded lazily; materializing them is the actual transcription, so
+        # each one doubles as a progress tick.
+        duration = getattr(info, "duration", 0) or 0
+        raw_segments = []
+        for segment in segments:
+            raw_segments.append({"start": segment.start, "end": segment.end, "text": segment.text})
+            if progress is not None and duration:
+                progress(min(segment.end / duration, 1.0))
+        return {
+            "text": " ".join(segment["text"].strip() for segment in raw_segments),
+            "language": info.language,
+            "segments": raw_segments,
+        }
+
+    def detect_language(self, model, audio):
+        # Language is detected eagerly inside transcribe(); the segment generator is never
+        # consumed, so nothing gets decoded.
+        _, info = model.transcribe(audio[:LANGUAGE_DETECTION_SAMPLES], beam_size=1)
+        return info.language
+
+
+ASR_ENGINES = {
+    ENGINE_OPENAI_WHISPER: OpenAIWhisperEngine,
+    ENGINE_FASTER_WHISPER: FasterWhisperEngine,
+}
+
+
+def build_asr_engine(name, model_name, **options):
+    try:
+        engine_class = ASR_ENGINES[name or ENGINE_OPENAI_WHISPER]
+    except KeyError as exc:
+        raise RuntimeError(
+            f"Unknown ASR engine '{name}'. Choose one of: {', '.join(sorted(ASR_ENGINES))}"
+        ) from exc
+    return engine_class(model_name, **options)
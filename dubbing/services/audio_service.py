@@ -0,0 +1,127 @@
+import math
+import wave
+
+import numpy as np
+
+
+def read_wav_duration(audio_path):
+    with wave.open(audio_path, "rb") as wav_file:
+        return wav_file.getnframes() / float(wav_file.getframerate())
+
+
+class AudioAssemblyService:
+    def __init__(self, max_compression=1.5, frame_size=1024, write_block_size=1 << 16):
+        self.max_compression = max(float(max_compression or 1.0), 1.0)
+        self.frame_size = frame_size
+        self.write_block_size = write_block_size
+
+    def assemble(self, segments, duration, output_audio_path, sample_rate=None):
+        track, sample_rate = self.build_track(segments, duration, sample_rate=sample_rate)
+        self.write_track(track, sample_rate, output_audio_path)
+        return output_audio_path
+
+    def build_track(self, segments, duration, sample_rate=None):
+        placed = sorted(
+            (segment for segment in segments if segment.get("audio_path")),
+            key=lambda segment: segment["start"],
+        )
+        if not placed:
+            raise RuntimeError("No synthesized audio to assemble")
+
+        if sample_rate is None:
+            with wave.open(placed[0]["audio_path"], "rb") as wav_file:
+                sample_rate = wav_file.getframerate()
+
+        total_length = max(int(round(duration * sample_rate)), 1)
+        track = np.zeros(total_length, dtype=np.float32)
+
+        for position, segment in enumerate(placed):
+            start = min(int(round(segment["start"] * sample_rate)), total_length)
+            if position + 1 < len(placed):
+                slot_end = int(round(placed[position + 1]["start"] * sample_rate))
+            else:
+                slot_end = total_length
+            slot_length = max(min(slot_end, total_length) - start, 0)
+            if slot_length == 0:
+                continue
+
+            samples = self._read_samples(segment["audio_path"], sample_rate)
+            samples = self._fit_to_slot(samples, slot_length)
+            track[start : start + len(samples)] += samples
+
+        return track, sample_rate
+
+    def read_track(self, audio_path):
+        with wave.open(str(audio_path), "rb") as wav_file:
+            sample_rate = wav_file.getframerate()
+        return self._read_samples(str(audio_path), sample_rate), sample_rate
+
+    def _read_samples(self, audio_path, sample_rate):
+        with wave.open(audio_path, "rb") as wav_file:
+            if wav_file.getsampwidth() != 2:
+                raise RuntimeError(f"Unsupported sample width in {audio_path}")
+            channels = wav_file.getnchannels()
+            source_rate = wav_file.getframerate()
+            pcm = np.frombuffer(wav_file.readframes(wav_file.getnframes()), dtype=np.int16)
+
+        samples = pcm.astype(np.float32) / 32768.0
+        if channels > 1:
+            samples = samples.reshape(-1, channels).mean(axis=1)
+
+        if source_rate != sample_rate and len(samples):
+            target_length = int(round(len(samples) * sample_rate / float(source_rate)))
+            samples = self._resample(samples, target_length)
+        return samples
+
+    def _fit_to_slot(self, samples, slot_length):
+        if len(samples) <= slot_length:
+            return samples
+
+        target_length = max(int(math.ceil(len(samples) / self.max_compression)), slot_length)
+        samples = self._time_compress(samples, target_length)
+        if len(samples) > slot_length:
+            samples = samples[:slot_length].copy()
+            fade_length = min(slot_length, 256)
+            samples[-fade_length:] *= np.linspace(1.0, 0.0, fade_length, dtype=np.float32)
+        return samples
+
+    def _time_compress(self, samples, target_length):
+        frame = self.frame_size
+        if len(samples) < frame * 2 or target_length < frame * 2:
+            return self._resample(samples, target_length)
+
+        # Overlap-add: read windowed frames at a stretched hop and lay them down at
+        # the output hop, which shortens the signal without shifting pitch.
+        hop_out = frame // 4
+        hop_in = (len(samples) - frame) / float(max(target_length - frame, 1)) * hop_out
+        frame_count = (target_length - frame) // hop_out + 1
+
+        offsets = np.arange(frame)
+        read_starts = np.minimum(
+            (np.arange(frame_count) * hop_in).astype(np.int64), len(samples) - frame
+        )
+        window = np.hanning(frame).astype(np.float32)
+        frames = samples[read_starts[:, None] + offsets[None, :]] * window
+
+        write_index = (np.arange(frame_count) * hop_out)[:, None] + offsets[None, :]
+        output = np.zeros(target_length, dtype=np.float32)
+        weights = np.zeros(target_length, dtype=np.float32)
+        np.add.at(output, write_index, frames)
+        np.add.at(weights, write_index, np.broadcast_to(window, frames.shape))
+        return output / np.maximum(weights, 1e-3)
+
+    def _resample(self, samples, target_length):
+        if target_length <= 0:
+            return np.zeros(0, dtype=np.float32)
+        positions = np.linspace(0, len(samples) - 1, target_length)
+        return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+    def write_track(self, track, sample_rate, output_audio):
+        with wave.open(output_audio, "wb") as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(int(sample_rate))
+            for start in range(0, len(track), self.write_block_size):
+                block = track[start : start + self.write_block_size]
+                pcm = (np.clip(block, -1.0, 1.0) * 32767.0).astype(np.int16)
+                wav_file.writeframes(pcm.tobytes())
@@ -0,0 +1,49 @@
+import os
+from contextlib import nullcontext
+
+INFERENCE_MODE_FP32 = "fp32"
+INFERENCE_MODE_INT8 = "int8"
+
+
+def worker_thread_count(concurrency=0, threads=0):
+    if threads:
+        return max(int(threads), 1)
+    if not concurrency:
+        return 0
+    return max((os.cpu_count() or 1) // int(concurrency), 1)
+
+
+def configure_torch_threads(threads):
+    if not threads:
+        return False
+
+    try:
+        import torch
+    except ImportError:
+        return False
+
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Only allowed before the first parallel op in the process.
+        pass
+    return True
+
+
+def quantize_linear_layers(model):
+    import torch
+
+    model.eval()
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def inference_context(enabled=True):
+    if not enabled:
+        return nullcontext()
+
+    try:
+        import torch
+    except ImportError:
+        return nullcontext()
+    return torch.inference_mode()
@@ -1,4 +1,29 @@
 import subprocess
+import tempfile
+
+import numpy as np
+
+EXTRACT_SAMPLE_RATE = 16000
+
+
+def audio_fits_extract_format(source_media):
+    # A lone 16 kHz mono PCM stream in a WAV container is exactly what extraction produces.
+    if not source_media:
+        return False
+    return (
+        "wav" in (source_media.get("container_format") or "").split(",")
+        and source_media.get("audio_codec") == "pcm_s16le"
+        and source_media.get("audio_sample_rate") == EXTRACT_SAMPLE_RATE
+        and source_media.get("audio_channels") == 1
+        and len(source_media.get("stream_layout") or []) == 1
+    )
+
+
+def has_video_stream(source_media):
+    # Unprobed sources are assumed to be videos, which is what the pipeline always did.
+    if not source_media or not source_media.get("stream_layout"):
+        return True
+    return any(stream.get("type") == "video" for stream in source_media["stream_layout"])
 
 
 class FFmpegService:
@@ -22,6 +47,30 @@ class FFmpegService:
         ]
         self._run(command, "Failed to extract audio with ffmpeg")
 
+    def extract_audio_array(self, input_video_path, sample_rate=EXTRACT_SAMPLE_RATE):
+        command = [
+            self.ffmpeg_bin,
+            "-nostdin",
+            "-i",
+            input_video_path,
+            "-vn",
+            "-f",
+            "s16le",
+            "-acodec",
+            "pcm_s16le",
+            "-ar",
+            str(sample_rate),
+            "-ac",
+            "1",
+            "-",
+        ]
+        result = subprocess.run(command, capture_output=True)
+        if result.returncode != 0:
+            stderr = result.stderr.decode("utf-8", "replace").strip()
+            raise RuntimeError(f"Failed to extract audio with ffmpeg. {stderr}")
+
+        return np.frombuffer(result.stdout, dtype=np.int16).astype(np.float32) / 32768.0
+
     def mux_audio_with_video(self, input_video_path, input_audio_path, output_video_path):
         command = [
             self.ffmpeg_bin,
@@ -43,6 +92,64 @@ class FFmpegService:
         ]
         self._run(command, "Failed to merge dubbed audio with video")
 
+    def mux_audio_array_with_video(
+        self, input_video_path, samples, sample_rate, output_video_path, block_size=1 << 16
+    ):
+        command = [
+            self.ffmpeg_bin,
+            "-y",
+            "-i",
+            input_video_path,
+            "-f",
+            "s16le",
+            "-ar",
+            str(int(sample_rate)),
+            "-ac",
+            "1",
+            "-i",
+            "pipe:0",
+            "-map",
+            "0:v:0",
+            "-map",
+            "1:a:0",
+            "-c:v",
+            "copy",
+            "-c:a",
+            "aac",
+            "-shortest",
+            output_video_path,
+        ]
+        # stderr goes to a spooled file so a chatty ffmpeg can never block our stdin writes.
+        with tempfile.TemporaryFile() as stderr_file:
+            process = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=stderr_file)
+            try:
+                for start in range(0, len(samples), block_size):
+                    block = samples[start : start + block_size]
+                    pcm = (np.clip(block, -1.0, 1.0) * 32767.0).astype("<i2")
+                    process.stdin.write(pcm.tobytes())
+            except BrokenPipeError:
+                pass
+            finally:
+                process.stdin.close()
+            returncode = process.wait()
+
+            if returncode != 0:
+                stderr_file.seek(0)
+                stderr = stderr_file.read().decode("utf-8", "replace").strip()
+                raise RuntimeError(f"Failed to merge dubbed audio with video. {stderr}")
+
+    def encode_audio(self, input_audio_path, output_audio_path):
+        command = [
+            self.ffmpeg_bin,
+            "-y",
+            "-i",
+            input_audio_path,
+            "-c:a",
+            "aac",
+            output_audio_path,
+        ]
+        self._run(command, "Failed to encode dubbed audio")
+
     def _run(self, command, error_prefix):
         result = subprocess.run(command, capture_output=True, text=True)
         if result.returncode != 0:
@@ -0,0 +1,101 @@
+import resource
+import threading
+import time
+from contextlib import contextmanager
+
+
+def current_rss():
+    try:
+        import psutil
+    except ImportError:
+        # ru_maxrss is reported in kilobytes on Linux.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return psutil.Process().memory_info().rss
+
+
+class _RSSSampler:
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak = current_rss()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss())
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, current_rss())
+
+
+class StageTimer:
+    def __init__(self):
+        self.stages = []
+        self.audio_duration = None
+
+    @contextmanager
+    def stage(self, name, cached=False):
+        wall_started = time.perf_counter()
+        cpu_started = time.process_time()
+        with _RSSSampler() as sampler:
+            try:
+                yield
+            finally:
+                self.record(
+                    name,
+                    wall_time=time.perf_counter() - wall_started,
+                    cpu_time=time.process_time() - cpu_started,
+                    peak_rss_bytes=sampler.peak,
+                    cached=cached,
+                )
+
+    @contextmanager
+    def concurrent_stages(self, names):
+        busy = {name: {"wall_time": 0.0, "cpu_time": 0.0} for name in names}
+        lock = threading.Lock()
+
+        def measure(name, func):
+            def wrapper(item):
+                wall_started = time.perf_counter()
+                cpu_started = time.thread_time()
+                try:
+                    return func(item)
+                finally:
+                    with lock:
+                        busy[name]["wall_time"] += time.perf_counter() - wall_started
+                        busy[name]["cpu_time"] += time.thread_time() - cpu_started
+
+            return wrapper
+
+        with _RSSSampler() as sampler:
+            try:
+                yield measure
+            finally:
+                for name in names:
+                    self.record(name, peak_rss_bytes=sampler.peak, **busy[name])
+
+    def record(self, name, wall_time=0.0, cpu_time=0.0, peak_rss_bytes=0, cached=False):
+        self.stages.append(
+            {
+                "stage": name,
+                "wall_time": wall_time,
+                "cpu_time": cpu_time,
+                "peak_rss_bytes": int(peak_rss_bytes),
+                "cached": cached,
+            }
+        )
+
+    def as_list(self):
+        stages = []
+        for stage in self.stages:
+            real_time_factor = None
+            if self.audio_duration:
+                real_time_factor = stage["wall_time"] / self.audio_duration
+            stages.append({**stage, "real_time_factor": real_time_factor})
+        return stages
@@ -0,0 +1,90 @@
+import threading
+from collections import OrderedDict
+
+
+class ModelRegistry:
+    def __init__(self, max_memory_mb=0):
+        self.max_memory_bytes = int(max_memory_mb or 0) * 1024 * 1024
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get_or_load(self, service_type, model_name, loader):
+        key = (service_type, model_name)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry["value"]
+
+            rss_before = _current_rss()
+            value = loader()
+            size = _estimate_size(value)
+            if not size:
+                size = max(_current_rss() - rss_before, 0)
+
+            self._entries[key] = {"value": value, "size": size}
+            self._evict_over_budget(keep=key)
+            return value
+
+    def evict(self, service_type, model_name):
+        with self._lock:
+            return self._entries.pop((service_type, model_name), None) is not None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "models": [
+                    {"service_type": key[0], "model_name": key[1], "size_bytes": entry["size"]}
+                    for key, entry in self._entries.items()
+                ],
+                "total_bytes": self.total_bytes(),
+                "max_memory_bytes": self.max_memory_bytes,
+            }
+
+    def total_bytes(self):
+        return sum(entry["size"] for entry in self._entries.values())
+
+    def _evict_over_budget(self, keep):
+        if not self.max_memory_bytes:
+            return
+
+        evicted = False
+        for key in list(self._entries.keys()):
+            if self.total_bytes() <= self.max_memory_bytes:
+                break
+            if key == keep:
+                continue
+            self._entries.pop(key)
+            evicted = True
+
+        if evicted:
+            import gc
+
+            gc.collect()
+
+
+def _estimate_size(value):
+    items = value if isinstance(value, (tuple, list)) else (value,)
+    total = 0
+    for item in items:
+        module = item if callable(getattr(item, "parameters", None)) else getattr(item, "model", None)
+        if module is None or not callable(getattr(module, "parameters", None)):
+            continue
+
+        tensors = list(module.parameters())
+        if callable(getattr(module, "buffers", None)):
+            tensors.extend(module.buffers())
+        total += sum(tensor.numel() * tensor.element_size() for tensor in tensors)
+    return total
+
+
+def _current_rss():
+    try:
+        import psutil
+    except ImportError:
+        return 0
+    return psutil.Process().memory_info().rss
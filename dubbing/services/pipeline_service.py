@@ -1,4 +1,16 @@
-from .ffmpeg_service import FFmpegService
+import shutil
+from pathlib import Path
+
+from .artifact_cache import hash_samples, hash_wav_pcm
+from .audio_service import AudioAssemblyService, read_wav_duration
+from .ffmpeg_service import (
+    EXTRACT_SAMPLE_RATE,
+    FFmpegService,
+    audio_fits_extract_format,
+    has_video_stream,
+)
+from .instrumentation import StageTimer
+from .streaming import StagePipeline
 from .translation_service import HuggingFaceTranslationService
 from .tts_service import CoquiTTSService
 from .whisper_service import WhisperService
@@ -12,42 +24,497 @@ class DubbingPipelineService:
         translation_model_name,
         tts_model_name,
         source_language=None,
+        model_registry=None,
+        segmented=False,
+        queue_size=4,
+        translation_batch_size=16,
+        max_time_compression=1.5,
+        artifact_cache=None,
+        translation_memory=None,
+        stream_audio=False,
+        progress=None,
+        chunked_transcription=False,
+        transcription_workers=0,
+        max_chunk_seconds=60.0,
+        quantized_inference=False,
+        asr_engine="openai-whisper",
+        asr_compute_type="int8",
+        tts_batch_size=8,
+        tts_max_sentence_chars=300,
     ):
         self.ffmpeg_service = FFmpegService(ffmpeg_bin=ffmpeg_bin)
-        self.whisper_service = WhisperService(model_name=whisper_model_name)
+        self.whisper_service = WhisperService(
+            model_name=whisper_model_name,
+            registry=model_registry,
+            chunked=chunked_transcription,
+            workers=transcription_workers,
+            max_chunk_seconds=max_chunk_seconds,
+            engine=asr_engine,
+            compute_type=asr_compute_type,
+        )
         self.translation_service = HuggingFaceTranslationService(
-            model_name=translation_model_name
+            model_name=translation_model_name,
+            registry=model_registry,
+            batch_size=translation_batch_size,
+            translation_memory=translation_memory,
+            quantize=quantized_inference,
+        )
+        self.tts_service = CoquiTTSService(
+            model_name=tts_model_name,
+            registry=model_registry,
+            quantize=quantized_inference,
+            batch_size=tts_batch_size,
+            max_sentence_chars=tts_max_sentence_chars,
         )
-        self.tts_service = CoquiTTSService(model_name=tts_model_name)
+        self.audio_service = AudioAssemblyService(max_compression=max_time_compression)
         self.source_language = source_language
+        self.segmented = segmented
+        self.queue_size = queue_size
+        self.artifact_cache = artifact_cache
+        self.stream_audio = stream_audio
+        self.progress = progress
 
-    def run(self, input_video_path, extracted_audio_path, tts_audio_path, output_video_path):
-        self.ffmpeg_service.extract_audio(
-            input_video_path=input_video_path,
-            output_audio_path=extracted_audio_path,
-        )
+    def warm_up(self, stages=None):
+        if stages is None or "transcribe" in stages:
+            self.whisper_service.warm_up()
+        if stages is None or "translate" in stages:
+            self.translation_service.warm_up()
+        if stages is None or "synthesize" in stages:
+            self.tts_service.warm_up()
 
-        transcription = self.whisper_service.transcribe(
-            audio_path=extracted_audio_path,
-            language=self.source_language,
-        )
+    def run(
+        self,
+        input_video_path,
+        extracted_audio_path,
+        tts_audio_path,
+        output_video_path,
+        timer=None,
+        source_media=None,
+    ):
+        timer = timer or StageTimer()
+        self._report("extract")
+        with timer.stage("extract"):
+            audio, duration = self._extract_audio(
+                input_video_path, extracted_audio_path, source_media
+            )
+        timer.audio_duration = duration
+        cache_keys = self._build_cache_keys(audio)
+        cached_stages = []
+
+        self._report("transcribe")
+        transcription = self._load_cached_json(cache_keys, "transcribe", cached_stages)
+        if transcription is not None:
+            timer.record("transcribe", cached=True)
+        else:
+            with timer.stage("transcribe"):
+                if self.stream_audio:
+                    transcription = self.whisper_service.transcribe(
+                        audio=audio,
+                        language=self.source_language,
+                        progress=self._stage_progress("transcribe"),
+                    )
+                else:
+                    transcription = self.whisper_service.transcribe(
+                        audio_path=audio,
+                        language=self.source_language,
+                        progress=self._stage_progress("transcribe"),
+                    )
+            self._store_cached_json(cache_keys, "transcribe", transcription)
         transcript_text = transcription["text"]
-        translated_text = self.translation_service.translate(transcript_text)
+        segments = transcription.get("segments") or []
 
-        self.tts_service.synthesize_to_file(
-            text=translated_text,
-            output_audio_path=tts_audio_path,
-        )
+        self._report("translate")
+        translation = self._load_cached_json(cache_keys, "translate", cached_stages)
+        tts_output = None
+        if translation is not None:
+            tts_output = self._load_cached_tts(cache_keys, tts_audio_path, cached_stages)
 
-        self.ffmpeg_service.mux_audio_with_video(
-            input_video_path=input_video_path,
-            input_audio_path=tts_audio_path,
-            output_video_path=output_video_path,
-        )
+        if tts_output is not None:
+            translated_text = translation["translated_text"]
+            segments = translation["segments"]
+            for name in ("translate", "synthesize", "assemble"):
+                timer.record(name, cached=True)
+        else:
+            if self.segmented and segments:
+                source_segments = translation["segments"] if translation else segments
+                with timer.concurrent_stages(["translate", "synthesize"]) as measure:
+                    segments = self._translate_and_synthesize_segments(
+                        source_segments, tts_audio_path, measure=measure
+                    )
+                translated_text = " ".join(
+                    segment["translated_text"] for segment in segments if segment["translated_text"]
+                )
+                placed_segments = segments
+                segments = [
+                    {key: value for key, value in segment.items() if key != "audio_path"}
+                    for segment in segments
+                ]
+            else:
+                if translation is not None:
+                    translated_text = translation["translated_text"]
+                    timer.record("translate", cached=True)
+                else:
+                    with timer.stage("translate"):
+                        translated_text = self.translation_service.translate(transcript_text)
+                raw_audio_path = str(Path(tts_audio_path).with_name("tts_raw.wav"))
+                self._report("synthesize")
+                with timer.stage("synthesize"):
+                    self.tts_service.synthesize_to_file(
+                        text=translated_text,
+                        output_audio_path=raw_audio_path,
+                    )
+                placed_segments = [{"start": 0.0, "end": duration, "audio_path": raw_audio_path}]
+
+            if translation is None:
+                self._store_cached_json(
+                    cache_keys,
+                    "translate",
+                    {"translated_text": translated_text, "segments": segments},
+                )
+
+            with timer.stage("assemble"):
+                tts_output = self._render_tts(placed_segments, duration, tts_audio_path, cache_keys)
+
+        self._report("mux")
+        with timer.stage("mux"):
+            if not has_video_stream(source_media):
+                self._write_audio_only(tts_output, output_video_path)
+            elif self.stream_audio:
+                samples, sample_rate = tts_output
+                self.ffmpeg_service.mux_audio_array_with_video(
+                    input_video_path=input_video_path,
+                    samples=samples,
+                    sample_rate=sample_rate,
+                    output_video_path=output_video_path,
+                )
+            else:
+                self.ffmpeg_service.mux_audio_with_video(
+                    input_video_path=input_video_path,
+                    input_audio_path=tts_output,
+                    output_video_path=output_video_path,
+                )
 
         return {
             "transcript_text": transcript_text,
             "translated_text": translated_text,
             "detected_language": transcription.get("language"),
             "output_video_path": output_video_path,
+            "segments": segments,
+            "cached_stages": cached_stages,
+            "audio_duration": duration,
+            "timings": timer.as_list(),
+        }
+
+    def extract_stage(self, input_video_path, extracted_audio_path, timer, source_media=None):
+        self._report("extract")
+        with timer.stage("extract"):
+            if audio_fits_extract_format(source_media):
+                extracted_audio_path = input_video_path
+            else:
+                self.ffmpeg_service.extract_audio(
+                    input_video_path=input_video_path,
+                    output_audio_path=extracted_audio_path,
+                )
+        timer.audio_duration = read_wav_duration(extracted_audio_path)
+        return {
+            "extracted_audio_path": extracted_audio_path,
+            "audio_duration": timer.audio_duration,
+            "audio_hash": self._hash_audio(extracted_audio_path),
+        }
+
+    def transcribe_stage(self, extracted_audio_path, cache_keys, timer):
+        self._report("transcribe")
+        transcription = self._load_cached_json(cache_keys, "transcribe", [])
+        if transcription is not None:
+            timer.record("transcribe", cached=True)
+            return transcription
+
+        with timer.stage("transcribe"):
+            transcription = self.whisper_service.transcribe(
+                audio_path=extracted_audio_path,
+                language=self.source_language,
+                progress=self._stage_progress("transcribe"),
+            )
+        self._store_cached_json(cache_keys, "transcribe", transcription)
+        return transcription
+
+    def translate_stage(self, transcription, cache_keys, timer):
+        self._report("translate")
+        translation = self._load_cached_json(cache_keys, "translate", [])
+        if translation is not None:
+            timer.record("translate", cached=True)
+            return translation
+
+        segments = transcription.get("segments") or []
+        with timer.stage("translate"):
+            if self.segmented and segments:
+                translated_texts = self.translation_service.translate_many(
+                    [segment["text"] for segment in segments]
+                )
+                segments = [
+                    {**segment, "translated_text": translated}
+                    for segment, translated in zip(segments, translated_texts)
+                ]
+                translated_text = " ".join(text for text in translated_texts if text)
+            else:
+                translated_text = self.translation_service.translate(transcription["text"])
+
+        translation = {"translated_text": translated_text, "segments": segments}
+        self._store_cached_json(cache_keys, "translate", translation)
+        return translation
+
+    def synthesize_stage(self, translation, audio_duration, tts_audio_path, cache_keys, timer):
+        self._report("synthesize")
+        if self._load_cached_tts(cache_keys, tts_audio_path, []) is not None:
+            timer.record("synthesize", cached=True)
+            timer.record("assemble", cached=True)
+            return tts_audio_path
+
+        segments = translation.get("segments") or []
+        with timer.stage("synthesize"):
+            if self.segmented and segments:
+                placed_segments = self._synthesize_segments(segments, tts_audio_path)
+            else:
+                raw_audio_path = str(Path(tts_audio_path).with_name("tts_raw.wav"))
+                self.tts_service.synthesize_to_file(
+                    text=translation["translated_text"],
+                    output_audio_path=raw_audio_path,
+                )
+                placed_segments = [
+                    {"start": 0.0, "end": audio_duration, "audio_path": raw_audio_path}
+                ]
+
+        with timer.stage("assemble"):
+            return self._render_tts(placed_segments, audio_duration, tts_audio_path, cache_keys)
+
+    def translate_and_synthesize_stage(
+        self, transcription, audio_duration, tts_audio_path, cache_keys, timer
+    ):
+        segments = transcription.get("segments") or []
+        if not (self.segmented and segments):
+            translation = self.translate_stage(transcription, cache_keys, timer)
+            self.synthesize_stage(translation, audio_duration, tts_audio_path, cache_keys, timer)
+            return translation
+
+        self._report("translate")
+        translation = self._load_cached_json(cache_keys, "translate", [])
+        if translation is not None:
+            if self._load_cached_tts(cache_keys, tts_audio_path, []) is not None:
+                for name in ("translate", "synthesize", "assemble"):
+                    timer.record(name, cached=True)
+                return translation
+            segments = translation["segments"]
+
+        # Same overlapped translate -> TTS hand-off as run(), so checkpointed runs keep it.
+        with timer.concurrent_stages(["translate", "synthesize"]) as measure:
+            placed_segments = self._translate_and_synthesize_segments(
+                segments, tts_audio_path, measure=measure
+            )
+        segments = [
+            {key: value for key, value in segment.items() if key != "audio_path"}
+            for segment in placed_segments
+        ]
+        translated_text = " ".join(
+            segment["translated_text"] for segment in segments if segment["translated_text"]
+        )
+        if translation is None:
+            translation = {"translated_text": translated_text, "segments": segments}
+            self._store_cached_json(cache_keys, "translate", translation)
+
+        with timer.stage("assemble"):
+            self._render_tts(placed_segments, audio_duration, tts_audio_path, cache_keys)
+        return translation
+
+    def mux_stage(
+        self, input_video_path, tts_audio_path, output_video_path, timer, source_media=None
+    ):
+        self._report("mux")
+        with timer.stage("mux"):
+            if not has_video_stream(source_media):
+                self._write_audio_only(tts_audio_path, output_video_path)
+            else:
+                self.ffmpeg_service.mux_audio_with_video(
+                    input_video_path=input_video_path,
+                    input_audio_path=tts_audio_path,
+                    output_video_path=output_video_path,
+                )
+        return output_video_path
+
+    def _extract_audio(self, input_video_path, extracted_audio_path, source_media=None):
+        if audio_fits_extract_format(source_media):
+            # The upload is already in the extraction format, so ffmpeg would only copy it.
+            if self.stream_audio:
+                samples, _ = self.audio_service.read_track(input_video_path)
+                return samples, len(samples) / float(EXTRACT_SAMPLE_RATE)
+            return input_video_path, read_wav_duration(input_video_path)
+
+        if self.stream_audio:
+            samples = self.ffmpeg_service.extract_audio_array(input_video_path)
+            return samples, len(samples) / float(EXTRACT_SAMPLE_RATE)
+
+        self.ffmpeg_service.extract_audio(
+            input_video_path=input_video_path,
+            output_audio_path=extracted_audio_path,
+        )
+        return extracted_audio_path, read_wav_duration(extracted_audio_path)
+
+    def _write_audio_only(self, tts_output, output_path):
+        # Audio-only sources have nothing to mux; the dubbed track is the whole output.
+        if self.stream_audio:
+            samples, sample_rate = tts_output
+            if str(output_path).lower().endswith(".wav"):
+                self.audio_service.write_track(samples, sample_rate, output_path)
+                return
+            tts_output = str(Path(output_path).with_suffix(".tts.wav"))
+            self.audio_service.write_track(samples, sample_rate, tts_output)
+
+        if str(output_path).lower().endswith(".wav"):
+            shutil.copyfile(tts_output, output_path)
+        else:
+            self.ffmpeg_service.encode_audio(tts_output, output_path)
+
+    def _render_tts(self, placed_segments, duration, tts_audio_path, cache_keys):
+        track, sample_rate = self.audio_service.build_track(placed_segments, duration)
+        if "tts" in cache_keys:
+            self.artifact_cache.put_with(
+                cache_keys["tts"],
+                lambda target: self.audio_service.write_track(track, sample_rate, target),
+            )
+
+        if self.stream_audio:
+            return track, sample_rate
+
+        self.audio_service.write_track(track, sample_rate, tts_audio_path)
+        return tts_audio_path
+
+    def _load_cached_tts(self, cache_keys, tts_audio_path, cached_stages):
+        if "tts" not in cache_keys:
+            return None
+
+        # Another worker may evict the entry at any point; that is just a cache miss.
+        if not self.stream_audio:
+            if not self.artifact_cache.get_file(cache_keys["tts"], tts_audio_path):
+                return None
+            cached_stages.append("tts")
+            return tts_audio_path
+
+        cached_path = self.artifact_cache.get_path(cache_keys["tts"])
+        if cached_path is None:
+            return None
+        try:
+            track = self.audio_service.read_track(cached_path)
+        except FileNotFoundError:
+            return None
+        cached_stages.append("tts")
+        return track
+
+    def stage_options(self):
+        transcribe = {
+            "whisper_model": self.whisper_service.model_name,
+            "source_language": self.source_language or "",
+            "chunked": bool(self.whisper_service.chunked),
+            "asr_engine": self.whisper_service.engine_name,
+            "asr_options": self.whisper_service.engine_options,
+        }
+        translate = {
+            **transcribe,
+            "translation_model": self.translation_service.model_name,
+            "segmented": bool(self.segmented),
+            "translation_quantized": bool(self.translation_service.quantize),
         }
+        synthesize = {
+            **translate,
+            "tts_model": self.tts_service.model_name,
+            "tts_quantized": bool(self.tts_service.quantize),
+            "tts_max_sentence_chars": self.tts_service.max_sentence_chars,
+            "max_time_compression": self.audio_service.max_compression,
+        }
+        return {"transcribe": transcribe, "translate": translate, "synthesize": synthesize}
+
+    def cache_keys(self, audio_hash):
+        # Built from the current options whenever a stage runs, so a resumed job whose models
+        # changed since extraction never reads artifacts produced with the old ones.
+        if self.artifact_cache is None or not audio_hash:
+            return {}
+
+        options = self.stage_options()
+        return {
+            "transcribe": self.artifact_cache.make_key(
+                "transcribe", audio_hash, options["transcribe"]
+            ),
+            "translate": self.artifact_cache.make_key("translate", audio_hash, options["translate"]),
+            "tts": self.artifact_cache.make_key("tts", audio_hash, options["synthesize"]),
+        }
+
+    def _hash_audio(self, audio):
+        if self.artifact_cache is None:
+            return None
+        return hash_samples(audio) if self.stream_audio else hash_wav_pcm(audio)
+
+    def _build_cache_keys(self, audio):
+        return self.cache_keys(self._hash_audio(audio))
+
+    def _load_cached_json(self, cache_keys, stage, cached_stages):
+        if stage not in cache_keys:
+            return None
+        value = self.artifact_cache.get_json(cache_keys[stage])
+        if value is not None:
+            cached_stages.append(stage)
+        return value
+
+    def _store_cached_json(self, cache_keys, stage, value):
+        if stage in cache_keys:
+            self.artifact_cache.put_json(cache_keys[stage], value)
+
+    def _translate_and_synthesize_segments(self, segments, tts_audio_path, measure=None):
+        self.translation_service.prefetch(
+            segment["text"] for segment in segments if "translated_text" not in segment
+        )
+
+        def translate(segment):
+            if "translated_text" in segment:
+                return segment
+            return {
+                **segment,
+                "translated_text": self.translation_service.translate(segment["text"]),
+            }
+
+        # Translation runs ahead of synthesis, so synthesis completions track overall progress.
+        synthesize = self._segment_synthesizer(tts_audio_path, total=len(segments))
+        if measure is not None:
+            translate = measure("translate", translate)
+            synthesize = measure("synthesize", synthesize)
+
+        stages = StagePipeline([translate, synthesize], queue_size=self.queue_size)
+        return stages.run(iter(segments))
+
+    def _synthesize_segments(self, segments, tts_audio_path):
+        synthesize = self._segment_synthesizer(tts_audio_path, total=len(segments))
+        return [synthesize(segment) for segment in segments]
+
+    def _report(self, stage, fraction=0.0):
+        if self.progress is not None:
+            self.progress(stage, fraction)
+
+    def _stage_progress(self, stage):
+        return lambda fraction: self._report(stage, fraction)
+
+    def _segment_synthesizer(self, tts_audio_path, total=0):
+        segments_dir = Path(tts_audio_path).parent / "segments"
+        segments_dir.mkdir(parents=True, exist_ok=True)
+        completed = [0]
+
+        def synthesize(segment):
+            audio_path = None
+            if segment["translated_text"]:
+                audio_path = str(segments_dir / f"segment_{segment['index']:05d}.wav")
+                self.tts_service.synthesize_to_file(
+                    text=segment["translated_text"],
+                    output_audio_path=audio_path,
+                )
+            completed[0] += 1
+            if total:
+                self._report("synthesize", completed[0] / float(total))
+            return {**segment, "audio_path": audio_path}
+
+        return synthesize
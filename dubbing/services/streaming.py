@@ -0,0 +1,68 @@
+import queue
+import threading
+
+_END = object()
+
+
+class StagePipeline:
+    def __init__(self, stages, queue_size=4):
+        self.stages = list(stages)
+        self.queue_size = max(int(queue_size or 1), 1)
+
+    def run(self, items):
+        inboxes = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        results = []
+        errors = []
+        failed = threading.Event()
+
+        workers = []
+        for position, stage in enumerate(self.stages):
+            outbox = inboxes[position + 1] if position + 1 < len(self.stages) else None
+            worker = threading.Thread(
+                target=self._work,
+                args=(stage, inboxes[position], outbox, results, errors, failed),
+                daemon=True,
+            )
+            worker.start()
+            workers.append(worker)
+
+        try:
+            for item in items:
+                if failed.is_set():
+                    break
+                inboxes[0].put(item)
+        except Exception as exc:
+            errors.append(exc)
+            failed.set()
+        finally:
+            inboxes[0].put(_END)
+
+        for worker in workers:
+            worker.join()
+
+        if errors:
+            raise errors[0]
+        return results
+
+    def _work(self, stage, inbox, outbox, results, errors, failed):
+        while True:
+            item = inbox.get()
+            if item is _END:
+                if outbox is not None:
+                    outbox.put(_END)
+                return
+
+            if failed.is_set():
+                continue
+
+            try:
+                result = stage(item)
+            except Exception as exc:
+                errors.append(exc)
+                failed.set()
+                continue
+
+            if outbox is None:
+                results.append(result)
+            else:
+                outbox.put(result)
@@ -0,0 +1,91 @@
+import wave
+
+import numpy as np
+
+from .audio_service import AudioAssemblyService
+from .translation_service import HuggingFaceTranslationService
+from .tts_service import CoquiTTSService
+from .whisper_service import WhisperService
+
+STUB_WORDS = ["river", "valley", "morning", "signal", "harbor", "lantern", "meadow", "engine"]
+
+
+class StubASREngine:
+    name = "stub"
+    registry_key = "stub_asr"
+
+    def __init__(self, segment_seconds=4.0):
+        self.segment_seconds = segment_seconds
+
+    def load(self):
+        return None
+
+    def estimated_bytes(self):
+        return 0
+
+    def detect_language(self, model, audio):
+        return "en"
+
+    def transcribe(self, model, audio, language=None, **kwargs):
+        if isinstance(audio, str):
+            with wave.open(audio, "rb") as wav_file:
+                duration = wav_file.getnframes() / float(wav_file.getframerate())
+        else:
+            duration = len(audio) / 16000.0
+
+        segments = []
+        start = 0.0
+        while start < duration:
+            end = min(start + self.segment_seconds, duration)
+            index = len(segments)
+            words = [STUB_WORDS[(index + offset) % len(STUB_WORDS)] for offset in range(6)]
+            text = " ".join(words).capitalize() + "."
+            segments.append({"start": start, "end": end, "text": text})
+            start = end
+        return {
+            "text": " ".join(segment["text"] for segment in segments),
+            "language": language or "en",
+            "segments": segments,
+        }
+
+
+class StubWhisperService(WhisperService):
+    def __init__(self, segment_seconds=4.0, **kwargs):
+        super().__init__(model_name="stub", **kwargs)
+        self.chunked = False
+        self.engine_name = StubASREngine.name
+        self.engine = StubASREngine(segment_seconds)
+
+
+class StubTranslationService(HuggingFaceTranslationService):
+    def __init__(self, **kwargs):
+        super().__init__(model_name="stub", **kwargs)
+
+    def _load_translator(self):
+        def translate(texts, **kwargs):
+            return [{"translation_text": " ".join(reversed(text.split()))} for text in texts]
+
+        return translate
+
+
+class StubTTSService(CoquiTTSService):
+    def __init__(self, seconds_per_char=0.06, sample_rate=16000, **kwargs):
+        super().__init__(model_name="stub", **kwargs)
+        self.seconds_per_char = seconds_per_char
+        self.sample_rate = sample_rate
+        self.audio_service = AudioAssemblyService()
+
+    def synthesize_to_file(self, text, output_audio_path):
+        normalized = (text or "").strip()
+        if not normalized:
+            raise RuntimeError("No text provided for TTS synthesis")
+
+        length = max(int(len(normalized) * self.seconds_per_char * self.sample_rate), 1)
+        time = np.arange(length, dtype=np.float32) / self.sample_rate
+        frequency = 180.0 + 20.0 * (len(normalized) % 7)
+        samples = 0.3 * np.sin(2 * np.pi * frequency * time).astype(np.float32)
+        self.audio_service.write_track(samples, self.sample_rate, output_audio_path)
+        return output_audio_path
+
+    def warm_up(self):
+        pass
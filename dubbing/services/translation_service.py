@@ -1,8 +1,45 @@
+import re
+
+from .cpu_inference import inference_context, quantize_linear_layers
+
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?…])\s+")
+
+
+def split_sentences(text, max_chars=400):
+    sentences = []
+    for sentence in SENTENCE_BOUNDARY.split((text or "").strip()):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(" ", 0, max_chars)
+            if cut <= 0:
+                cut = max_chars
+            sentences.append(sentence[:cut].strip())
+            sentence = sentence[cut:].strip()
+
+        if sentence:
+            sentences.append(sentence)
+    return sentences
+
+
 class HuggingFaceTranslationService:
-    def __init__(self, model_name):
+    def __init__(
+        self, model_name, registry=None, batch_size=16, translation_memory=None, quantize=False
+    ):
         self.model_name = model_name
+        self.registry = registry
+        self.batch_size = max(int(batch_size or 1), 1)
+        self.translation_memory = translation_memory
+        self.quantize = quantize
         self._translator = None
 
+    @property
+    def memory_key(self):
+        # int8 outputs differ from fp32 ones, so the two are remembered separately.
+        return f"{self.model_name}:int8" if self.quantize else self.model_name
+
     def translate(self, text):
         normalized = (text or "").strip()
         if not normalized:
@@ -11,16 +48,85 @@ class HuggingFaceTranslationService:
         if not self.model_name:
             return normalized
 
+        return " ".join(self.translate_batch(split_sentences(normalized)))
+
+    def translate_batch(self, texts):
+        sources = [(text or "").strip() for text in texts]
+        results = list(sources)
+        if not self.model_name:
+            return results
+
+        pending = [position for position, source in enumerate(sources) if source]
+        if pending and self.translation_memory is not None:
+            remembered = self.translation_memory.lookup_many(
+                self.memory_key, [sources[position] for position in pending]
+            )
+            for position in pending:
+                if sources[position] in remembered:
+                    results[position] = remembered[sources[position]]
+            pending = [position for position in pending if sources[position] not in remembered]
+
+        if not pending:
+            return results
+
+        # Sorting by length keeps each batch's dynamic padding close to its longest item.
+        pending.sort(key=lambda position: len(sources[position]))
         translator = self._get_translator()
-        translated = translator(normalized)
-        if not translated:
-            return normalized
-        return (translated[0].get("translation_text") or "").strip() or normalized
+
+        for start in range(0, len(pending), self.batch_size):
+            batch = pending[start : start + self.batch_size]
+            with inference_context(self.quantize):
+                outputs = translator(
+                    [sources[position] for position in batch],
+                    batch_size=len(batch),
+                    truncation=True,
+                )
+            for position, output in zip(batch, outputs):
+                if isinstance(output, list):
+                    output = output[0] if output else {}
+                translated = (output.get("translation_text") or "").strip()
+                results[position] = translated or sources[position]
+
+        if self.translation_memory is not None:
+            self.translation_memory.store_many(
+                self.memory_key,
+                {sources[position]: results[position] for position in pending},
+            )
+        return results
+
+    def translate_many(self, texts):
+        grouped = [split_sentences(text) for text in texts]
+        translated = iter(self.translate_batch([sentence for group in grouped for sentence in group]))
+        return [" ".join(next(translated) for _ in group) for group in grouped]
+
+    def prefetch(self, texts):
+        if not self.model_name or self.translation_memory is None:
+            return
+
+        sentences = []
+        for text in texts:
+            sentences.extend(split_sentences(text))
+        if sentences:
+            self.translation_memory.preload(self.memory_key, sentences)
+
+    def warm_up(self):
+        if self.model_name:
+            self._get_translator()
 
     def _get_translator(self):
         if self._translator is not None:
             return self._translator
 
+        if self.registry is not None:
+            service_type = "translation_int8" if self.quantize else "translation"
+            self._translator = self.registry.get_or_load(
+                service_type, self.model_name, self._load_translator
+            )
+        else:
+            self._translator = self._load_translator()
+        return self._translator
+
+    def _load_translator(self):
         try:
             from transformers import pipeline
         except ImportError as exc:
@@ -28,9 +134,11 @@ class HuggingFaceTranslationService:
                 "transformers package is not installed. Install with: pip install transformers sentencepiece"
             ) from exc
 
-        self._translator = pipeline(
+        translator = pipeline(
             task="translation",
             model=self.model_name,
             tokenizer=self.model_name,
         )
-        return self._translator
+        if self.quantize:
+            translator.model = quantize_linear_layers(translator.model)
+        return translator
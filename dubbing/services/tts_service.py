@@ -1,9 +1,26 @@
 import wave
 
+from .cpu_inference import inference_context, quantize_linear_layers
+from .translation_service import split_sentences
+
+SENTENCE_GAP_SECONDS = 0.1
+
+
+def iter_batches(items, batch_size):
+    batch_size = max(int(batch_size or 1), 1)
+    for start in range(0, len(items), batch_size):
+        yield items[start : start + batch_size]
+
 
 class CoquiTTSService:
-    def __init__(self, model_name):
+    def __init__(
+        self, model_name, registry=None, quantize=False, batch_size=8, max_sentence_chars=300
+    ):
         self.model_name = model_name
+        self.registry = registry
+        self.quantize = quantize
+        self.batch_size = batch_size
+        self.max_sentence_chars = max_sentence_chars
         self._tts = None
         self._mms_tokenizer = None
         self._mms_model = None
@@ -21,49 +38,107 @@ class CoquiTTSService:
         tts.tts_to_file(text=normalized, file_path=output_audio_path)
         return output_audio_path
 
+    def warm_up(self):
+        if self._is_mms_model():
+            self._get_mms_tts()
+        else:
+            self._get_coqui_tts()
+
     def _is_mms_model(self):
         return (self.model_name or "").startswith("facebook/mms-tts-")
 
     def _synthesize_with_mms_vits(self, text, output_audio_path):
         tokenizer, model, torch = self._get_mms_tts()
-
-        inputs = tokenizer(text, return_tensors="pt")
-        with torch.no_grad():
-            output = model(**inputs).waveform
-
-        waveform = output.squeeze().cpu().numpy()
-        waveform = waveform.clip(-1.0, 1.0)
-        pcm = (waveform * 32767.0).astype("int16")
         sample_rate = int(getattr(model.config, "sampling_rate", 16000))
+        gap = b"\x00\x00" * int(SENTENCE_GAP_SECONDS * sample_rate)
+        sentences = split_sentences(text, self.max_sentence_chars)
 
+        # Each batch is written as soon as it is decoded, so memory is bounded by the batch
+        # size rather than by the length of the transcript.
+        frames_written = 0
         with wave.open(output_audio_path, "wb") as wav_file:
             wav_file.setnchannels(1)
             wav_file.setsampwidth(2)
             wav_file.setframerate(sample_rate)
-            wav_file.writeframes(pcm.tobytes())
+
+            for batch in iter_batches(sentences, self.batch_size):
+                for pcm in self._synthesize_mms_batch(tokenizer, model, torch, batch):
+                    if frames_written:
+                        wav_file.writeframes(gap)
+                    wav_file.writeframes(pcm.tobytes())
+                    frames_written += len(pcm)
+
+        if not frames_written:
+            raise RuntimeError("MMS VITS produced no audio for the given text")
+
+    def _synthesize_mms_batch(self, tokenizer, model, torch, sentences):
+        inputs = tokenizer(sentences, return_tensors="pt", padding=True)
+        token_counts = inputs["attention_mask"].sum(dim=1).tolist()
+        if not all(token_counts):
+            # The tokenizer drops characters outside the model's vocabulary; a sentence made
+            # only of those has nothing to say and would break the batched forward pass.
+            sentences = [sentence for sentence, count in zip(sentences, token_counts) if count]
+            if not sentences:
+                return []
+            inputs = tokenizer(sentences, return_tensors="pt", padding=True)
+
+        with inference_context() if self.quantize else torch.no_grad():
+            output = model(**inputs)
+
+        waveforms = output.waveform.cpu().numpy()
+        lengths = getattr(output, "sequence_lengths", None)
+        if lengths is None:
+            lengths = [waveforms.shape[-1]] * len(sentences)
+        else:
+            lengths = lengths.tolist()
+
+        pcm_chunks = []
+        for waveform, length in zip(waveforms, lengths):
+            waveform = waveform[: int(length)].clip(-1.0, 1.0)
+            pcm_chunks.append((waveform * 32767.0).astype("int16"))
+        return pcm_chunks
 
     def _get_mms_tts(self):
-        if self._mms_tokenizer is not None and self._mms_model is not None:
-            import torch
+        if self._mms_tokenizer is None or self._mms_model is None:
+            if self.registry is not None:
+                service_type = "mms_tts_int8" if self.quantize else "mms_tts"
+                loaded = self.registry.get_or_load(
+                    service_type, self.model_name, self._load_mms_tts
+                )
+            else:
+                loaded = self._load_mms_tts()
+            self._mms_tokenizer, self._mms_model = loaded
+
+        import torch
 
-            return self._mms_tokenizer, self._mms_model, torch
+        return self._mms_tokenizer, self._mms_model, torch
 
+    def _load_mms_tts(self):
         try:
-            import torch
+            import torch  # noqa: F401
             from transformers import AutoTokenizer, VitsModel
         except ImportError as exc:
             raise RuntimeError(
                 "MMS VITS dependencies are missing. Install with: pip install transformers torch"
             ) from exc
 
-        self._mms_tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-        self._mms_model = VitsModel.from_pretrained(self.model_name)
-        return self._mms_tokenizer, self._mms_model, torch
+        tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+        model = VitsModel.from_pretrained(self.model_name)
+        if self.quantize:
+            model = quantize_linear_layers(model)
+        return tokenizer, model
 
     def _get_coqui_tts(self):
         if self._tts is not None:
             return self._tts
 
+        if self.registry is not None:
+            self._tts = self.registry.get_or_load("coqui_tts", self.model_name, self._load_coqui_tts)
+        else:
+            self._tts = self._load_coqui_tts()
+        return self._tts
+
+    def _load_coqui_tts(self):
         try:
             from TTS.api import TTS
         except ImportError as exc:
@@ -71,5 +146,4 @@ class CoquiTTSService:
                 "coqui TTS package is not installed. Install with: pip install TTS"
             ) from exc
 
-        self._tts = TTS(model_name=self.model_name)
-        return self._tts
+        return TTS(model_name=self.model_name)
@@ -0,0 +1,119 @@
+import numpy as np
+
+
+def frame_energy_db(samples, sample_rate, frame_ms=30):
+    frame = max(int(sample_rate * frame_ms / 1000), 1)
+    frame_count = len(samples) // frame
+    if frame_count == 0:
+        return np.zeros(0, dtype=np.float32), frame
+
+    frames = samples[: frame_count * frame].reshape(frame_count, frame).astype(np.float32)
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    return 20.0 * np.log10(rms + 1e-10), frame
+
+
+def detect_speech_regions(
+    samples,
+    sample_rate,
+    frame_ms=30,
+    dynamic_range_db=35.0,
+    floor_db=-55.0,
+    min_silence_ms=700,
+    min_speech_ms=150,
+    padding_ms=200,
+):
+    energy, frame = frame_energy_db(samples, sample_rate, frame_ms)
+    if not len(energy):
+        return []
+
+    # Relative to the loudest frame so quiet recordings still split, but never below an
+    # absolute floor that would turn hiss into speech.
+    threshold = max(float(energy.max()) - dynamic_range_db, floor_db)
+    voiced = np.concatenate(([False], energy > threshold, [False]))
+    edges = np.flatnonzero(np.diff(voiced.astype(np.int8)))
+    starts, ends = edges[0::2], edges[1::2]
+    if not len(starts):
+        return []
+
+    # Gaps shorter than min_silence stay inside a region; longer ones are cut out.
+    min_gap = max(int(round(min_silence_ms / frame_ms)), 1)
+    keep = np.concatenate(([True], starts[1:] - ends[:-1] >= min_gap))
+    group = np.cumsum(keep) - 1
+    merged_starts = starts[keep]
+    merged_ends = np.zeros(len(merged_starts), dtype=ends.dtype)
+    np.maximum.at(merged_ends, group, ends)
+
+    min_frames = max(int(round(min_speech_ms / frame_ms)), 1)
+    long_enough = merged_ends - merged_starts >= min_frames
+    padding = int(round(padding_ms / frame_ms))
+    total_frames = len(energy)
+
+    regions = []
+    for start, end in zip(merged_starts[long_enough], merged_ends[long_enough]):
+        start = max(int(start) - padding, 0) * frame
+        end = min(int(end) + padding, total_frames) * frame
+        if regions and start <= regions[-1][1]:
+            regions[-1] = (regions[-1][0], max(end, regions[-1][1]))
+        else:
+            regions.append((start, min(end, len(samples))))
+    return regions
+
+
+def split_long_region(samples, region, sample_rate, max_samples, frame_ms=30):
+    start, end = region
+    pieces = []
+    while end - start > max_samples:
+        # Cut at the quietest frame in the last quarter of the allowed window.
+        search_start = start + max_samples * 3 // 4
+        search_end = start + max_samples
+        energy, frame = frame_energy_db(samples[search_start:search_end], sample_rate, frame_ms)
+        cut = search_end if not len(energy) else search_start + int(np.argmin(energy)) * frame
+        pieces.append((start, cut))
+        start = cut
+    pieces.append((start, end))
+    return pieces
+
+
+def pack_chunks(samples, regions, sample_rate, max_chunk_seconds=60.0, spacer_seconds=0.3):
+    max_samples = max(int(max_chunk_seconds * sample_rate), sample_rate)
+    spacer = int(spacer_seconds * sample_rate)
+
+    pieces = []
+    for region in regions:
+        pieces.extend(split_long_region(samples, region, sample_rate, max_samples))
+
+    # Whisper pads every call to a 30 s window, so short utterances are packed together
+    # with a short spacer instead of being transcribed one by one.
+    chunks = []
+    current = []
+    current_length = 0
+    for start, end in pieces:
+        length = end - start
+        if current and current_length + spacer + length > max_samples:
+            chunks.append(current)
+            current, current_length = [], 0
+        if current:
+            current_length += spacer
+        current.append({"offset": current_length, "start": start, "length": length})
+        current_length += length
+    if current:
+        chunks.append(current)
+
+    packed = []
+    for layout in chunks:
+        audio = np.zeros(layout[-1]["offset"] + layout[-1]["length"], dtype=np.float32)
+        for piece in layout:
+            audio[piece["offset"] : piece["offset"] + piece["length"]] = samples[
+                piece["start"] : piece["start"] + piece["length"]
+            ]
+        packed.append({"audio": audio, "layout": layout})
+    return packed
+
+
+def chunk_time_to_source(layout, seconds, sample_rate):
+    position = int(round(seconds * sample_rate))
+    offsets = np.array([piece["offset"] for piece in layout])
+    index = max(int(np.searchsorted(offsets, position, side="right")) - 1, 0)
+    piece = layout[index]
+    within = min(max(position - piece["offset"], 0), piece["length"])
+    return (piece["start"] + within) / float(sample_rate)
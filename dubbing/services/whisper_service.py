@@ -1,32 +1,252 @@
+import logging
+import multiprocessing
+import os
+import threading
+import wave
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from .asr_engines import ENGINE_OPENAI_WHISPER, build_asr_engine
+from .vad import chunk_time_to_source, detect_speech_regions, pack_chunks
+
+logger = logging.getLogger(__name__)
+
+WHISPER_SAMPLE_RATE = 16000
+
+_pools = {}
+_pools_lock = threading.Lock()
+_worker_engine = None
+_worker_model = None
+
+
+def _init_worker(engine_name, model_name, engine_options, threads):
+    global _worker_engine, _worker_model
+    _worker_engine = build_asr_engine(engine_name, model_name, threads=threads, **engine_options)
+    _worker_model = _worker_engine.load()
+
+
+def _detect_language_in_worker(audio):
+    return _worker_engine.detect_language(_worker_model, audio)
+
+
+def _transcribe_in_worker(audio, language):
+    result = _worker_engine.transcribe(
+        _worker_model, audio, language=language, condition_on_previous_text=False
+    )
+    return [
+        {"start": segment["start"], "end": segment["end"], "text": segment["text"]}
+        for segment in result["segments"]
+    ]
+
+
+def _get_pool(engine_name, model_name, engine_options, workers):
+    key = (engine_name, model_name, tuple(sorted(engine_options.items())), workers)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            threads = max((os.cpu_count() or 1) // workers, 1)
+            # Spawned workers avoid inheriting torch's thread pools through fork.
+            pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(engine_name, model_name, engine_options, threads),
+            )
+            _pools[key] = pool
+        return key, pool
+
+
+def _can_start_workers():
+    # Celery's prefork children are daemonic and may not start processes of their own.
+    return not multiprocessing.current_process().daemon
+
+
+def _discard_pool(key):
+    with _pools_lock:
+        pool = _pools.pop(key, None)
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
 class WhisperService:
-    def __init__(self, model_name="base"):
+    def __init__(
+        self,
+        model_name="base",
+        registry=None,
+        chunked=False,
+        workers=0,
+        max_chunk_seconds=60.0,
+        min_silence_ms=700,
+        engine=ENGINE_OPENAI_WHISPER,
+        compute_type="int8",
+    ):
         self.model_name = model_name
+        self.registry = registry
+        self.engine_name = engine or ENGINE_OPENAI_WHISPER
+        self.engine_options = {"compute_type": compute_type}
+        self.engine = build_asr_engine(self.engine_name, model_name, **self.engine_options)
+        self.chunked = chunked
+        self.workers = workers or max((os.cpu_count() or 1) // 4, 1)
+        self.max_chunk_seconds = max_chunk_seconds
+        self.min_silence_ms = min_silence_ms
         self._model = None
 
-    def transcribe(self, audio_path, language=None):
-        model = self._get_model()
-        kwargs = {}
-        if language:
-            kwargs["language"] = language
+    def transcribe(self, audio_path=None, language=None, audio=None, progress=None):
+        if self.chunked:
+            samples = audio if audio is not None else self._read_wav(audio_path)
+            if samples is not None:
+                workers = self.pool_workers() if _can_start_workers() else 0
+                return self._transcribe_chunked(samples, language, progress, workers)
 
-        result = model.transcribe(audio_path, **kwargs)
-        text = (result.get("text") or "").strip()
-        detected_language = result.get("language")
+        result = self.engine.transcribe(
+            self._get_model(),
+            audio if audio is not None else audio_path,
+            language=language,
+            progress=progress,
+        )
         return {
-            "text": text,
-            "language": detected_language,
+            "text": result["text"].strip(),
+            "language": result["language"],
+            "segments": self._normalize_segments(result["segments"]),
         }
 
+    def pool_workers(self):
+        # Every spawned worker holds its own model copy that the registry never sees, so the
+        # pool only gets what is left of DUBBING_MODEL_CACHE_MB after this process's models.
+        budget = getattr(self.registry, "max_memory_bytes", 0)
+        if not budget:
+            return self.workers
+
+        per_worker = self.engine.estimated_bytes()
+        if not per_worker:
+            return self.workers
+
+        available = max(budget - self.registry.total_bytes(), 0)
+        workers = min(self.workers, available // per_worker)
+        if workers < self.workers:
+            logger.info(
+                "Chunked transcription limited to %s of %s workers by the %s MB model budget",
+                workers,
+                self.workers,
+                budget // (1024 * 1024),
+            )
+        # With no room for even one extra copy, chunks run in-process on the registry model.
+        return workers
+
+    def _transcribe_chunked(self, samples, language, progress=None, workers=None):
+        regions = detect_speech_regions(
+            samples, WHISPER_SAMPLE_RATE, min_silence_ms=self.min_silence_ms
+        )
+        chunks = pack_chunks(
+            samples, regions, WHISPER_SAMPLE_RATE, max_chunk_seconds=self.max_chunk_seconds
+        )
+        if not chunks:
+            return {"text": "", "language": language, "segments": []}
+
+        if workers:
+            language, results = self._transcribe_chunks_in_pool(
+                chunks, language, progress, workers
+            )
+        else:
+            language, results = self._transcribe_chunks_in_process(chunks, language, progress)
+
+        raw_segments = [
+            {
+                "start": chunk_time_to_source(layout, raw["start"], WHISPER_SAMPLE_RATE),
+                "end": chunk_time_to_source(layout, raw["end"], WHISPER_SAMPLE_RATE),
+                "text": raw["text"],
+            }
+            for layout, chunk_segments in results
+            for raw in chunk_segments
+        ]
+        segments = self._normalize_segments(sorted(raw_segments, key=lambda raw: raw["start"]))
+        return {
+            "text": " ".join(segment["text"] for segment in segments),
+            "language": language,
+            "segments": segments,
+        }
+
+    def _transcribe_chunks_in_pool(self, chunks, language, progress, workers):
+        pool_key, pool = _get_pool(self.engine_name, self.model_name, self.engine_options, workers)
+        try:
+            if not language:
+                # One detection on the chunk with the most speech, then pinned for every chunk.
+                longest = max(chunks, key=lambda chunk: len(chunk["audio"]))
+                language = pool.submit(_detect_language_in_worker, longest["audio"]).result()
+
+            futures = {
+                pool.submit(_transcribe_in_worker, chunk["audio"], language): chunk
+                for chunk in chunks
+            }
+            results = []
+            for completed, future in enumerate(as_completed(futures), start=1):
+                results.append((futures[future]["layout"], future.result()))
+                if progress is not None:
+                    progress(completed / float(len(futures)))
+        except BrokenProcessPool:
+            _discard_pool(pool_key)
+            raise
+        return language, results
+
+    def _transcribe_chunks_in_process(self, chunks, language, progress):
+        model = self._get_model()
+        if not language:
+            longest = max(chunks, key=lambda chunk: len(chunk["audio"]))
+            language = self.engine.detect_language(model, longest["audio"])
+
+        results = []
+        for completed, chunk in enumerate(chunks, start=1):
+            result = self.engine.transcribe(
+                model, chunk["audio"], language=language, condition_on_previous_text=False
+            )
+            results.append((chunk["layout"], result["segments"]))
+            if progress is not None:
+                progress(completed / float(len(chunks)))
+        return language, results
+
+    def _read_wav(self, audio_path):
+        with wave.open(str(audio_path), "rb") as wav_file:
+            if (
+                wav_file.getframerate() != WHISPER_SAMPLE_RATE
+                or wav_file.getnchannels() != 1
+                or wav_file.getsampwidth() != 2
+            ):
+                return None
+            pcm = np.frombuffer(wav_file.readframes(wav_file.getnframes()), dtype=np.int16)
+        return pcm.astype(np.float32) / 32768.0
+
+    def _normalize_segments(self, raw_segments):
+        segments = []
+        for raw in raw_segments:
+            text = (raw.get("text") or "").strip()
+            if not text:
+                continue
+            segments.append(
+                {
+                    "index": len(segments),
+                    "start": float(raw.get("start") or 0.0),
+                    "end": float(raw.get("end") or 0.0),
+                    "text": text,
+                }
+            )
+        return segments
+
+    def warm_up(self):
+        self._get_model()
+
     def _get_model(self):
         if self._model is not None:
             return self._model
 
-        try:
-            import whisper
-        except ImportError as exc:
-            raise RuntimeError(
-                "whisper package is not installed. Install with: pip install openai-whisper"
-            ) from exc
-
-        self._model = whisper.load_model(self.model_name)
+        if self.registry is not None:
+            self._model = self.registry.get_or_load(
+                self.engine.registry_key, self.model_name, self._load_model
+            )
+        else:
+            self._model = self._load_model()
         return self._model
+
+    def _load_model(self):
+        return self.engine.load()
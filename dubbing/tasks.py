@@ -1,21 +1,322 @@
+import json
+import logging
 import os
 import shutil
+import socket
 import tempfile
+import time
 from pathlib import Path
 
-from celery import shared_task
+from celery import chain, shared_task
+from celery.signals import worker_init, worker_process_init
 from django.conf import settings
 from django.core.files.base import File
+from django.db.models import F, Max, Sum
+from django.utils import timezone
 
 from videos.models import Video
+from videos.services.media_probe import MEDIA_FIELDS
 
-from .services import DubbingPipelineService
+from .checkpoints import MANIFEST_NAME, STAGE_ORDER, CheckpointManifest
+from .models import DubbingJob, PipelineRun, PipelineStageMetric
+from .progress import STAGE_DONE, ProgressReporter, progress_snapshot, publish_progress
+from .scheduler import (
+    claim_pending_jobs,
+    enqueue_video,
+    expire_stale_jobs,
+    finish_video_jobs,
+    lane_for_duration,
+    users_with_pending_jobs,
+)
+from .services import ArtifactCache, DubbingPipelineService, ModelRegistry
+from .services.cpu_inference import (
+    INFERENCE_MODE_INT8,
+    configure_torch_threads,
+    worker_thread_count,
+)
+from .services.instrumentation import StageTimer
+from .translation_memory import TranslationMemory
+
+logger = logging.getLogger(__name__)
+
+_model_registry = None
+_artifact_cache = None
+_translation_memory = None
+_worker_concurrency = None
 
 
 def _get_setting(name, default=None):
     return getattr(settings, name, os.environ.get(name, default))
 
 
+def get_model_registry():
+    global _model_registry
+    if _model_registry is None:
+        _model_registry = ModelRegistry(
+            max_memory_mb=_get_setting("DUBBING_MODEL_CACHE_MB", 0),
+        )
+    return _model_registry
+
+
+def get_artifact_cache():
+    global _artifact_cache
+    cache_dir = _get_setting("DUBBING_CACHE_DIR", "")
+    if not cache_dir:
+        return None
+
+    if _artifact_cache is None:
+        _artifact_cache = ArtifactCache(
+            root=cache_dir,
+            max_size_mb=_get_setting("DUBBING_CACHE_MAX_MB", 0),
+        )
+    return _artifact_cache
+
+
+def get_translation_memory():
+    global _translation_memory
+    if not _get_setting("DUBBING_TRANSLATION_MEMORY_ENABLED", True):
+        return None
+
+    if _translation_memory is None:
+        _translation_memory = TranslationMemory(
+            max_entries=_get_setting("DUBBING_TRANSLATION_MEMORY_SIZE", 10000),
+        )
+    return _translation_memory
+
+
+def build_pipeline(**overrides):
+    options = dict(
+        ffmpeg_bin=_get_setting("FFMPEG_BIN", "ffmpeg"),
+        whisper_model_name=_get_setting("WHISPER_MODEL_NAME", "base"),
+        translation_model_name=_get_setting(
+            "HF_TRANSLATION_MODEL_NAME", "Helsinki-NLP/opus-mt-en-ru"
+        ),
+        tts_model_name=_get_setting(
+            "COQUI_TTS_MODEL_NAME", "tts_models/en/ljspeech/tacotron2-DDC"
+        ),
+        source_language=_get_setting("DUBBING_SOURCE_LANGUAGE", None),
+        model_registry=get_model_registry(),
+        segmented=_get_setting("DUBBING_SEGMENTED_MODE", False),
+        queue_size=_get_setting("DUBBING_PIPELINE_QUEUE_SIZE", 4),
+        translation_batch_size=_get_setting("HF_TRANSLATION_BATCH_SIZE", 16),
+        max_time_compression=_get_setting("DUBBING_MAX_TIME_COMPRESSION", 1.5),
+        artifact_cache=get_artifact_cache(),
+        translation_memory=get_translation_memory(),
+        stream_audio=_get_setting("DUBBING_STREAM_AUDIO", False),
+        chunked_transcription=_get_setting("WHISPER_CHUNKED_MODE", False),
+        transcription_workers=_get_setting("WHISPER_CHUNK_WORKERS", 0),
+        max_chunk_seconds=_get_setting("WHISPER_MAX_CHUNK_SECONDS", 60.0),
+        quantized_inference=_get_setting("DUBBING_INFERENCE_MODE", "fp32") == INFERENCE_MODE_INT8,
+        asr_engine=_get_setting("WHISPER_ENGINE", "openai-whisper"),
+        asr_compute_type=_get_setting("WHISPER_COMPUTE_TYPE", "int8"),
+        tts_batch_size=_get_setting("MMS_TTS_BATCH_SIZE", 8),
+        tts_max_sentence_chars=_get_setting("MMS_TTS_MAX_SENTENCE_CHARS", 300),
+    )
+    options.update(overrides)
+    return DubbingPipelineService(**options)
+
+
+@worker_init.connect
+def remember_worker_concurrency(sender=None, **kwargs):
+    # Sent in the parent before the pool forks, once -c or the cpu-count default is resolved.
+    global _worker_concurrency
+    _worker_concurrency = getattr(sender, "concurrency", None)
+
+
+@worker_process_init.connect
+def configure_inference_threads(**kwargs):
+    concurrency = (
+        _worker_concurrency
+        or _get_setting("CELERY_WORKER_CONCURRENCY", None)
+        or os.cpu_count()
+    )
+    threads = worker_thread_count(
+        concurrency=concurrency,
+        threads=_get_setting("DUBBING_TORCH_THREADS", 0),
+    )
+    configure_torch_threads(threads)
+
+
+@worker_process_init.connect
+def warm_up_models(**kwargs):
+    if not _get_setting("DUBBING_WARMUP_MODELS", False):
+        return
+
+    try:
+        build_pipeline().warm_up(stages=_get_setting("DUBBING_WARMUP_STAGES", None) or None)
+    except Exception as exc:
+        logger.warning("Model warm-up failed: %s", exc)
+
+
+def _local_path(field_file):
+    try:
+        path = field_file.path
+    except (NotImplementedError, ValueError):
+        return None
+    return path if os.path.exists(path) else None
+
+
+def _stage_input(video, input_video_path):
+    local_path = _local_path(video.original_video)
+    if local_path is not None:
+        return local_path
+
+    with video.original_video.open("rb") as source_file, open(input_video_path, "wb") as dst:
+        for chunk in source_file.chunks():
+            dst.write(chunk)
+    return input_video_path
+
+
+def _store_output(video, output_video_path, output_name):
+    storage = video.dubbed_video.storage
+    name = video.dubbed_video.field.generate_filename(video, output_name)
+    try:
+        target_path = storage.path(storage.get_available_name(name))
+    except NotImplementedError:
+        with open(output_video_path, "rb") as output_file:
+            video.dubbed_video.save(output_name, File(output_file), save=False)
+        return
+
+    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+    shutil.move(output_video_path, target_path)
+    if getattr(storage, "file_permissions_mode", None) is not None:
+        os.chmod(target_path, storage.file_permissions_mode)
+    video.dubbed_video.name = os.path.relpath(target_path, storage.location).replace(os.sep, "/")
+
+
+def _save_stage_metrics(run_id, timer):
+    PipelineStageMetric.objects.bulk_create(
+        [
+            PipelineStageMetric(
+                run_id=run_id,
+                stage=stage["stage"],
+                wall_time=stage["wall_time"],
+                cpu_time=stage["cpu_time"],
+                peak_rss_bytes=stage["peak_rss_bytes"],
+                real_time_factor=stage["real_time_factor"],
+                cached=stage["cached"],
+            )
+            for stage in timer.as_list()
+        ]
+    )
+    _save_translation_memory_counts(run_id)
+
+
+def _save_translation_memory_counts(run_id):
+    translation_memory = get_translation_memory()
+    if translation_memory is None:
+        return
+
+    counts = translation_memory.unreported_counts()
+    if any(counts.values()):
+        PipelineRun.objects.filter(id=run_id).update(
+            **{f"tm_{field}": F(f"tm_{field}") + count for field, count in counts.items()}
+        )
+
+
+def _finish_pipeline_run(run, wall_time, audio_duration, error_message=""):
+    totals = run.stages.aggregate(cpu_time=Sum("cpu_time"), peak_rss_bytes=Max("peak_rss_bytes"))
+    run.status = PipelineRun.STATUS_FAILED if error_message else PipelineRun.STATUS_COMPLETED
+    run.error_message = error_message
+    run.audio_duration = audio_duration
+    run.wall_time = wall_time
+    run.cpu_time = totals["cpu_time"] or 0.0
+    run.peak_rss_bytes = totals["peak_rss_bytes"] or 0
+    if audio_duration:
+        run.real_time_factor = wall_time / audio_duration
+    run.finished_at = timezone.now()
+    run.save()
+
+
+def _fail_video(video, error_message):
+    video.refresh_from_db(fields=["progress_stage", "progress_percent"])
+    video.status = Video.STATUS_FAILED
+    video.error_message = error_message
+    video.save(update_fields=["status", "error_message"])
+    publish_progress(progress_snapshot(video))
+    _release_slot(video)
+
+
+def _complete_video(video):
+    video.status = Video.STATUS_COMPLETED
+    video.error_message = ""
+    video.progress_stage = STAGE_DONE
+    video.progress_percent = 100
+    video.progress_updated_at = timezone.now()
+    video.save(
+        update_fields=[
+            "dubbed_video",
+            "status",
+            "error_message",
+            "progress_stage",
+            "progress_percent",
+            "progress_updated_at",
+        ]
+    )
+    publish_progress(progress_snapshot(video))
+    _release_slot(video)
+
+
+def _release_slot(video):
+    if finish_video_jobs(video.id):
+        dispatch_pending_jobs(video.user_id)
+
+
+def dispatch_pending_jobs(user_id):
+    claimed = claim_pending_jobs(user_id)
+    for job in claimed:
+        try:
+            result = process_video_dubbing.apply_async(
+                args=[job.video_id], queue=job.queue, priority=job.priority
+            )
+        except Exception:
+            # Hand the slot back so the job is retried instead of occupying it forever.
+            DubbingJob.objects.filter(id=job.id).update(
+                status=DubbingJob.STATUS_PENDING, dispatched_at=None
+            )
+            raise
+        DubbingJob.objects.filter(id=job.id).update(task_id=result.id)
+        job.task_id = result.id
+    return claimed
+
+
+def schedule_dubbing(video):
+    job = enqueue_video(video)
+    dispatch_pending_jobs(video.user_id)
+    job.refresh_from_db()
+    return job
+
+
+def _progress_reporter(video_id):
+    return ProgressReporter(
+        video_id, min_interval=_get_setting("DUBBING_PROGRESS_MIN_INTERVAL", 1.0)
+    )
+
+
+def _flush_progress(progress):
+    # The last throttled update of a stage would otherwise never be written.
+    if progress is None:
+        return
+    try:
+        progress.flush()
+    except Exception:
+        logger.exception("Could not write progress for video %s", progress.video_id)
+
+
+def _source_media(video):
+    # Videos uploaded before probing existed have no stream layout; the pipeline then
+    # falls back to transcoding everything as before.
+    if not video.stream_layout:
+        return None
+    return {field: getattr(video, field) for field in MEDIA_FIELDS}
+
+
+def _output_name(video):
+    original_name = Path(video.original_video.name).name
+    source_suffix = Path(original_name).suffix or ".mp4"
+    return f"dubbed_{video.id}_{Path(original_name).stem}{source_suffix}", source_suffix
+
+
 @shared_task
 def process_video_dubbing(video_id):
     try:
@@ -24,62 +325,445 @@ def process_video_dubbing(video_id):
         return {"error": "Video not found"}
 
     if not video.original_video:
-        video.status = Video.STATUS_FAILED
-        video.error_message = "Original video is missing"
-        video.save(update_fields=["status", "error_message"])
+        _fail_video(video, "Original video is missing")
         return {"error": "Original video is missing"}
 
-    try:
-        ffmpeg_bin = _get_setting("FFMPEG_BIN", "ffmpeg")
-        whisper_model = _get_setting("WHISPER_MODEL_NAME", "base")
-        translation_model = _get_setting(
-            "HF_TRANSLATION_MODEL_NAME", "Helsinki-NLP/opus-mt-en-ru"
-        )
-        tts_model = _get_setting("COQUI_TTS_MODEL_NAME", "tts_models/en/ljspeech/tacotron2-DDC")
-        source_language = _get_setting("DUBBING_SOURCE_LANGUAGE", None)
-
-        pipeline = DubbingPipelineService(
-            ffmpeg_bin=ffmpeg_bin,
-            whisper_model_name=whisper_model,
-            translation_model_name=translation_model,
-            tts_model_name=tts_model,
-            source_language=source_language,
-        )
+    run = PipelineRun.objects.create(video=video)
+    if _get_setting("DUBBING_STAGED_TASKS", False):
+        return _dispatch_stage_chain(video, run)
+    if _get_setting("DUBBING_CHECKPOINTS_ENABLED", True) and not _get_setting(
+        "DUBBING_STREAM_AUDIO", False
+    ):
+        return _run_checkpointed_pipeline(video, run)
+    return _run_pipeline(video, run)
+
+
+def _completed_response(video, run, detected_language):
+    response = {
+        "video_id": video.id,
+        "pipeline_run_id": run.id,
+        "status": video.status,
+        "detected_language": detected_language,
+    }
+    translation_memory = get_translation_memory()
+    if translation_memory is not None:
+        response["translation_memory"] = translation_memory.stats()
+    return response
+
 
-        original_name = Path(video.original_video.name).name
-        source_suffix = Path(original_name).suffix or ".mp4"
+def _run_pipeline(video, run):
+    timer = StageTimer()
+    wall_started = time.perf_counter()
+    progress = _progress_reporter(video.id)
 
-        with tempfile.TemporaryDirectory(prefix=f"dubbing_{video.id}_") as temp_dir:
+    try:
+        pipeline = build_pipeline(progress=progress)
+        output_name, source_suffix = _output_name(video)
+
+        with tempfile.TemporaryDirectory(
+            prefix=f"dubbing_{video.id}_",
+            dir=_get_setting("DUBBING_WORK_DIR", None) or None,
+        ) as temp_dir:
             input_video_path = str(Path(temp_dir) / f"input{source_suffix}")
             extracted_audio_path = str(Path(temp_dir) / "extracted.wav")
             tts_audio_path = str(Path(temp_dir) / "tts.wav")
             output_video_path = str(Path(temp_dir) / f"output{source_suffix}")
 
-            with video.original_video.open("rb") as source_file, open(input_video_path, "wb") as dst:
-                shutil.copyfileobj(source_file, dst)
+            input_video_path = _stage_input(video, input_video_path)
 
             result = pipeline.run(
                 input_video_path=input_video_path,
                 extracted_audio_path=extracted_audio_path,
                 tts_audio_path=tts_audio_path,
                 output_video_path=output_video_path,
+                timer=timer,
+                source_media=_source_media(video),
             )
 
-            output_name = f"dubbed_{video.id}_{Path(original_name).stem}{source_suffix}"
-            with open(output_video_path, "rb") as output_file:
-                video.dubbed_video.save(output_name, File(output_file), save=False)
+            _store_output(video, output_video_path, output_name)
+
+        _flush_progress(progress)
+        _complete_video(video)
+        _save_stage_metrics(run.id, timer)
+        _finish_pipeline_run(run, time.perf_counter() - wall_started, timer.audio_duration)
+        return _completed_response(video, run, result.get("detected_language"))
+    except Exception as exc:
+        _flush_progress(progress)
+        _fail_video(video, str(exc))
+        _save_stage_metrics(run.id, timer)
+        _finish_pipeline_run(
+            run, time.perf_counter() - wall_started, timer.audio_duration, error_message=str(exc)
+        )
+        return {"video_id": video.id, "status": video.status, "error": str(exc)}
+
+
+def _checkpoint_root():
+    root = _get_setting("DUBBING_CHECKPOINT_DIR", "")
+    if root:
+        return Path(root)
+    work_dir = _get_setting("DUBBING_WORK_DIR", "")
+    return Path(work_dir or _get_setting("DJANGO_VAR_DIR", tempfile.gettempdir())) / "checkpoints"
+
+
+def _checkpoint_dir(video_id):
+    return _checkpoint_root() / f"video_{video_id}"
 
-        video.status = Video.STATUS_COMPLETED
-        video.error_message = ""
-        video.save(update_fields=["dubbed_video", "status", "error_message"])
 
-        return {
-            "video_id": video.id,
-            "status": video.status,
-            "detected_language": result.get("detected_language"),
-        }
+def _new_job(video, run):
+    output_name, source_suffix = _output_name(video)
+    work_dir = _checkpoint_dir(video.id)
+    job = {
+        "video_id": video.id,
+        "original_video": video.original_video.name,
+        "work_dir": str(work_dir),
+        "input_video_path": str(work_dir / f"input{source_suffix}"),
+        "extracted_audio_path": str(work_dir / "extracted.wav"),
+        "transcript_path": str(work_dir / "transcript.json"),
+        "translation_path": str(work_dir / "translation.json"),
+        "tts_audio_path": str(work_dir / "tts.wav"),
+        "output_video_path": str(work_dir / f"output{source_suffix}"),
+        "output_name": output_name,
+        "source_media": _source_media(video),
+    }
+    # Outputs of finished stages (input path, duration, audio hash) come from the manifest.
+    return {**job, **CheckpointManifest(work_dir).job, "run_id": run.id}
+
+
+def _checkpoint_options(pipeline, job):
+    source = {"original_video": job["original_video"]}
+    options = pipeline.stage_options()
+    return {
+        "extract": source,
+        "transcribe": {**source, **options["transcribe"]},
+        "translate": {**source, **options["translate"]},
+        "synthesize": {**source, **options["synthesize"]},
+        "mux": {**source, **options["synthesize"]},
+    }
+
+
+def _run_checkpointed_pipeline(video, run):
+    timer = StageTimer()
+    wall_started = time.perf_counter()
+    job = _new_job(video, run)
+    timer.audio_duration = job.get("audio_duration")
+    progress = _progress_reporter(video.id)
+
+    try:
+        pipeline = build_pipeline(stream_audio=False, progress=progress)
+        job = run_checkpointed_stages(pipeline, job, timer)
     except Exception as exc:
-        video.status = Video.STATUS_FAILED
-        video.error_message = str(exc)
-        video.save(update_fields=["status", "error_message"])
+        _flush_progress(progress)
+        _fail_video(video, str(exc))
+        _save_stage_metrics(run.id, timer)
+        _finish_pipeline_run(
+            run, time.perf_counter() - wall_started, timer.audio_duration, error_message=str(exc)
+        )
         return {"video_id": video.id, "status": video.status, "error": str(exc)}
+
+    video.refresh_from_db()
+    _save_stage_metrics(run.id, timer)
+    _finish_pipeline_run(run, time.perf_counter() - wall_started, timer.audio_duration)
+    shutil.rmtree(job["work_dir"], ignore_errors=True)
+    return _completed_response(video, run, job.get("detected_language"))
+
+
+def run_checkpointed_stages(pipeline, job, timer, stage_functions=None):
+    for stage in STAGE_ORDER:
+        if pipeline.segmented and stage == "synthesize":
+            # Already run together with translation below.
+            continue
+        if pipeline.segmented and stage == "translate":
+            job = _execute_translate_and_synthesize(pipeline, job, timer, stage_functions)
+        else:
+            job = _execute_stage(pipeline, stage, job, timer, stage_functions)
+        timer.audio_duration = job.get("audio_duration")
+        _flush_progress(pipeline.progress)
+    return job
+
+
+def _execute_stage(pipeline, stage, job, timer, stage_functions=None):
+    manifest = CheckpointManifest(job["work_dir"])
+    options = _checkpoint_options(pipeline, job)
+    if manifest.is_done(stage, options):
+        return job
+
+    job = (stage_functions or STAGE_FUNCTIONS)[stage](pipeline, job, timer)
+    manifest.mark_done(stage, options[stage], job)
+    return job
+
+
+def _execute_translate_and_synthesize(pipeline, job, timer, stage_functions=None):
+    # In one process the two stages overlap through StagePipeline; the manifest still
+    # records them separately so a resume can pick up at synthesis.
+    manifest = CheckpointManifest(job["work_dir"])
+    options = _checkpoint_options(pipeline, job)
+    if manifest.is_done("translate", options):
+        return _execute_stage(pipeline, "synthesize", job, timer, stage_functions)
+
+    transcription = _read_json(job["transcript_path"])
+    translation = pipeline.translate_and_synthesize_stage(
+        transcription,
+        job["audio_duration"],
+        job["tts_audio_path"],
+        pipeline.cache_keys(job.get("audio_hash")),
+        timer,
+    )
+    _write_json(job["translation_path"], translation)
+    manifest.mark_done("translate", options["translate"], job)
+    manifest.mark_done("synthesize", options["synthesize"], job)
+    return job
+
+
+def _extract(pipeline, job, timer):
+    video = Video.objects.get(id=job["video_id"])
+    input_video_path = _stage_input(video, job["input_video_path"])
+    result = pipeline.extract_stage(
+        input_video_path, job["extracted_audio_path"], timer, job.get("source_media")
+    )
+    return {**job, "input_video_path": input_video_path, **result}
+
+
+def _transcribe(pipeline, job, timer):
+    transcription = pipeline.transcribe_stage(
+        job["extracted_audio_path"], pipeline.cache_keys(job.get("audio_hash")), timer
+    )
+    _write_json(job["transcript_path"], transcription)
+    return {**job, "detected_language": transcription.get("language")}
+
+
+def _translate(pipeline, job, timer):
+    transcription = _read_json(job["transcript_path"])
+    translation = pipeline.translate_stage(
+        transcription, pipeline.cache_keys(job.get("audio_hash")), timer
+    )
+    _write_json(job["translation_path"], translation)
+    return job
+
+
+def _synthesize(pipeline, job, timer):
+    translation = _read_json(job["translation_path"])
+    pipeline.synthesize_stage(
+        translation,
+        job["audio_duration"],
+        job["tts_audio_path"],
+        pipeline.cache_keys(job.get("audio_hash")),
+        timer,
+    )
+    return job
+
+
+def _mux(pipeline, job, timer):
+    pipeline.mux_stage(
+        job["input_video_path"],
+        job["tts_audio_path"],
+        job["output_video_path"],
+        timer,
+        job.get("source_media"),
+    )
+
+    video = Video.objects.get(id=job["video_id"])
+    _store_output(video, job["output_video_path"], job["output_name"])
+    _flush_progress(pipeline.progress)
+    _complete_video(video)
+    return job
+
+
+STAGE_FUNCTIONS = {
+    "extract": _extract,
+    "transcribe": _transcribe,
+    "translate": _translate,
+    "synthesize": _synthesize,
+    "mux": _mux,
+}
+
+
+def _write_json(path, value):
+    with open(path, "w", encoding="utf-8") as target:
+        json.dump(value, target, ensure_ascii=False)
+
+
+def _read_json(path):
+    with open(path, "r", encoding="utf-8") as source:
+        return json.load(source)
+
+
+def _dispatch_marker(job):
+    return Path(job["work_dir"]) / f".dispatched-run-{job['run_id']}"
+
+
+def _check_shared_work_dir(job):
+    # Stages hand artifacts over as paths, so a worker on another host only finds them when
+    # the work dir lives on storage shared by every dubbing worker.
+    if not _dispatch_marker(job).exists():
+        raise RuntimeError(
+            f"Work dir {job['work_dir']} is not visible on {socket.gethostname()}. "
+            "DUBBING_CHECKPOINT_DIR must be shared by all workers when DUBBING_STAGED_TASKS is on"
+        )
+
+
+def _dispatch_stage_chain(video, run):
+    if not _checkpoint_root().is_absolute():
+        error_message = "DUBBING_CHECKPOINT_DIR must be an absolute path on shared storage"
+        _fail_video(video, error_message)
+        _finish_pipeline_run(run, 0.0, None, error_message=error_message)
+        return {"video_id": video.id, "status": video.status, "error": error_message}
+
+    job = _new_job(video, run)
+    manifest = CheckpointManifest(job["work_dir"])
+    _dispatch_marker(job).write_text(socket.gethostname(), encoding="utf-8")
+    first_stage = manifest.first_incomplete_stage(
+        _checkpoint_options(build_pipeline(stream_audio=False), job)
+    )
+    remaining = STAGE_ORDER[STAGE_ORDER.index(first_stage or STAGE_ORDER[-1]) :]
+
+    # Stage tasks are routed to per-stage queues; the lane priority keeps short clips ahead
+    # of long ones inside each of those queues too.
+    priority = lane_for_duration(video.duration_seconds)["priority"]
+    signatures = [STAGE_TASKS[remaining[0]].s(job).set(priority=priority)]
+    signatures.extend(STAGE_TASKS[stage].s().set(priority=priority) for stage in remaining[1:])
+    result = chain(*signatures).apply_async()
+    return {
+        "video_id": video.id,
+        "pipeline_run_id": run.id,
+        "status": video.status,
+        "chain_id": result.id,
+        "resumed_from": remaining[0],
+    }
+
+
+def _run_stage(task, job, stage):
+    if "error" in job:
+        return job
+
+    timer = StageTimer()
+    timer.audio_duration = job.get("audio_duration")
+    progress = _progress_reporter(job["video_id"])
+    try:
+        # Intermediate artifacts live on disk and only their paths travel through the broker.
+        _check_shared_work_dir(job)
+        pipeline = build_pipeline(stream_audio=False, progress=progress)
+        job = _execute_stage(pipeline, stage, job, timer)
+        _flush_progress(progress)
+    except Exception as exc:
+        _flush_progress(progress)
+        _save_stage_metrics(job["run_id"], timer)
+        _fail_staged_job(job, str(exc))
+        task.request.chain = None
+        return {**job, "error": str(exc)}
+
+    _save_stage_metrics(job["run_id"], timer)
+    if stage == STAGE_ORDER[-1]:
+        _finish_staged_run(job)
+    return job
+
+
+def _fail_staged_job(job, error_message):
+    video = Video.objects.filter(id=job["video_id"]).first()
+    if video is not None:
+        _fail_video(video, error_message)
+
+    run = PipelineRun.objects.filter(id=job["run_id"]).first()
+    if run is not None:
+        wall_time = (timezone.now() - run.created_at).total_seconds()
+        _finish_pipeline_run(
+            run, wall_time, job.get("audio_duration"), error_message=error_message
+        )
+
+
+def _finish_staged_run(job):
+    run = PipelineRun.objects.get(id=job["run_id"])
+    wall_time = (timezone.now() - run.created_at).total_seconds()
+    _finish_pipeline_run(run, wall_time, job.get("audio_duration"))
+    shutil.rmtree(job["work_dir"], ignore_errors=True)
+
+
+@shared_task(bind=True)
+def extract_audio_stage(self, job):
+    return _run_stage(self, job, "extract")
+
+
+@shared_task(bind=True)
+def transcribe_stage(self, job):
+    return _run_stage(self, job, "transcribe")
+
+
+@shared_task(bind=True)
+def translate_stage(self, job):
+    return _run_stage(self, job, "translate")
+
+
+@shared_task(bind=True)
+def synthesize_stage(self, job):
+    return _run_stage(self, job, "synthesize")
+
+
+@shared_task(bind=True)
+def mux_stage(self, job):
+    return _run_stage(self, job, "mux")
+
+
+STAGE_TASKS = {
+    "extract": extract_audio_stage,
+    "transcribe": transcribe_stage,
+    "translate": translate_stage,
+    "synthesize": synthesize_stage,
+    "mux": mux_stage,
+}
+
+
+@shared_task
+def release_stale_dubbing_jobs():
+    timeout_hours = _get_setting("DUBBING_JOB_TIMEOUT_HOURS", 12)
+    expired_video_ids = expire_stale_jobs(timeout_hours)
+    # Without this the video stays PROCESSING and can never be started again.
+    for video in Video.objects.filter(id__in=expired_video_ids, status=Video.STATUS_PROCESSING):
+        _fail_video(video, f"Dubbing did not finish within {timeout_hours} hours")
+
+    dispatched_count = 0
+    for user_id in users_with_pending_jobs():
+        dispatched_count += len(dispatch_pending_jobs(user_id))
+
+    return {"expired_count": len(expired_video_ids), "dispatched_count": dispatched_count}
+
+
+@shared_task
+def cleanup_stale_checkpoints():
+    root = _checkpoint_root()
+    if not root.exists():
+        return {"removed_count": 0}
+
+    ttl_hours = _get_setting("DUBBING_CHECKPOINT_TTL_HOURS", 48)
+    cutoff = time.time() - ttl_hours * 3600
+
+    work_dirs = {}
+    for work_dir in root.glob("video_*"):
+        try:
+            work_dirs[int(work_dir.name.split("_", 1)[1])] = work_dir
+        except ValueError:
+            continue
+
+    statuses = dict(Video.objects.filter(id__in=work_dirs.keys()).values_list("id", "status"))
+    removed_count = 0
+    for video_id, work_dir in work_dirs.items():
+        video_status = statuses.get(video_id)
+        try:
+            modified_at = work_dir.stat().st_mtime
+        except FileNotFoundError:
+            continue
+
+        manifest_path = work_dir / MANIFEST_NAME
+        if manifest_path.exists():
+            modified_at = max(modified_at, manifest_path.stat().st_mtime)
+
+        # Running stages rewrite the manifest as they finish, so a PROCESSING video whose
+        # work dir is older than the TTL was left behind by a killed worker.
+        stale = (
+            video_status is None
+            or video_status == Video.STATUS_COMPLETED
+            or modified_at < cutoff
+        )
+        if stale:
+            shutil.rmtree(work_dir, ignore_errors=True)
+            removed_count += 1
+
+    return {"removed_count": removed_count, "ttl_hours": ttl_hours}
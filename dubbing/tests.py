@@ -1,3 +1,423 @@
-from django.test import TestCase
+import json
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from videos.models import Video
+
+from . import tasks
+from .models import DubbingJob, PipelineRun
+from .progress import ProgressReporter, overall_percent
+from .scheduler import claim_pending_jobs, enqueue_video
+from .services import ArtifactCache
+from .services.audio_service import AudioAssemblyService
+from .services.instrumentation import StageTimer
+from .services.translation_service import HuggingFaceTranslationService
+from .services.stubs import (
+    StubASREngine,
+    StubTranslationService,
+    StubTTSService,
+    StubWhisperService,
+)
+from .services.vad import chunk_time_to_source, pack_chunks
+from .services.whisper_service import WHISPER_SAMPLE_RATE, WhisperService
+
+
+def speech_with_pause(speech_seconds=3.0, pause_seconds=2.0):
+    length = int(speech_seconds * WHISPER_SAMPLE_RATE)
+    tone = np.sin(np.linspace(0, 440 * 2 * np.pi * speech_seconds, length))
+    silence = np.zeros(int(pause_seconds * WHISPER_SAMPLE_RATE))
+    return np.concatenate([tone, silence, tone]).astype(np.float32) * 0.5
+
+
+class ChunkedTranscriptionTests(SimpleTestCase):
+    def make_service(self):
+        service = WhisperService(model_name="stub", chunked=True, workers=2, max_chunk_seconds=4)
+        service.engine = StubASREngine(segment_seconds=2.0)
+        return service
+
+    def test_daemonic_worker_transcribes_chunks_in_process(self):
+        service = self.make_service()
+        ticks = []
+        daemonic = mock.Mock(daemon=True)
+        with mock.patch(
+            "dubbing.services.whisper_service.multiprocessing.current_process",
+            return_value=daemonic,
+        ), mock.patch(
+            "dubbing.services.whisper_service._get_pool",
+            side_effect=AssertionError("daemonic processes are not allowed to have children"),
+        ) as get_pool:
+            result = service.transcribe(audio=speech_with_pause(), progress=ticks.append)
+
+        get_pool.assert_not_called()
+        self.assertEqual(result["language"], "en")
+        self.assertGreaterEqual(len(result["segments"]), 2)
+        self.assertEqual(ticks[-1], 1.0)
+        starts = [segment["start"] for segment in result["segments"]]
+        self.assertEqual(starts, sorted(starts))
+        self.assertLessEqual(result["segments"][-1]["end"], 8.0)
+        # The second utterance starts after the pause, not at its packed chunk offset.
+        self.assertGreaterEqual(starts[-1], 4.0)
+
+
+class UpperCaseTranslationService(StubTranslationService):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.model_name = "stub-upper"
+
+    def _load_translator(self):
+        def translate(texts, **kwargs):
+            return [{"translation_text": text.upper()} for text in texts]
+
+        return translate
+
+
+class CheckpointResumeTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(
+            MEDIA_ROOT=self.media_root,
+            DUBBING_CHECKPOINT_DIR=f"{self.media_root}/checkpoints",
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        source_path = Path(self.media_root) / "original_videos" / "speech.wav"
+        source_path.parent.mkdir()
+        AudioAssemblyService().write_track(
+            speech_with_pause(), WHISPER_SAMPLE_RATE, str(source_path)
+        )
+        user = get_user_model().objects.create_user("owner", "owner@example.com", "password")
+        self.video = Video.objects.create(
+            user=user,
+            original_video="original_videos/speech.wav",
+            status=Video.STATUS_PROCESSING,
+            container_format="wav",
+            audio_codec="pcm_s16le",
+            audio_sample_rate=WHISPER_SAMPLE_RATE,
+            audio_channels=1,
+            stream_layout=[{"index": 0, "type": "audio"}],
+        )
+        self.run = PipelineRun.objects.create(video=self.video)
+        self.cache = ArtifactCache(root=f"{self.media_root}/cache")
+
+    def build_pipeline(self, translation_service):
+        pipeline = tasks.build_pipeline(
+            stream_audio=False, artifact_cache=self.cache, translation_memory=None
+        )
+        pipeline.whisper_service = StubWhisperService()
+        pipeline.translation_service = translation_service
+        pipeline.tts_service = StubTTSService()
+        return pipeline
+
+    def test_resume_after_option_change_ignores_artifacts_of_old_models(self):
+        def crash(pipeline, job, timer):
+            raise RuntimeError("worker lost")
+
+        job = tasks._new_job(self.video, self.run)
+        with self.assertRaises(RuntimeError):
+            tasks.run_checkpointed_stages(
+                self.build_pipeline(StubTranslationService()),
+                job,
+                StageTimer(),
+                {**tasks.STAGE_FUNCTIONS, "mux": crash},
+            )
+
+        timer = StageTimer()
+        job = tasks._new_job(self.video, self.run)
+        job = tasks.run_checkpointed_stages(
+            self.build_pipeline(UpperCaseTranslationService()), job, timer
+        )
+
+        cached = {stage["stage"]: stage["cached"] for stage in timer.as_list()}
+        self.assertNotIn("transcribe", cached)
+        self.assertFalse(cached["translate"])
+        self.assertFalse(cached["synthesize"])
+        with open(job["translation_path"], encoding="utf-8") as source:
+            translated_text = json.load(source)["translated_text"]
+        self.assertTrue(translated_text)
+        self.assertEqual(translated_text, translated_text.upper())
+        self.video.refresh_from_db()
+        self.assertEqual(self.video.status, Video.STATUS_COMPLETED)
+
+
+class CachedTTSEvictionTests(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.cache = ArtifactCache(root=f"{self.root}/cache")
+        self.cache_keys = {"tts": self.cache.make_key("tts", "audio", {})}
+        self.cache.put_with(
+            self.cache_keys["tts"],
+            lambda target: AudioAssemblyService().write_track(
+                speech_with_pause(), WHISPER_SAMPLE_RATE, target
+            ),
+        )
+
+    def build_pipeline(self, stream_audio):
+        return tasks.build_pipeline(stream_audio=stream_audio, artifact_cache=self.cache)
+
+    def test_entry_evicted_after_lookup_is_a_miss(self):
+        get_path = self.cache.get_path
+
+        def evicting_get_path(key, suffix=".wav"):
+            path = get_path(key, suffix)
+            path.unlink()
+            return path
+
+        cached_stages = []
+        with mock.patch.object(self.cache, "get_path", side_effect=evicting_get_path):
+            result = self.build_pipeline(stream_audio=True)._load_cached_tts(
+                self.cache_keys, f"{self.root}/tts.wav", cached_stages
+            )
+
+        self.assertIsNone(result)
+        self.assertEqual(cached_stages, [])
+
+    def test_hit_and_evicted_entry_when_writing_to_disk(self):
+        pipeline = self.build_pipeline(stream_audio=False)
+        tts_audio_path = f"{self.root}/tts.wav"
+        cached_stages = []
+
+        self.assertEqual(
+            pipeline._load_cached_tts(self.cache_keys, tts_audio_path, cached_stages),
+            tts_audio_path,
+        )
+        self.assertEqual(cached_stages, ["tts"])
+
+        shutil.rmtree(f"{self.root}/cache")
+        self.assertIsNone(pipeline._load_cached_tts(self.cache_keys, tts_audio_path, []))
+
+
+class ProgressReporterTests(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user("owner", "owner@example.com", "password")
+        self.video = Video.objects.create(
+            user=user, original_video="original_videos/clip.mp4", status=Video.STATUS_PROCESSING
+        )
+
+    def test_flush_writes_the_last_throttled_update(self):
+        progress = ProgressReporter(self.video.id, min_interval=3600)
+        progress("transcribe", 0.1)
+        progress("transcribe", 0.9)
+
+        self.video.refresh_from_db()
+        self.assertEqual(self.video.progress_percent, overall_percent("transcribe", 0.1))
+
+        progress.flush()
+        self.video.refresh_from_db()
+        self.assertEqual(self.video.progress_percent, overall_percent("transcribe", 0.9))
+
+    def test_flush_without_updates_writes_nothing(self):
+        ProgressReporter(self.video.id).flush()
+
+        self.video.refresh_from_db()
+        self.assertEqual(self.video.progress_stage, "")
+        self.assertIsNone(self.video.progress_updated_at)
+
+
+class RecordingTranslationService(HuggingFaceTranslationService):
+    def __init__(self, **kwargs):
+        super().__init__(model_name="recording", **kwargs)
+        self.batches = []
+
+    def _load_translator(self):
+        def translate(texts, **kwargs):
+            self.batches.append(list(texts))
+            return [{"translation_text": f"<{text}>"} for text in texts]
+
+        return translate
+
+
+class TranslateBatchTests(SimpleTestCase):
+    def test_results_follow_input_order_across_length_sorted_batches(self):
+        service = RecordingTranslationService(batch_size=2)
+        texts = ["a much longer sentence here", "", "mid length", "  x  ", "short one"]
+
+        results = service.translate_batch(texts)
+
+        self.assertEqual(
+            results,
+            ["<a much longer sentence here>", "", "<mid length>", "<x>", "<short one>"],
+        )
+        self.assertEqual(
+            service.batches,
+            [["x", "short one"], ["mid length", "a much longer sentence here"]],
+        )
+
+    def test_translate_many_regroups_sentences_per_text(self):
+        service = RecordingTranslationService(batch_size=8)
+
+        results = service.translate_many(["One. Two!", "Three?"])
+
+        self.assertEqual(results, ["<One.> <Two!>", "<Three?>"])
+        self.assertEqual(len(service.batches), 1)
+
+
+class AudioAssemblyTests(SimpleTestCase):
+    sample_rate = 1000
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.service = AudioAssemblyService(max_compression=1.5, frame_size=64)
+
+    def write_constant(self, name, value, seconds):
+        path = f"{self.root}/{name}.wav"
+        samples = np.full(int(seconds * self.sample_rate), value, dtype=np.float32)
+        self.service.write_track(samples, self.sample_rate, path)
+        return path
+
+    def test_segments_are_placed_at_their_start_times(self):
+        segments = [
+            {"start": 2.0, "end": 3.0, "audio_path": self.write_constant("second", -0.25, 0.5)},
+            {"start": 0.5, "end": 1.5, "audio_path": self.write_constant("first", 0.5, 1.0)},
+            {"start": 1.0, "end": 2.0, "text": "not synthesized"},
+        ]
+
+        track, sample_rate = self.service.build_track(segments, duration=3.0)
+
+        self.assertEqual(sample_rate, self.sample_rate)
+        self.assertEqual(len(track), 3000)
+        np.testing.assert_allclose(track[:500], 0.0)
+        np.testing.assert_allclose(track[500:1500], 0.5, atol=1e-3)
+        np.testing.assert_allclose(track[1500:2000], 0.0)
+        np.testing.assert_allclose(track[2000:2500], -0.25, atol=1e-3)
+        np.testing.assert_allclose(track[2500:], 0.0)
+
+    def test_fit_to_slot_keeps_short_audio(self):
+        samples = np.ones(400, dtype=np.float32)
+
+        self.assertIs(self.service._fit_to_slot(samples, 500), samples)
+
+    def test_fit_to_slot_compresses_within_the_limit(self):
+        fitted = self.service._fit_to_slot(np.full(600, 0.5, dtype=np.float32), 500)
+
+        self.assertEqual(len(fitted), 500)
+        np.testing.assert_allclose(fitted[64:-64], 0.5, atol=1e-3)
+
+    def test_fit_to_slot_truncates_with_a_fade_beyond_the_limit(self):
+        fitted = self.service._fit_to_slot(np.full(1500, 0.5, dtype=np.float32), 500)
+
+        self.assertEqual(len(fitted), 500)
+        self.assertAlmostEqual(float(fitted[-1]), 0.0, places=6)
+        self.assertAlmostEqual(float(fitted[200]), 0.5, places=3)
+
+    def test_overlapping_segment_is_cut_at_the_next_start(self):
+        segments = [
+            {"start": 0.0, "end": 1.0, "audio_path": self.write_constant("long", 0.5, 3.0)},
+            {"start": 1.0, "end": 2.0, "audio_path": self.write_constant("next", 0.25, 0.5)},
+        ]
+
+        track, _ = self.service.build_track(segments, duration=2.0)
+
+        np.testing.assert_allclose(track[1000:1500], 0.25, atol=1e-3)
+        self.assertLess(abs(float(track[999])), 0.5)
+
+
+class ChunkPackingTests(SimpleTestCase):
+    sample_rate = 100
+
+    def test_short_regions_share_a_chunk_with_spacers(self):
+        samples = np.arange(1000, dtype=np.float32)
+        regions = [(100, 200), (400, 450), (700, 760)]
+
+        chunks = pack_chunks(
+            samples, regions, self.sample_rate, max_chunk_seconds=3, spacer_seconds=0.1
+        )
+
+        self.assertEqual(len(chunks), 1)
+        layout = chunks[0]["layout"]
+        self.assertEqual(
+            layout,
+            [
+                {"offset": 0, "start": 100, "length": 100},
+                {"offset": 110, "start": 400, "length": 50},
+                {"offset": 170, "start": 700, "length": 60},
+            ],
+        )
+        audio = chunks[0]["audio"]
+        self.assertEqual(len(audio), 230)
+        np.testing.assert_array_equal(audio[110:160], samples[400:450])
+        np.testing.assert_array_equal(audio[100:110], 0.0)
+
+    def test_regions_that_do_not_fit_start_a_new_chunk(self):
+        samples = np.zeros(1000, dtype=np.float32)
+        regions = [(0, 150), (300, 450)]
+
+        chunks = pack_chunks(
+            samples, regions, self.sample_rate, max_chunk_seconds=2, spacer_seconds=0.1
+        )
+
+        self.assertEqual([chunk["layout"][0]["start"] for chunk in chunks], [0, 300])
+        self.assertEqual([len(chunk["audio"]) for chunk in chunks], [150, 150])
+
+    def test_chunk_times_map_back_to_source_positions(self):
+        layout = [
+            {"offset": 0, "start": 100, "length": 100},
+            {"offset": 110, "start": 400, "length": 50},
+        ]
+
+        self.assertAlmostEqual(chunk_time_to_source(layout, 0.0, self.sample_rate), 1.0)
+        self.assertAlmostEqual(chunk_time_to_source(layout, 0.5, self.sample_rate), 1.5)
+        self.assertAlmostEqual(chunk_time_to_source(layout, 1.2, self.sample_rate), 4.1)
+        # Inside a spacer the time is clamped to the end of the preceding piece.
+        self.assertAlmostEqual(chunk_time_to_source(layout, 1.05, self.sample_rate), 2.0)
+        # Past the last piece it is clamped to the end of the speech.
+        self.assertAlmostEqual(chunk_time_to_source(layout, 9.0, self.sample_rate), 4.5)
+
+
+@override_settings(DUBBING_MAX_IN_FLIGHT_PER_USER=2)
+class ClaimPendingJobsTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user("owner", "owner@example.com", "password")
+        self.other = User.objects.create_user("other", "other@example.com", "password")
+
+    def enqueue(self, user, duration_seconds):
+        video = Video.objects.create(
+            user=user, original_video="original_videos/clip.mp4", duration_seconds=duration_seconds
+        )
+        return enqueue_video(video)
+
+    def test_shortest_jobs_are_claimed_first_up_to_the_cap(self):
+        long_job = self.enqueue(self.user, 3600)
+        unprobed = self.enqueue(self.user, None)
+        short_job = self.enqueue(self.user, 30)
+        medium_job = self.enqueue(self.user, 600)
+        self.enqueue(self.other, 10)
+
+        claimed = claim_pending_jobs(self.user.id)
+
+        self.assertEqual([job.id for job in claimed], [short_job.id, medium_job.id])
+        self.assertEqual(
+            set(
+                DubbingJob.objects.filter(status=DubbingJob.STATUS_DISPATCHED).values_list(
+                    "id", flat=True
+                )
+            ),
+            {short_job.id, medium_job.id},
+        )
+
+        # Every slot is taken until one of the dispatched jobs finishes.
+        self.assertEqual(claim_pending_jobs(self.user.id), [])
+        DubbingJob.objects.filter(id=short_job.id).update(status=DubbingJob.STATUS_FINISHED)
+        self.assertEqual([job.id for job in claim_pending_jobs(self.user.id)], [long_job.id])
+
+        DubbingJob.objects.filter(id=medium_job.id).update(status=DubbingJob.STATUS_FINISHED)
+        self.assertEqual([job.id for job in claim_pending_jobs(self.user.id)], [unprobed.id])
+
+    @override_settings(DUBBING_MAX_IN_FLIGHT_PER_USER=0)
+    def test_zero_cap_claims_everything(self):
+        for duration_seconds in (90, 30, 60):
+            self.enqueue(self.user, duration_seconds)
+
+        claimed = claim_pending_jobs(self.user.id)
+
+        self.assertEqual([job.duration_seconds for job in claimed], [30, 60, 90])
@@ -0,0 +1,124 @@
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+
+from .models import TranslationMemoryEntry
+
+LOOKUP_CHUNK_SIZE = 900
+COUNTER_FIELDS = ("memory_hits", "database_hits", "misses")
+
+
+def normalize_sentence(text):
+    return " ".join(unicodedata.normalize("NFC", text or "").split())
+
+
+def hash_sentence(normalized):
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class TranslationMemory:
+    def __init__(self, max_entries=10000):
+        self.max_entries = max(int(max_entries or 0), 0)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.database_hits = 0
+        self.misses = 0
+        self._reported = dict.fromkeys(COUNTER_FIELDS, 0)
+
+    def lookup_many(self, model_name, sentences, count=True):
+        found = {}
+        pending = {}
+        with self._lock:
+            for sentence in sentences:
+                normalized = normalize_sentence(sentence)
+                if not normalized:
+                    continue
+
+                translated = self._entries.get((model_name, normalized))
+                if translated is not None:
+                    self._entries.move_to_end((model_name, normalized))
+                    found[sentence] = translated
+                    self.memory_hits += count
+                else:
+                    pending.setdefault(hash_sentence(normalized), []).append(sentence)
+
+        if pending:
+            hashes = list(pending.keys())
+            rows = []
+            for start in range(0, len(hashes), LOOKUP_CHUNK_SIZE):
+                rows.extend(
+                    TranslationMemoryEntry.objects.filter(
+                        model_name=model_name,
+                        source_hash__in=hashes[start : start + LOOKUP_CHUNK_SIZE],
+                    ).values_list("source_hash", "source_text", "translated_text")
+                )
+
+            with self._lock:
+                for source_hash, source_text, translated_text in rows:
+                    for sentence in pending.pop(source_hash, []):
+                        found[sentence] = translated_text
+                        self.database_hits += count
+                    self._remember(model_name, source_text, translated_text)
+                self.misses += count * sum(len(sentences) for sentences in pending.values())
+
+        return found
+
+    def preload(self, model_name, sentences):
+        return self.lookup_many(model_name, sentences, count=False)
+
+    def store_many(self, model_name, translations):
+        entries = {}
+        for sentence, translated in translations.items():
+            normalized = normalize_sentence(sentence)
+            if normalized and translated:
+                entries[normalized] = translated
+
+        if not entries:
+            return
+
+        TranslationMemoryEntry.objects.bulk_create(
+            [
+                TranslationMemoryEntry(
+                    model_name=model_name,
+                    source_hash=hash_sentence(normalized),
+                    source_text=normalized,
+                    translated_text=translated,
+                )
+                for normalized, translated in entries.items()
+            ],
+            ignore_conflicts=True,
+        )
+
+        with self._lock:
+            for normalized, translated in entries.items():
+                self._remember(model_name, normalized, translated)
+
+    def stats(self):
+        lookups = self.memory_hits + self.database_hits + self.misses
+        hits = self.memory_hits + self.database_hits
+        return {
+            "memory_hits": self.memory_hits,
+            "database_hits": self.database_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "cached_entries": len(self._entries),
+        }
+
+    def unreported_counts(self):
+        # Counters live in the worker process; callers persist the growth since the last call.
+        with self._lock:
+            counts = {
+                field: getattr(self, field) - self._reported[field] for field in COUNTER_FIELDS
+            }
+            self._reported = {field: getattr(self, field) for field in COUNTER_FIELDS}
+        return counts
+
+    def _remember(self, model_name, normalized, translated):
+        if not self.max_entries:
+            return
+        self._entries[(model_name, normalized)] = translated
+        self._entries.move_to_end((model_name, normalized))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
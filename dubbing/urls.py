@@ -1,7 +1,22 @@
 from django.urls import path
-from .views import StartDubbingView, DubbingStatusView
+from .views import (
+    DubbingProgressStreamView,
+    DubbingStatusView,
+    PipelineMetricsView,
+    PipelineRunListView,
+    PipelineStatsView,
+    StartDubbingView,
+)
 
 urlpatterns = [
     path("<int:video_id>/start/", StartDubbingView.as_view(), name="dubbing-start"),
     path("<int:video_id>/status/", DubbingStatusView.as_view(), name="dubbing-status"),
+    path(
+        "<int:video_id>/status/stream/",
+        DubbingProgressStreamView.as_view(),
+        name="dubbing-status-stream",
+    ),
+    path("<int:video_id>/runs/", PipelineRunListView.as_view(), name="dubbing-runs"),
+    path("stats/", PipelineStatsView.as_view(), name="dubbing-stats"),
+    path("metrics/", PipelineMetricsView.as_view(), name="dubbing-metrics"),
 ]
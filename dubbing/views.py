@@ -1,12 +1,30 @@
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Avg, Count, Max
+from django.http import HttpResponse, StreamingHttpResponse
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from videos.conditional import not_modified_response, set_validators, video_validators
 from videos.models import Video
 from videos.serializers import VideoSerializer
 
-from .tasks import process_video_dubbing
+from .metrics import render_prometheus_metrics
+from .models import PipelineRun, PipelineStageMetric
+from .permissions import HasMetricsToken
+from .progress import (
+    ProgressEventStream,
+    progress_cache_configured,
+    progress_snapshot,
+    publish_progress,
+    reset_progress,
+)
+from .renderers import EventStreamRenderer
+from .serializers import PipelineRunSerializer
+from .tasks import schedule_dubbing
 
 
 class StartDubbingView(APIView):
@@ -32,15 +50,20 @@ class StartDubbingView(APIView):
 
         video.status = Video.STATUS_PROCESSING
         video.error_message = ""
-        video.save(update_fields=["status", "error_message"])
+        progress_fields = reset_progress(video)
+        video.save(update_fields=["status", "error_message", *progress_fields])
+        publish_progress(progress_snapshot(video))
 
-        task = process_video_dubbing.delay(video.id)
+        job = schedule_dubbing(video)
+        queued = job.status == job.STATUS_PENDING
         return Response(
             {
-                "message": "Dubbing started",
-                "task_id": task.id,
+                "message": "Dubbing queued" if queued else "Dubbing started",
+                "task_id": job.task_id or None,
                 "video_id": video.id,
                 "status": video.status,
+                "lane": job.lane,
+                "queued": queued,
             },
             status=status.HTTP_202_ACCEPTED,
         )
@@ -55,5 +78,119 @@ class DubbingStatusView(APIView):
         except Video.DoesNotExist:
             return Response({"error": "Video not found"}, status=status.HTTP_404_NOT_FOUND)
 
+        etag, last_modified = video_validators(video)
+        not_modified = not_modified_response(request, etag)
+        if not_modified is not None:
+            return set_validators(not_modified, etag, last_modified)
+
         serializer = VideoSerializer(video)
+        return set_validators(
+            Response(serializer.data, status=status.HTTP_200_OK), etag, last_modified
+        )
+
+
+class DubbingProgressStreamView(APIView):
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [EventStreamRenderer, JSONRenderer]
+
+    def get(self, request, video_id):
+        if not Video.objects.filter(id=video_id, user=request.user).exists():
+            return Response({"error": "Video not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        if not progress_cache_configured():
+            return Response(
+                {"error": "Progress streaming requires DUBBING_PROGRESS_CACHE_URL"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+
+        # Under ASGI each waiting client costs a coroutine; under WSGI it pins a worker
+        # thread for the whole run, so that is only allowed when explicitly enabled.
+        is_asgi = isinstance(request._request, ASGIRequest)
+        if not is_asgi and not getattr(settings, "DUBBING_PROGRESS_STREAM_ALLOW_WSGI", False):
+            return Response(
+                {"error": "Progress streaming is only served over ASGI; poll the status endpoint"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+
+        stream = ProgressEventStream(
+            video_id,
+            poll_interval=getattr(settings, "DUBBING_PROGRESS_POLL_INTERVAL", 1.0),
+            heartbeat_interval=getattr(settings, "DUBBING_PROGRESS_HEARTBEAT_INTERVAL", 15.0),
+            max_duration=getattr(settings, "DUBBING_PROGRESS_STREAM_TIMEOUT", 3600),
+        )
+        if is_asgi:
+            content = stream.__aiter__()
+        else:
+            content = iter(stream)
+
+        response = StreamingHttpResponse(content, content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+
+class PipelineRunListView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, video_id):
+        if not Video.objects.filter(id=video_id, user=request.user).exists():
+            return Response({"error": "Video not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        runs = (
+            PipelineRun.objects.filter(video_id=video_id)
+            .prefetch_related("stages")
+            .order_by("-created_at")
+        )
+        serializer = PipelineRunSerializer(runs, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class PipelineStatsView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        runs = PipelineRun.objects.filter(video__user=request.user)
+        stages = (
+            PipelineStageMetric.objects.filter(run__video__user=request.user, cached=False)
+            .values("stage")
+            .order_by("stage")
+            .annotate(
+                runs=Count("id"),
+                avg_wall_time=Avg("wall_time"),
+                max_wall_time=Max("wall_time"),
+                avg_cpu_time=Avg("cpu_time"),
+                avg_real_time_factor=Avg("real_time_factor"),
+                max_peak_rss_bytes=Max("peak_rss_bytes"),
+            )
+        )
+        cache_hits = (
+            PipelineStageMetric.objects.filter(run__video__user=request.user, cached=True)
+            .values("stage")
+            .order_by("stage")
+            .annotate(count=Count("id"))
+        )
+
+        return Response(
+            {
+                "runs": list(runs.values("status").order_by("status").annotate(count=Count("id"))),
+                "totals": runs.filter(status=PipelineRun.STATUS_COMPLETED).aggregate(
+                    avg_wall_time=Avg("wall_time"),
+                    avg_real_time_factor=Avg("real_time_factor"),
+                    max_peak_rss_bytes=Max("peak_rss_bytes"),
+                ),
+                "stages": list(stages),
+                "cache_hits": {row["stage"]: row["count"] for row in cache_hits},
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class PipelineMetricsView(APIView):
+    authentication_classes = []
+    permission_classes = [HasMetricsToken]
+
+    def get(self, request):
+        return HttpResponse(
+            render_prometheus_metrics(),
+            content_type="text/plain; version=0.0.4; charset=utf-8",
+        )
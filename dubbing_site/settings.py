@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 
 from datetime import timedelta
 import os
+import tempfile
 from pathlib import Path
 from celery.schedules import crontab
 
@@ -52,6 +53,13 @@ def env_int(name, default=0):
     return int(value)
 
 
+def env_float(name, default=0.0):
+    value = env(name)
+    if value is None or value == "":
+        return default
+    return float(value)
+
+
 def env_list(name, default=None):
     value = env(name)
     if value is None or value.strip() == "":
@@ -126,12 +134,51 @@ WSGI_APPLICATION = 'dubbing_site.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / env("DJANGO_DB_NAME", "db.sqlite3"),
+DJANGO_DB_ENGINE = env("DJANGO_DB_ENGINE", "sqlite").strip().lower()
+
+if DJANGO_DB_ENGINE in {"postgres", "postgresql"}:
+    DJANGO_DB_POOL = env_bool("DJANGO_DB_POOL", False)
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': env("DJANGO_DB_NAME", "dubbing_site"),
+            'USER': env("DJANGO_DB_USER", ""),
+            'PASSWORD': env("DJANGO_DB_PASSWORD", ""),
+            'HOST': env("DJANGO_DB_HOST", "127.0.0.1"),
+            'PORT': env("DJANGO_DB_PORT", "5432"),
+            # Django's pool hands out its own connections, so persistent connections are
+            # only kept when pooling is off (Django refuses to combine the two).
+            'CONN_MAX_AGE': 0 if DJANGO_DB_POOL else env_int("DJANGO_DB_CONN_MAX_AGE", 60),
+            'CONN_HEALTH_CHECKS': env_bool("DJANGO_DB_CONN_HEALTH_CHECKS", True),
+            'OPTIONS': {
+                'connect_timeout': env_int("DJANGO_DB_CONNECT_TIMEOUT", 10),
+            },
+        }
+    }
+    if DJANGO_DB_POOL:
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': env_int("DJANGO_DB_POOL_MIN_SIZE", 2),
+            'max_size': env_int("DJANGO_DB_POOL_MAX_SIZE", 10),
+            'timeout': env_float("DJANGO_DB_POOL_TIMEOUT", 10.0),
+        }
+else:
+    # WAL lets the web workers keep reading while a Celery worker writes Video.status, and
+    # IMMEDIATE transactions take the write lock up front so a busy database waits for
+    # busy_timeout instead of failing with "database is locked" on a lock upgrade.
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / env("DJANGO_DB_NAME", "db.sqlite3"),
+            'OPTIONS': {
+                'init_command': (
+                    "PRAGMA journal_mode=WAL;"
+                    "PRAGMA synchronous=NORMAL;"
+                    f"PRAGMA busy_timeout={env_int('DJANGO_SQLITE_BUSY_TIMEOUT_MS', 5000)};"
+                ),
+                'transaction_mode': env("DJANGO_SQLITE_TRANSACTION_MODE", "IMMEDIATE"),
+            },
+        }
     }
-}
 
 
 # Password validation
@@ -182,6 +229,9 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Scratch state (upload parts, artifact cache, checkpoints) is kept out of the source tree.
+DJANGO_VAR_DIR = Path(env("DJANGO_VAR_DIR", "") or Path(tempfile.gettempdir()) / "dubbing_site")
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -211,23 +261,150 @@ CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = TIME_ZONE
+CELERY_WORKER_CONCURRENCY = env_int("CELERY_WORKER_CONCURRENCY", 0) or None
+# One reserved task per process, so a worker never sits on long jobs while short ones wait.
+CELERY_WORKER_PREFETCH_MULTIPLIER = env_int("CELERY_WORKER_PREFETCH_MULTIPLIER", 1)
+# Redis: 0 is the highest priority, and workers drain their queues in the order given by -Q.
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    "priority_steps": list(range(10)),
+    "sep": ":",
+    "queue_order_strategy": "priority",
+}
+CELERY_TASK_ROUTES = {
+    "dubbing.tasks.extract_audio_stage": {"queue": env("DUBBING_FFMPEG_QUEUE", "dubbing_ffmpeg")},
+    "dubbing.tasks.transcribe_stage": {"queue": env("DUBBING_ASR_QUEUE", "dubbing_asr")},
+    "dubbing.tasks.translate_stage": {
+        "queue": env("DUBBING_TRANSLATION_QUEUE", "dubbing_translation")
+    },
+    "dubbing.tasks.synthesize_stage": {"queue": env("DUBBING_TTS_QUEUE", "dubbing_tts")},
+    "dubbing.tasks.mux_stage": {"queue": env("DUBBING_FFMPEG_QUEUE", "dubbing_ffmpeg")},
+}
+
+DUBBING_SCHEDULER_LANES = [
+    {
+        "name": "short",
+        "max_seconds": env_float("DUBBING_SHORT_LANE_SECONDS", 120.0),
+        "queue": env("DUBBING_SHORT_QUEUE", "dubbing_short"),
+        "priority": 0,
+    },
+    {
+        "name": "medium",
+        "max_seconds": env_float("DUBBING_MEDIUM_LANE_SECONDS", 900.0),
+        "queue": env("DUBBING_MEDIUM_QUEUE", "dubbing_medium"),
+        "priority": 3,
+    },
+    {
+        "name": "long",
+        "max_seconds": None,
+        "queue": env("DUBBING_LONG_QUEUE", "dubbing_long"),
+        "priority": 6,
+    },
+]
+DUBBING_MAX_IN_FLIGHT_PER_USER = env_int("DUBBING_MAX_IN_FLIGHT_PER_USER", 2)
+DUBBING_JOB_TIMEOUT_HOURS = env_int("DUBBING_JOB_TIMEOUT_HOURS", 12)
 
 VIDEO_RETENTION_DAYS = env_int("VIDEO_RETENTION_DAYS", 7)
+VIDEO_RETENTION_BATCH_SIZE = env_int("VIDEO_RETENTION_BATCH_SIZE", 500)
+VIDEO_RETENTION_DELETE_WORKERS = env_int("VIDEO_RETENTION_DELETE_WORKERS", 8)
+VIDEO_RETENTION_TIME_BUDGET_SECONDS = env_int("VIDEO_RETENTION_TIME_BUDGET_SECONDS", 900)
+VIDEO_LIST_PAGE_SIZE = env_int("VIDEO_LIST_PAGE_SIZE", 20)
+VIDEO_LIST_MAX_PAGE_SIZE = env_int("VIDEO_LIST_MAX_PAGE_SIZE", 100)
+VIDEO_UPLOAD_MAX_SIZE_MB = env_int("VIDEO_UPLOAD_MAX_SIZE_MB", 2048)
+VIDEO_UPLOAD_MAX_CHUNK_MB = env_int("VIDEO_UPLOAD_MAX_CHUNK_MB", 16)
+# Chunks are staged as local files under flock, not streamed to media storage, so with
+# more than one web host this directory must be shared storage mounted on all of them.
+VIDEO_UPLOAD_TEMP_DIR = env("VIDEO_UPLOAD_TEMP_DIR", "") or str(DJANGO_VAR_DIR / "uploads")
+VIDEO_UPLOAD_SESSION_TTL_HOURS = env_int("VIDEO_UPLOAD_SESSION_TTL_HOURS", 24)
+VIDEO_PROBE_ON_UPLOAD = env_bool("VIDEO_PROBE_ON_UPLOAD", True)
+VIDEO_PROBE_TIMEOUT = env_int("VIDEO_PROBE_TIMEOUT", 30)
+# "", "x-accel-redirect" (nginx) or "x-sendfile" (Apache mod_xsendfile / lighttpd).
+VIDEO_DOWNLOAD_OFFLOAD = env("VIDEO_DOWNLOAD_OFFLOAD", "")
+VIDEO_DOWNLOAD_ACCEL_PREFIX = env("VIDEO_DOWNLOAD_ACCEL_PREFIX", "/protected/")
 
 # Dubbing pipeline
 FFMPEG_BIN = env("FFMPEG_BIN", "ffmpeg")
+FFPROBE_BIN = env("FFPROBE_BIN", "ffprobe")
 WHISPER_MODEL_NAME = env("WHISPER_MODEL_NAME", "base")
+WHISPER_ENGINE = env("WHISPER_ENGINE", "openai-whisper")
+WHISPER_COMPUTE_TYPE = env("WHISPER_COMPUTE_TYPE", "int8")
+WHISPER_CHUNKED_MODE = env_bool("WHISPER_CHUNKED_MODE", False)
+# Each chunk worker loads its own Whisper model. With DUBBING_MODEL_CACHE_MB set, the pool
+# is capped at (budget - models already loaded) // estimated model size. Chunks are
+# transcribed in-process when not even one extra copy fits, or when the task runs in a
+# daemonic Celery prefork child, which may not start worker processes.
+WHISPER_CHUNK_WORKERS = env_int("WHISPER_CHUNK_WORKERS", 0)
+WHISPER_MAX_CHUNK_SECONDS = env_float("WHISPER_MAX_CHUNK_SECONDS", 60.0)
 HF_TRANSLATION_MODEL_NAME = env(
     "HF_TRANSLATION_MODEL_NAME", "Helsinki-NLP/opus-mt-en-ru"
 )
+HF_TRANSLATION_BATCH_SIZE = env_int("HF_TRANSLATION_BATCH_SIZE", 16)
 COQUI_TTS_MODEL_NAME = env(
     "COQUI_TTS_MODEL_NAME", "tts_models/en/ljspeech/tacotron2-DDC"
 )
+MMS_TTS_BATCH_SIZE = env_int("MMS_TTS_BATCH_SIZE", 8)
+MMS_TTS_MAX_SENTENCE_CHARS = env_int("MMS_TTS_MAX_SENTENCE_CHARS", 300)
 DUBBING_SOURCE_LANGUAGE = env("DUBBING_SOURCE_LANGUAGE", "")
+DUBBING_MODEL_CACHE_MB = env_int("DUBBING_MODEL_CACHE_MB", 0)
+DUBBING_WARMUP_MODELS = env_bool("DUBBING_WARMUP_MODELS", False)
+DUBBING_WARMUP_STAGES = env_list("DUBBING_WARMUP_STAGES", [])
+DUBBING_STAGED_TASKS = env_bool("DUBBING_STAGED_TASKS", False)
+DUBBING_SEGMENTED_MODE = env_bool("DUBBING_SEGMENTED_MODE", False)
+DUBBING_PIPELINE_QUEUE_SIZE = env_int("DUBBING_PIPELINE_QUEUE_SIZE", 4)
+DUBBING_MAX_TIME_COMPRESSION = env_float("DUBBING_MAX_TIME_COMPRESSION", 1.5)
+DUBBING_CACHE_DIR = env("DUBBING_CACHE_DIR", str(DJANGO_VAR_DIR / "cache" / "dubbing"))
+DUBBING_CACHE_MAX_MB = env_int("DUBBING_CACHE_MAX_MB", 2048)
+DUBBING_WORK_DIR = env("DUBBING_WORK_DIR", "")
+DUBBING_CHECKPOINTS_ENABLED = env_bool("DUBBING_CHECKPOINTS_ENABLED", True)
+# With DUBBING_STAGED_TASKS on, stages pass artifacts as paths inside this directory, so it
+# must be an absolute path on storage shared by every worker consuming the stage queues.
+DUBBING_CHECKPOINT_DIR = env("DUBBING_CHECKPOINT_DIR", "") or str(
+    Path(DUBBING_WORK_DIR or DJANGO_VAR_DIR) / "checkpoints"
+)
+DUBBING_CHECKPOINT_TTL_HOURS = env_int("DUBBING_CHECKPOINT_TTL_HOURS", 48)
+DUBBING_STREAM_AUDIO = env_bool("DUBBING_STREAM_AUDIO", False)
+DUBBING_TRANSLATION_MEMORY_ENABLED = env_bool("DUBBING_TRANSLATION_MEMORY_ENABLED", True)
+DUBBING_TRANSLATION_MEMORY_SIZE = env_int("DUBBING_TRANSLATION_MEMORY_SIZE", 10000)
+DUBBING_METRICS_TOKEN = env("DUBBING_METRICS_TOKEN", "")
+DUBBING_INFERENCE_MODE = env("DUBBING_INFERENCE_MODE", "fp32")
+DUBBING_TORCH_THREADS = env_int("DUBBING_TORCH_THREADS", 0)
+DUBBING_PROGRESS_MIN_INTERVAL = env_float("DUBBING_PROGRESS_MIN_INTERVAL", 1.0)
+DUBBING_PROGRESS_POLL_INTERVAL = env_float("DUBBING_PROGRESS_POLL_INTERVAL", 1.0)
+DUBBING_PROGRESS_HEARTBEAT_INTERVAL = env_float("DUBBING_PROGRESS_HEARTBEAT_INTERVAL", 15.0)
+DUBBING_PROGRESS_STREAM_TIMEOUT = env_int("DUBBING_PROGRESS_STREAM_TIMEOUT", 3600)
+# The status stream reads progress from this shared cache; it defaults to the Redis broker.
+# The stream endpoint is meant for the ASGI app (dubbing_site.asgi:application, e.g. under
+# uvicorn). WSGI servers get a 503 unless DUBBING_PROGRESS_STREAM_ALLOW_WSGI is set.
+DUBBING_PROGRESS_CACHE_URL = env("DUBBING_PROGRESS_CACHE_URL", "") or (
+    CELERY_BROKER_URL if CELERY_BROKER_URL.startswith(("redis://", "rediss://")) else ""
+)
+DUBBING_PROGRESS_STREAM_ALLOW_WSGI = env_bool("DUBBING_PROGRESS_STREAM_ALLOW_WSGI", DEBUG)
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+}
+if DUBBING_PROGRESS_CACHE_URL:
+    CACHES["dubbing_progress"] = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": DUBBING_PROGRESS_CACHE_URL,
+    }
 
 CELERY_BEAT_SCHEDULE = {
     "delete-expired-videos-daily": {
         "task": "videos.tasks.delete_expired_videos",
         "schedule": crontab(hour=3, minute=0),
     },
+    "delete-stale-upload-sessions-hourly": {
+        "task": "videos.tasks.delete_stale_upload_sessions",
+        "schedule": crontab(minute=15),
+    },
+    "release-stale-dubbing-jobs": {
+        "task": "dubbing.tasks.release_stale_dubbing_jobs",
+        "schedule": crontab(minute="*/5"),
+    },
+    "cleanup-stale-dubbing-checkpoints-hourly": {
+        "task": "dubbing.tasks.cleanup_stale_checkpoints",
+        "schedule": crontab(minute=30),
+    },
 }
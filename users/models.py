@@ -3,6 +3,8 @@ from django.db import models
 from django.conf import settings
 
 class PasswordResetCode(models.Model):
+    TTL_MINUTES = 10
+
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     code = models.CharField(max_length=6)
     created_at = models.DateTimeField(auto_now_add=True)
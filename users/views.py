@@ -173,7 +173,9 @@ class PasswordResetVerifyView(APIView):
         except PasswordResetCode.DoesNotExist:
             return Response({"error": "Invalid code"}, status=status.HTTP_400_BAD_REQUEST)
 
-        if reset_code.created_at < timezone.now() - timedelta(minutes=10):
+        if reset_code.created_at < timezone.now() - timedelta(
+            minutes=PasswordResetCode.TTL_MINUTES
+        ):
             return Response({"error": "Code has expired"}, status=status.HTTP_400_BAD_REQUEST)
 
         return Response({"message": "Code is valid"}, status=status.HTTP_200_OK)
@@ -203,7 +205,9 @@ class PasswordResetCompleteView(APIView):
         except PasswordResetCode.DoesNotExist:
             return Response({"error": "Invalid code"}, status=status.HTTP_400_BAD_REQUEST)
 
-        if reset_code.created_at < timezone.now() - timedelta(minutes=10):
+        if reset_code.created_at < timezone.now() - timedelta(
+            minutes=PasswordResetCode.TTL_MINUTES
+        ):
             return Response({"error": "Code has expired"}, status=status.HTTP_400_BAD_REQUEST)
 
         user.set_password(new_password)
@@ -0,0 +1,42 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .models import Video
+
+
+def video_validators(video):
+    return f'"video-{video.id}-v{video.version}"', video.updated_at
+
+
+def video_list_validators(user, page_key=""):
+    # Any save bumps updated_at and any delete changes the count, so together they
+    # version the whole list without a separate counter to keep in sync.
+    marker = Video.objects.filter(user=user).aggregate(
+        count=Count("id"),
+        last_updated=Max("updated_at"),
+    )
+    last_updated = marker["last_updated"]
+    stamp = int(last_updated.timestamp() * 1_000_000) if last_updated else 0
+    etag = f"videos-{user.pk}-{marker['count']}-{stamp}"
+    if page_key:
+        # Each page (cursor, size, filter) is a different representation of the list.
+        etag += "-" + hashlib.sha1(page_key.encode("utf-8")).hexdigest()[:16]
+    return f'"{etag}"', last_updated
+
+
+def not_modified_response(request, etag):
+    # Only the ETag is honoured: progress writes land several times per second, and
+    # If-Modified-Since has one-second resolution, so it would answer 304 with stale progress.
+    return get_conditional_response(request, etag=etag)
+
+
+def set_validators(response, etag, last_modified):
+    response["ETag"] = etag
+    if last_modified:
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+    # Clients may keep the body but must revalidate before reusing it.
+    response["Cache-Control"] = "private, no-cache"
+    return response
@@ -0,0 +1,137 @@
+import mimetypes
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.http import content_disposition_header, parse_http_date_safe
+
+OFFLOAD_ACCEL_REDIRECT = "x-accel-redirect"
+OFFLOAD_SENDFILE = "x-sendfile"
+
+RANGE_HEADER = re.compile(r"^bytes=(\d*)-(\d*)$")
+STREAM_BLOCK_SIZE = 64 * 1024
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header, size):
+    # Returns an inclusive (start, end) pair, or None when the whole file should be sent.
+    # Multiple ranges and malformed headers fall back to a full response, which RFC 9110
+    # allows and which players handle fine.
+    match = RANGE_HEADER.match((header or "").strip())
+    if match is None:
+        return None
+
+    first, last = match.groups()
+    if not first and not last:
+        return None
+
+    if not first:
+        suffix = int(last)
+        if not suffix or not size:
+            raise RangeNotSatisfiable()
+        return max(size - suffix, 0), size - 1
+
+    start = int(first)
+    if start >= size:
+        raise RangeNotSatisfiable()
+    end = int(last) if last else size - 1
+    if end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+def if_range_matches(request, etag, last_modified):
+    value = request.headers.get("If-Range")
+    if not value:
+        return True
+    if value.startswith('"') or value.startswith("W/"):
+        return value == etag
+
+    timestamp = parse_http_date_safe(value)
+    return (
+        timestamp is not None
+        and last_modified is not None
+        and int(last_modified.timestamp()) == timestamp
+    )
+
+
+def iter_file_range(file, start, length):
+    try:
+        file.seek(start)
+        remaining = length
+        while remaining:
+            block = file.read(min(STREAM_BLOCK_SIZE, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            yield block
+    finally:
+        file.close()
+
+
+def _offload_response(field_file, offload, file_name, content_type):
+    if offload == OFFLOAD_SENDFILE:
+        try:
+            target = field_file.path
+        except NotImplementedError:
+            # Remote storages have no local path for the web server to send.
+            return None
+        header = "X-Sendfile"
+    else:
+        prefix = getattr(settings, "VIDEO_DOWNLOAD_ACCEL_PREFIX", "/protected/")
+        target = prefix.rstrip("/") + "/" + quote(field_file.name.lstrip("/"))
+        header = "X-Accel-Redirect"
+
+    # The web server fills in the body and handles Range itself.
+    response = HttpResponse(content_type=content_type)
+    response[header] = target
+    response["Content-Disposition"] = content_disposition_header(True, file_name)
+    return response
+
+
+def download_response(request, field_file, etag, last_modified):
+    file_name = field_file.name.split("/")[-1]
+    content_type = mimetypes.guess_type(file_name)[0] or "application/octet-stream"
+
+    offload = (getattr(settings, "VIDEO_DOWNLOAD_OFFLOAD", "") or "").lower()
+    if offload in (OFFLOAD_ACCEL_REDIRECT, OFFLOAD_SENDFILE):
+        response = _offload_response(field_file, offload, file_name, content_type)
+        if response is not None:
+            return response
+
+    size = field_file.size
+    byte_range = None
+    if request.headers.get("Range") and if_range_matches(request, etag, last_modified):
+        try:
+            byte_range = parse_range(request.headers["Range"], size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            response["Accept-Ranges"] = "bytes"
+            return response
+
+    if byte_range is None:
+        response = FileResponse(
+            field_file.open("rb"),
+            as_attachment=True,
+            filename=file_name,
+            content_type=content_type,
+        )
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(
+            iter_file_range(field_file.open("rb"), start, length),
+            status=206,
+            content_type=content_type,
+        )
+        response["Content-Length"] = str(length)
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Content-Disposition"] = content_disposition_header(True, file_name)
+
+    response["Accept-Ranges"] = "bytes"
+    return response
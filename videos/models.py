@@ -1,3 +1,5 @@
+import uuid
+
 from django.db import models
 from django.conf import settings
 
@@ -22,8 +24,74 @@ class Video(models.Model):
     dubbed_video = models.FileField(upload_to="dubbed_videos/", blank=True, null=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_UPLOADED)
     error_message = models.TextField(blank=True)
+    duration_seconds = models.FloatField(blank=True, null=True)
+    container_format = models.CharField(max_length=100, blank=True)
+    video_codec = models.CharField(max_length=32, blank=True)
+    audio_codec = models.CharField(max_length=32, blank=True)
+    audio_sample_rate = models.PositiveIntegerField(blank=True, null=True)
+    audio_channels = models.PositiveSmallIntegerField(blank=True, null=True)
+    audio_channel_layout = models.CharField(max_length=32, blank=True)
+    stream_layout = models.JSONField(default=list, blank=True)
+    progress_stage = models.CharField(max_length=20, blank=True)
+    progress_percent = models.PositiveSmallIntegerField(default=0)
+    progress_updated_at = models.DateTimeField(blank=True, null=True)
+    version = models.PositiveIntegerField(default=1)
+    updated_at = models.DateTimeField(auto_now=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # The paginated list: WHERE user_id = ? ORDER BY created_at DESC, id DESC.
+            models.Index(fields=["user", "-created_at", "-id"], name="video_user_created"),
+            models.Index(
+                fields=["user", "status", "-created_at", "-id"], name="video_user_status_created"
+            ),
+            # The retention sweep: WHERE created_at <= cutoff.
+            models.Index(fields=["created_at", "id"], name="video_created"),
+        ]
+
+    def save(self, *args, **kwargs):
+        bump_version = self.pk is not None and not kwargs.get("force_insert")
+        if bump_version:
+            # Bump in the database so concurrent writers (web and workers) never reuse a version.
+            self.version = models.F("version") + 1
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "version", "updated_at"}
+
+        super().save(*args, **kwargs)
+        if bump_version:
+            self.refresh_from_db(fields=["version"])
+
     def __str__(self):
         return f"Video #{self.id} ({self.status})"
 
+
+
+class UploadSession(models.Model):
+    STATUS_UPLOADING = "uploading"
+    STATUS_FINALIZING = "finalizing"
+    STATUS_COMPLETED = "completed"
+
+    STATUS_CHOICES = [
+        (STATUS_UPLOADING, "Uploading"),
+        (STATUS_FINALIZING, "Finalizing"),
+        (STATUS_COMPLETED, "Completed"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="upload_sessions")
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    offset = models.BigIntegerField(default=0)
+    checksum = models.CharField(max_length=64, blank=True)
+    sha256 = models.CharField(max_length=64, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_UPLOADING)
+    video = models.OneToOneField(
+        Video, on_delete=models.SET_NULL, blank=True, null=True, related_name="upload_session"
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Upload {self.id} ({self.offset}/{self.size})"
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Video
+from .models import UploadSession, Video
 
 
 class VideoSerializer(serializers.ModelSerializer):
@@ -11,6 +11,48 @@ class VideoSerializer(serializers.ModelSerializer):
             "dubbed_video",
             "status",
             "error_message",
+            "duration_seconds",
+            "container_format",
+            "video_codec",
+            "audio_codec",
+            "audio_sample_rate",
+            "audio_channels",
+            "audio_channel_layout",
+            "stream_layout",
+            "progress_stage",
+            "progress_percent",
+            "progress_updated_at",
             "created_at",
         ]
-        read_only_fields = ["status", "dubbed_video", "error_message"]
+        read_only_fields = [
+            "status",
+            "dubbed_video",
+            "error_message",
+            "duration_seconds",
+            "container_format",
+            "video_codec",
+            "audio_codec",
+            "audio_sample_rate",
+            "audio_channels",
+            "audio_channel_layout",
+            "stream_layout",
+            "progress_stage",
+            "progress_percent",
+            "progress_updated_at",
+        ]
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UploadSession
+        fields = [
+            "id",
+            "filename",
+            "size",
+            "offset",
+            "sha256",
+            "status",
+            "video",
+            "created_at",
+        ]
+        read_only_fields = fields
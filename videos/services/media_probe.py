@@ -0,0 +1,123 @@
+import json
+import os
+import subprocess
+import tempfile
+
+from django.conf import settings
+
+MEDIA_FIELDS = (
+    "duration_seconds",
+    "container_format",
+    "video_codec",
+    "audio_codec",
+    "audio_sample_rate",
+    "audio_channels",
+    "audio_channel_layout",
+    "stream_layout",
+)
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def run_ffprobe(path):
+    # -show_format/-show_streams only parse container headers; no frames are decoded.
+    command = [
+        getattr(settings, "FFPROBE_BIN", "ffprobe"),
+        "-v",
+        "error",
+        "-print_format",
+        "json",
+        "-show_format",
+        "-show_streams",
+        str(path),
+    ]
+    try:
+        result = subprocess.run(
+            command,
+            capture_output=True,
+            text=True,
+            timeout=getattr(settings, "VIDEO_PROBE_TIMEOUT", 30),
+        )
+    except FileNotFoundError as exc:
+        raise RuntimeError("ffprobe is not installed. Install ffmpeg to probe uploads") from exc
+    except subprocess.TimeoutExpired:
+        raise ValueError("Файлды оқу мүмкін болмады")
+
+    if result.returncode != 0:
+        raise ValueError("Файл бүлінген немесе ойнатылмайды")
+
+    try:
+        return json.loads(result.stdout or "{}")
+    except ValueError:
+        raise ValueError("Файл бүлінген немесе ойнатылмайды")
+
+
+def parse_probe(probe):
+    streams = probe.get("streams") or []
+    container = probe.get("format") or {}
+    video = next((s for s in streams if s.get("codec_type") == "video"), None)
+    audio = next((s for s in streams if s.get("codec_type") == "audio"), None)
+
+    if audio is None:
+        raise ValueError("Файлда дыбыс жолы жоқ")
+
+    duration = _to_float(container.get("duration"))
+    if duration is None:
+        durations = [_to_float(s.get("duration")) for s in streams]
+        duration = max([value for value in durations if value is not None], default=None)
+    if not duration or duration <= 0:
+        raise ValueError("Файл бүлінген немесе ойнатылмайды")
+
+    return {
+        "duration_seconds": duration,
+        "container_format": (container.get("format_name") or "")[:100],
+        "video_codec": (video or {}).get("codec_name") or "",
+        "audio_codec": audio.get("codec_name") or "",
+        "audio_sample_rate": _to_int(audio.get("sample_rate")),
+        "audio_channels": _to_int(audio.get("channels")),
+        "audio_channel_layout": audio.get("channel_layout") or "",
+        "stream_layout": [
+            {
+                "index": stream.get("index"),
+                "type": stream.get("codec_type") or "",
+                "codec": stream.get("codec_name") or "",
+            }
+            for stream in streams
+        ],
+    }
+
+
+def probe_media(path):
+    if not getattr(settings, "VIDEO_PROBE_ON_UPLOAD", True):
+        return {}
+    return parse_probe(run_ffprobe(path))
+
+
+def probe_uploaded_file(file):
+    if not getattr(settings, "VIDEO_PROBE_ON_UPLOAD", True):
+        return {}
+
+    if hasattr(file, "temporary_file_path"):
+        return probe_media(file.temporary_file_path())
+
+    # Small uploads stay in memory; ffprobe needs a seekable file for MP4 headers.
+    suffix = os.path.splitext(file.name)[1]
+    with tempfile.NamedTemporaryFile(suffix=suffix) as temp_file:
+        for chunk in file.chunks():
+            temp_file.write(chunk)
+        temp_file.flush()
+        metadata = probe_media(temp_file.name)
+    file.seek(0)
+    return metadata
@@ -0,0 +1,155 @@
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files import File
+
+from .media_probe import probe_media
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows development machines
+    fcntl = None
+
+READ_BLOCK_SIZE = 1024 * 1024
+
+
+class UploadConflictError(Exception):
+    def __init__(self, message, offset):
+        super().__init__(message)
+        self.offset = offset
+
+
+class ChunkChecksumError(ValueError):
+    pass
+
+
+class _StagedFile(File):
+    # FileSystemStorage moves files that expose a temporary path instead of copying them.
+    def temporary_file_path(self):
+        return self.name
+
+
+def upload_temp_dir():
+    default = Path(getattr(settings, "DJANGO_VAR_DIR", tempfile.gettempdir())) / "uploads"
+    path = Path(getattr(settings, "VIDEO_UPLOAD_TEMP_DIR", "") or default)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def part_path(session):
+    return upload_temp_dir() / f"{session.id}.part"
+
+
+def max_chunk_bytes():
+    return getattr(settings, "VIDEO_UPLOAD_MAX_CHUNK_MB", 16) * 1024 * 1024
+
+
+def file_sha256(path):
+    hasher = hashlib.sha256()
+    with open(path, "rb") as source:
+        for block in iter(lambda: source.read(READ_BLOCK_SIZE), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+def forget_upload(session):
+    try:
+        os.remove(part_path(session))
+    except FileNotFoundError:
+        pass
+
+
+def append_chunk(session, stream, offset, length, checksum=""):
+    if offset != session.offset:
+        raise UploadConflictError("Upload offset does not match", session.offset)
+    if length is None:
+        raise ValueError("Content-Length header is required")
+    if length > max_chunk_bytes():
+        raise ValueError(f"Chunk is larger than {max_chunk_bytes()} bytes")
+    if offset + length > session.size:
+        raise ValueError("Chunk goes past the declared upload size")
+
+    # O_CREAT without O_TRUNC: a concurrent first chunk must not truncate the file under the
+    # request that holds the lock. Stale bytes are only cut off after the offset re-check.
+    fd = os.open(part_path(session), os.O_RDWR | os.O_CREAT, 0o600)
+    with os.fdopen(fd, "r+b") as target:
+        if fcntl is not None:
+            try:
+                fcntl.flock(target.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise UploadConflictError("Another chunk is being written", session.offset)
+
+        # Another request may have committed a chunk between loading the session and locking.
+        session.refresh_from_db(fields=["offset"])
+        if offset != session.offset:
+            raise UploadConflictError("Upload offset does not match", session.offset)
+
+        # Anything past the committed offset is left over from an interrupted request.
+        target.seek(offset)
+        target.truncate()
+
+        chunk_hasher = hashlib.sha256()
+        received = 0
+        while received < length and stream is not None:
+            block = stream.read(min(READ_BLOCK_SIZE, length - received))
+            if not block:
+                break
+            target.write(block)
+            chunk_hasher.update(block)
+            received += len(block)
+
+        if checksum and (received != length or chunk_hasher.hexdigest() != checksum.lower()):
+            target.seek(offset)
+            target.truncate()
+            raise ChunkChecksumError("Chunk checksum does not match")
+
+        target.flush()
+        os.fsync(target.fileno())
+
+        # Without a checksum, a partially received chunk is kept so the client can resume from
+        # it. The offset is committed while the lock is still held.
+        session.offset = offset + received
+        session.save(update_fields=["offset", "updated_at"])
+
+    return session.offset
+
+
+def file_signature_matches(path, extension):
+    with open(path, "rb") as source:
+        header = source.read(12)
+    if extension == "wav":
+        return header[:4] == b"RIFF" and header[8:12] == b"WAVE"
+    if extension == "mp4":
+        return header[4:8] == b"ftyp"
+    return False
+
+
+def finalize_upload(session, field):
+    if session.offset != session.size:
+        raise ValueError("Upload is not complete")
+
+    path = part_path(session)
+    extension = session.filename.rsplit(".", 1)[-1].lower()
+    if not path.exists() or path.stat().st_size != session.size:
+        raise ValueError("Uploaded data is missing or incomplete")
+    if not file_signature_matches(path, extension):
+        raise ValueError("Uploaded data does not look like a valid video file")
+
+    # One streaming pass at the end; chunks may have landed on different web workers.
+    digest = file_sha256(path)
+    if session.checksum and digest != session.checksum.lower():
+        raise ChunkChecksumError("Upload checksum does not match")
+
+    # Probed before the move so a rejected file never reaches storage.
+    metadata = probe_media(path)
+
+    name = field.generate_filename(None, os.path.basename(session.filename))
+    with open(path, "rb") as source:
+        name = field.storage.save(name, _StagedFile(source, name=str(path)), field.max_length)
+
+    if path.exists():
+        os.remove(path)
+    return name, digest, metadata
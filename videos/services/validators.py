@@ -10,3 +10,16 @@ def validate_video_file(file):
 
     if file.size > MAX_FILE_SIZE_MB * 1024 * 1024:
         raise ValueError("Файл көлемі 100MB-тан аспау керек")
+
+
+def validate_upload_request(filename, size, max_size_mb):
+    extension = (filename or "").split(".")[-1].lower()
+
+    if extension not in ALLOWED_EXTENSIONS:
+        raise ValueError("Файл форматы mp4 немесе wav болуы керек")
+
+    if size <= 0:
+        raise ValueError("Файл көлемі көрсетілмеген")
+
+    if size > max_size_mb * 1024 * 1024:
+        raise ValueError(f"Файл көлемі {max_size_mb}MB-тан аспау керек")
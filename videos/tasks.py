@@ -1,31 +1,133 @@
-from datetime import timedelta
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 
 from celery import shared_task
 from django.conf import settings
+from django.db.models import Q
 from django.utils import timezone
 
-from .models import Video
+from users.models import PasswordResetCode
 
+from .models import UploadSession, Video
+from .services.uploads import forget_upload
 
-@shared_task
-def delete_expired_videos():
-    retention_days = getattr(settings, "VIDEO_RETENTION_DAYS", 7)
-    cutoff = timezone.now() - timedelta(days=retention_days)
+logger = logging.getLogger(__name__)
 
-    expired_videos = Video.objects.filter(created_at__lte=cutoff)
-    deleted_count = 0
 
-    for video in expired_videos.iterator():
+def _delete_video_files(video):
+    try:
         if video.original_video:
             video.original_video.delete(save=False)
 
         if video.dubbed_video:
             video.dubbed_video.delete(save=False)
+    except Exception as exc:
+        # The row is kept so the next sweep retries the file instead of orphaning it.
+        logger.warning("Could not delete files of video %s: %s", video.id, exc)
+        return False
+    return True
 
-        video.delete()
-        deleted_count += 1
+
+def _encode_cursor(position):
+    created_at, video_id = position
+    return [created_at.isoformat(), video_id]
+
+
+def _decode_cursor(cursor):
+    if not cursor:
+        return None
+    created_at, video_id = cursor
+    return datetime.fromisoformat(created_at), int(video_id)
+
+
+def purge_expired_reset_codes():
+    cutoff = timezone.now() - timedelta(minutes=PasswordResetCode.TTL_MINUTES)
+    deleted_count, _ = PasswordResetCode.objects.filter(created_at__lt=cutoff).delete()
+    return deleted_count
+
+
+@shared_task
+def delete_expired_videos(cursor=None):
+    retention_days = getattr(settings, "VIDEO_RETENTION_DAYS", 7)
+    batch_size = getattr(settings, "VIDEO_RETENTION_BATCH_SIZE", 500)
+    workers = getattr(settings, "VIDEO_RETENTION_DELETE_WORKERS", 8)
+    time_budget = getattr(settings, "VIDEO_RETENTION_TIME_BUDGET_SECONDS", 900)
+    cutoff = timezone.now() - timedelta(days=retention_days)
+    started = time.monotonic()
+
+    expired_videos = (
+        Video.objects.filter(created_at__lte=cutoff)
+        .only("id", "created_at", "original_video", "dubbed_video")
+        .order_by("created_at", "id")
+    )
+    position = _decode_cursor(cursor)
+    deleted_count = 0
+    failed_count = 0
+    exhausted = False
+
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        while True:
+            batch_query = expired_videos
+            if position is not None:
+                # Keyset pagination: rows whose files failed to delete stay behind the cursor
+                # and are retried by the next sweep rather than re-read in this one.
+                created_at, video_id = position
+                batch_query = batch_query.filter(
+                    Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=video_id)
+                )
+
+            batch = list(batch_query[:batch_size])
+            if not batch:
+                exhausted = True
+                break
+
+            results = executor.map(_delete_video_files, batch)
+            deleted_ids = [video.id for video, deleted in zip(batch, results) if deleted]
+            if deleted_ids:
+                Video.objects.filter(id__in=deleted_ids).delete()
+
+            deleted_count += len(deleted_ids)
+            failed_count += len(batch) - len(deleted_ids)
+            position = (batch[-1].created_at, batch[-1].id)
+            if len(batch) < batch_size:
+                exhausted = True
+                break
+            if time.monotonic() - started >= time_budget:
+                break
+
+    next_cursor = None
+    if not exhausted:
+        # Out of time with rows left: continue from the cursor in a fresh task.
+        next_cursor = _encode_cursor(position)
+        delete_expired_videos.apply_async(kwargs={"cursor": next_cursor})
 
     return {
         "deleted_count": deleted_count,
+        "failed_count": failed_count,
+        "reset_codes_deleted": purge_expired_reset_codes(),
         "retention_days": retention_days,
+        "next_cursor": next_cursor,
+    }
+
+
+@shared_task
+def delete_stale_upload_sessions():
+    ttl_hours = getattr(settings, "VIDEO_UPLOAD_SESSION_TTL_HOURS", 24)
+    cutoff = timezone.now() - timedelta(hours=ttl_hours)
+
+    stale_sessions = UploadSession.objects.filter(updated_at__lte=cutoff)
+    deleted_count = 0
+
+    for session in stale_sessions.iterator():
+        if session.status != UploadSession.STATUS_COMPLETED:
+            forget_upload(session)
+
+        session.delete()
+        deleted_count += 1
+
+    return {
+        "deleted_count": deleted_count,
+        "ttl_hours": ttl_hours,
     }
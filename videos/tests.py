@@ -1,3 +1,397 @@
-from django.test import TestCase
+import hashlib
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .downloads import RangeNotSatisfiable, if_range_matches, parse_range
+from .models import UploadSession, Video
+from .tasks import delete_expired_videos
+
+
+@override_settings(VIDEO_LIST_PAGE_SIZE=10, VIDEO_LIST_MAX_PAGE_SIZE=50)
+class UserVideoListPaginationTests(TestCase):
+    url = "/api/videos/"
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.user = User.objects.create_user("owner", "owner@example.com", "password")
+        other = User.objects.create_user("other", "other@example.com", "password")
+
+        now = timezone.now()
+        for index in range(25):
+            Video.objects.create(user=cls.user, original_video=f"original_videos/{index}.mp4")
+        Video.objects.create(user=other, original_video="original_videos/other.mp4")
+
+        # Pairs of videos share a timestamp so the id tie-breaker is exercised.
+        for index, video in enumerate(Video.objects.filter(user=cls.user).order_by("id")):
+            Video.objects.filter(id=video.id).update(
+                created_at=now - timedelta(minutes=index // 2),
+                status=Video.STATUS_COMPLETED if index % 3 == 0 else Video.STATUS_UPLOADED,
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def collect_pages(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(video["id"] for video in response.data["results"])
+            url = response.data["next"]
+        return ids
+
+    def test_pages_follow_the_cursor_without_gaps_or_repeats(self):
+        expected = list(
+            Video.objects.filter(user=self.user)
+            .order_by("-created_at", "-id")
+            .values_list("id", flat=True)
+        )
+
+        self.assertEqual(self.collect_pages(self.url), expected)
+        self.assertEqual(self.collect_pages(f"{self.url}?page_size=4"), expected)
+
+    def test_status_filter(self):
+        expected = list(
+            Video.objects.filter(user=self.user, status=Video.STATUS_COMPLETED)
+            .order_by("-created_at", "-id")
+            .values_list("id", flat=True)
+        )
+
+        self.assertEqual(self.collect_pages(f"{self.url}?status=completed"), expected)
+        self.assertEqual(self.client.get(f"{self.url}?status=unknown").status_code, 400)
+
+    @override_settings(VIDEO_LIST_MAX_PAGE_SIZE=12)
+    def test_page_size_is_capped(self):
+        response = self.client.get(f"{self.url}?page_size=1000")
+
+        self.assertEqual(len(response.data["results"]), 12)
+        self.assertIsNotNone(response.data["next"])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(f"{self.url}?cursor=not-a-cursor")
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_query_count_is_constant_per_page(self):
+        # One aggregate for the ETag and one keyset query for the page, however deep the
+        # cursor is and however many videos the user owns.
+        with self.assertNumQueries(2):
+            first = self.client.get(self.url)
+        with self.assertNumQueries(2):
+            self.client.get(first.data["next"])
+
+        Video.objects.bulk_create(
+            Video(user=self.user, original_video=f"original_videos/extra_{index}.mp4")
+            for index in range(50)
+        )
+        with self.assertNumQueries(2):
+            self.client.get(self.url)
+
+    def test_not_modified_page_costs_one_query(self):
+        first = self.client.get(self.url)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"])
+
+        self.assertEqual(response.status_code, 304)
+        self.assertNotEqual(self.client.get(first.data["next"])["ETag"], first["ETag"])
+
+    def test_if_modified_since_alone_is_not_honoured(self):
+        first = self.client.get(self.url)
+
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+
+        self.assertEqual(response.status_code, 200)
+
+
+class ResumableUploadTests(TestCase):
+    url = "/api/videos/uploads/"
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(
+            MEDIA_ROOT=media_root,
+            VIDEO_UPLOAD_TEMP_DIR=f"{media_root}/uploads",
+            VIDEO_PROBE_ON_UPLOAD=False,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = get_user_model().objects.create_user("owner", "owner@example.com", "password")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.data = b"RIFF\x00\x00\x00\x00WAVE" + bytes(range(256)) * 40
+        self.first, self.second = self.data[:4000], self.data[4000:]
+
+    def create_session(self, **extra):
+        response = self.client.post(
+            self.url, {"filename": "clip.wav", "size": len(self.data), **extra}, format="json"
+        )
+        self.assertEqual(response.status_code, 201)
+        return f"{self.url}{response.data['id']}/"
+
+    def send_chunk(self, url, chunk, offset, checksum=None):
+        headers = {"HTTP_UPLOAD_OFFSET": str(offset)}
+        if checksum is not None:
+            headers["HTTP_UPLOAD_CHECKSUM"] = f"sha256 {checksum}"
+        return self.client.generic(
+            "PATCH", url, chunk, content_type="application/offset+octet-stream", **headers
+        )
+
+    def test_stale_offset_is_rejected_with_the_current_offset(self):
+        url = self.create_session()
+        self.assertEqual(self.send_chunk(url, self.first, 0).status_code, 200)
+
+        response = self.send_chunk(url, self.first, 0)
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response["Upload-Offset"], str(len(self.first)))
+        self.assertEqual(self.client.get(url)["Upload-Offset"], str(len(self.first)))
+
+    def test_bad_chunk_checksum_rolls_the_chunk_back(self):
+        url = self.create_session()
+        self.send_chunk(url, self.first, 0)
+
+        response = self.send_chunk(url, self.second, len(self.first), checksum="0" * 64)
+
+        self.assertEqual(response.status_code, 400)
+        session = UploadSession.objects.get()
+        self.assertEqual(session.offset, len(self.first))
+
+        good = hashlib.sha256(self.second).hexdigest()
+        response = self.send_chunk(url, self.second, len(self.first), checksum=good)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Upload-Offset"], str(len(self.data)))
+
+    def test_finalize_after_resume(self):
+        url = self.create_session(sha256=hashlib.sha256(self.data).hexdigest())
+        self.send_chunk(url, self.first, 0)
+
+        # A new client picks up from the offset the server reports.
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        offset = int(self.client.get(url)["Upload-Offset"])
+        self.assertEqual(self.send_chunk(url, self.data[offset:], offset).status_code, 200)
+
+        response = self.client.post(f"{url}finalize/")
+
+        self.assertEqual(response.status_code, 201)
+        video = Video.objects.get(id=response.data["id"])
+        with video.original_video.open("rb") as stored:
+            self.assertEqual(stored.read(), self.data)
+        session = UploadSession.objects.get()
+        self.assertEqual(session.status, UploadSession.STATUS_COMPLETED)
+        self.assertEqual(session.sha256, hashlib.sha256(self.data).hexdigest())
+
+        repeated = self.client.post(f"{url}finalize/")
+        self.assertEqual(repeated.status_code, 200)
+        self.assertEqual(repeated.data["id"], video.id)
+
+    def test_finalize_rejects_whole_file_checksum_mismatch(self):
+        url = self.create_session(sha256="0" * 64)
+        self.send_chunk(url, self.data, 0)
+
+        response = self.client.post(f"{url}finalize/")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Video.objects.exists())
+        self.assertEqual(UploadSession.objects.get().status, UploadSession.STATUS_UPLOADING)
+
+    @override_settings(VIDEO_PROBE_ON_UPLOAD=True, FFPROBE_BIN="/nonexistent/ffprobe")
+    def test_missing_ffprobe_is_reported_as_unavailable(self):
+        url = self.create_session()
+        self.send_chunk(url, self.data, 0)
+
+        with self.assertLogs("videos.views", level="ERROR"):
+            response = self.client.post(f"{url}finalize/")
+
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(Video.objects.exists())
+        self.assertEqual(UploadSession.objects.get().status, UploadSession.STATUS_UPLOADING)
+
+    def test_finalize_in_progress_is_not_claimed_twice(self):
+        url = self.create_session()
+        self.send_chunk(url, self.data, 0)
+        UploadSession.objects.update(status=UploadSession.STATUS_FINALIZING)
+
+        response = self.client.post(f"{url}finalize/")
+
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(Video.objects.exists())
+
+        # A claim whose finalize died long ago is taken over.
+        UploadSession.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+        response = self.client.post(f"{url}finalize/")
+        self.assertEqual(response.status_code, 201)
+
+
+@override_settings(
+    VIDEO_RETENTION_DAYS=7,
+    VIDEO_RETENTION_BATCH_SIZE=2,
+    VIDEO_RETENTION_DELETE_WORKERS=2,
+)
+class ExpiredVideoSweepTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        user = get_user_model().objects.create_user("owner", "owner@example.com", "password")
+        expired_at = timezone.now() - timedelta(days=30)
+        self.expired = []
+        for index in range(5):
+            video = Video.objects.create(user=user, original_video=f"original_videos/{index}.mp4")
+            # The first two share a timestamp so the id tie-breaker is exercised.
+            Video.objects.filter(id=video.id).update(
+                created_at=expired_at + timedelta(minutes=max(index - 1, 0))
+            )
+            self.expired.append(video.id)
+        self.recent = Video.objects.create(user=user, original_video="original_videos/new.mp4")
+
+    def remaining_ids(self):
+        return list(Video.objects.order_by("id").values_list("id", flat=True))
+
+    def test_sweep_deletes_every_expired_video_in_batches(self):
+        with mock.patch.object(delete_expired_videos, "apply_async") as apply_async:
+            result = delete_expired_videos()
+
+        apply_async.assert_not_called()
+        self.assertEqual(result["deleted_count"], 5)
+        self.assertIsNone(result["next_cursor"])
+        self.assertEqual(self.remaining_ids(), [self.recent.id])
+
+    @override_settings(VIDEO_RETENTION_TIME_BUDGET_SECONDS=0)
+    def test_sweep_out_of_time_continues_from_its_cursor(self):
+        with mock.patch.object(delete_expired_videos, "apply_async") as apply_async:
+            result = delete_expired_videos()
+
+        self.assertEqual(result["deleted_count"], 2)
+        self.assertEqual(self.remaining_ids(), [*self.expired[2:], self.recent.id])
+        apply_async.assert_called_once_with(kwargs={"cursor": result["next_cursor"]})
+        self.assertEqual(result["next_cursor"][1], self.expired[1])
+
+        with mock.patch.object(delete_expired_videos, "apply_async") as apply_async:
+            continued = delete_expired_videos(cursor=result["next_cursor"])
+
+        self.assertEqual(continued["deleted_count"], 2)
+        self.assertEqual(self.remaining_ids(), [self.expired[4], self.recent.id])
+
+    def test_failed_file_delete_keeps_the_row_for_the_next_sweep(self):
+        failing_id = self.expired[1]
+
+        def delete_files(video):
+            return video.id != failing_id
+
+        with mock.patch("videos.tasks._delete_video_files", side_effect=delete_files):
+            result = delete_expired_videos()
+
+        self.assertEqual(result["deleted_count"], 4)
+        self.assertEqual(result["failed_count"], 1)
+        self.assertEqual(self.remaining_ids(), [failing_id, self.recent.id])
+
+
+class ByteRangeParsingTests(SimpleTestCase):
+    def test_ranges(self):
+        self.assertEqual(parse_range("bytes=0-99", 1000), (0, 99))
+        self.assertEqual(parse_range("bytes=900-", 1000), (900, 999))
+        self.assertEqual(parse_range("bytes=-100", 1000), (900, 999))
+        self.assertEqual(parse_range("bytes=-5000", 1000), (0, 999))
+        self.assertEqual(parse_range("bytes=500-5000", 1000), (500, 999))
+
+    def test_headers_that_fall_back_to_the_full_file(self):
+        for header in ("", "bytes=-", "bytes=0-9,20-29", "items=0-9", "bytes=9-0"):
+            self.assertIsNone(parse_range(header, 1000), header)
+
+    def test_unsatisfiable_ranges(self):
+        for header, size in (("bytes=1000-", 1000), ("bytes=-0", 1000), ("bytes=-10", 0)):
+            with self.assertRaises(RangeNotSatisfiable):
+                parse_range(header, size)
+
+    def test_if_range(self):
+        factory = RequestFactory()
+        etag = '"v1"'
+        last_modified = timezone.now().replace(microsecond=0)
+        http_date = last_modified.strftime("%a, %d %b %Y %H:%M:%S GMT")
+
+        def matches(value):
+            request = factory.get("/", HTTP_IF_RANGE=value) if value else factory.get("/")
+            return if_range_matches(request, etag, last_modified)
+
+        self.assertTrue(matches(None))
+        self.assertTrue(matches('"v1"'))
+        self.assertFalse(matches('"v2"'))
+        self.assertFalse(matches('W/"v1"'))
+        self.assertTrue(matches(http_date))
+        self.assertFalse(matches("Mon, 01 Jan 2001 00:00:00 GMT"))
+        self.assertFalse(matches("not a date"))
+
+
+class DubbedVideoRangeDownloadTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root, VIDEO_DOWNLOAD_OFFLOAD="")
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        user = get_user_model().objects.create_user("owner", "owner@example.com", "password")
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+        self.data = bytes(range(256)) * 4
+        self.video = Video.objects.create(
+            user=user, original_video="original_videos/clip.mp4", status=Video.STATUS_COMPLETED
+        )
+        self.video.dubbed_video.save("dubbed.mp4", ContentFile(self.data))
+        self.url = f"/api/videos/{self.video.id}/download-dubbed/"
+
+    def get(self, **headers):
+        response = self.client.get(self.url, **headers)
+        body = b"".join(response.streaming_content) if response.streaming else response.content
+        return response, body
+
+    def test_single_range_is_served_as_partial_content(self):
+        response, body = self.get(HTTP_RANGE="bytes=100-199")
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(body, self.data[100:200])
+        self.assertEqual(response["Content-Range"], f"bytes 100-199/{len(self.data)}")
+        self.assertEqual(response["Content-Length"], "100")
+
+    def test_range_past_the_end_is_not_satisfiable(self):
+        response, _ = self.get(HTTP_RANGE=f"bytes={len(self.data)}-")
+
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], f"bytes */{len(self.data)}")
+
+    def test_multiple_ranges_get_the_whole_file(self):
+        response, body = self.get(HTTP_RANGE="bytes=0-9,100-109")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, self.data)
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+
+    def test_stale_if_range_gets_the_whole_file(self):
+        response, body = self.get(HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"stale"')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, self.data)
+
+        current = self.client.get(self.url)["ETag"]
+        response, body = self.get(HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE=current)
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(body, self.data[:10])
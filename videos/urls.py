@@ -1,6 +1,9 @@
 from django.urls import path
 from .views import (
     VideoUploadView,
+    UploadSessionCreateView,
+    UploadSessionDetailView,
+    UploadSessionFinalizeView,
     UserVideoListView,
     VideoDetailView,
     VideoDeleteView,
@@ -9,6 +12,9 @@ from .views import (
 
 urlpatterns = [
     path("upload/", VideoUploadView.as_view()),
+    path("uploads/", UploadSessionCreateView.as_view()),
+    path("uploads/<uuid:upload_id>/", UploadSessionDetailView.as_view()),
+    path("uploads/<uuid:upload_id>/finalize/", UploadSessionFinalizeView.as_view()),
     path("", UserVideoListView.as_view()),
     path("<int:video_id>/", VideoDetailView.as_view()),
     path("<int:video_id>/delete/", VideoDeleteView.as_view()),
@@ -1,18 +1,56 @@
-from django.http import FileResponse
+import logging
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .models import Video
-from .serializers import VideoSerializer
-from .services.validators import validate_video_file
+from .conditional import (
+    not_modified_response,
+    set_validators,
+    video_list_validators,
+    video_validators,
+)
+from .downloads import download_response
+from .models import UploadSession, Video
+from .pagination import CreatedAtCursorPagination
+from .serializers import UploadSessionSerializer, VideoSerializer
+from .services.uploads import (
+    UploadConflictError,
+    append_chunk,
+    finalize_upload,
+    forget_upload,
+    max_chunk_bytes,
+)
+from .services.media_probe import probe_uploaded_file
+from .services.validators import validate_upload_request, validate_video_file
+
+logger = logging.getLogger(__name__)
+
+SHA256_HEX = re.compile(r"^[0-9a-fA-F]{64}$")
+# A finalize that has not finished by then died mid-way, so the session can be claimed again.
+FINALIZE_CLAIM_TIMEOUT = timedelta(minutes=15)
 
 
 # ---------------------------
 # VIDEO UPLOAD
 # ---------------------------
 
+def _probe_unavailable_response():
+    # A missing or broken ffprobe is a server problem, not a bad upload.
+    logger.exception("Could not probe an uploaded video")
+    return Response(
+        {"error": "Video uploads are temporarily unavailable"},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+    )
+
+
 class VideoUploadView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -27,15 +65,210 @@ class VideoUploadView(APIView):
 
         try:
             validate_video_file(file)
+            metadata = probe_uploaded_file(file)
         except ValueError as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except RuntimeError:
+            return _probe_unavailable_response()
 
         video = Video.objects.create(
             user=request.user,
             original_video=file,
             status=Video.STATUS_UPLOADED,
+            **metadata,
+        )
+
+        serializer = VideoSerializer(video)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+# ---------------------------
+# RESUMABLE UPLOAD
+# ---------------------------
+
+def _upload_response(session, status_code=status.HTTP_200_OK):
+    response = Response(UploadSessionSerializer(session).data, status=status_code)
+    response["Upload-Offset"] = str(session.offset)
+    response["Upload-Length"] = str(session.size)
+    response["Cache-Control"] = "no-store"
+    return response
+
+
+def _get_upload_session(request, upload_id):
+    try:
+        return UploadSession.objects.get(id=upload_id, user=request.user)
+    except UploadSession.DoesNotExist:
+        return None
+
+
+def _parse_checksum(header):
+    # "Upload-Checksum: sha256 <hex digest>" covers the chunk in the request body.
+    if not header:
+        return ""
+    algorithm, _, digest = header.strip().partition(" ")
+    if algorithm.lower() != "sha256" or not SHA256_HEX.match(digest.strip()):
+        raise ValueError("Upload-Checksum must be 'sha256 <hex digest>'")
+    return digest.strip()
+
+
+class UploadSessionCreateView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        filename = request.data.get("filename") or ""
+        checksum = request.data.get("sha256") or ""
+        max_size_mb = getattr(settings, "VIDEO_UPLOAD_MAX_SIZE_MB", 2048)
+
+        try:
+            size = int(request.data.get("size") or 0)
+        except (TypeError, ValueError):
+            return Response(
+                {"error": "size must be an integer"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            validate_upload_request(filename, size, max_size_mb)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if checksum and not SHA256_HEX.match(checksum):
+            return Response(
+                {"error": "sha256 must be a hex digest"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        session = UploadSession.objects.create(
+            user=request.user,
+            filename=filename[:255],
+            size=size,
+            checksum=checksum.lower(),
         )
 
+        response = _upload_response(session, status.HTTP_201_CREATED)
+        response["Location"] = f"{request.path.rstrip('/')}/{session.id}/"
+        response["Upload-Max-Chunk-Size"] = str(max_chunk_bytes())
+        return response
+
+
+class UploadSessionDetailView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, upload_id):
+        session = _get_upload_session(request, upload_id)
+        if session is None:
+            return Response({"error": "Upload not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        return _upload_response(session)
+
+    def patch(self, request, upload_id):
+        session = _get_upload_session(request, upload_id)
+        if session is None:
+            return Response({"error": "Upload not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        if session.status != UploadSession.STATUS_UPLOADING:
+            return Response(
+                {"error": "Upload is already finalized"},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        try:
+            offset = int(request.headers.get("Upload-Offset", ""))
+            length = request.headers.get("Content-Length")
+            length = int(length) if length else None
+        except ValueError:
+            return Response(
+                {"error": "Upload-Offset and Content-Length must be integers"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            checksum = _parse_checksum(request.headers.get("Upload-Checksum"))
+            # The body is read straight from the request stream, never through request.data.
+            append_chunk(session, request.stream, offset, length, checksum)
+        except UploadConflictError as e:
+            response = Response(
+                {"error": str(e), "offset": e.offset},
+                status=status.HTTP_409_CONFLICT,
+            )
+            response["Upload-Offset"] = str(e.offset)
+            return response
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return _upload_response(session)
+
+    def delete(self, request, upload_id):
+        session = _get_upload_session(request, upload_id)
+        if session is None:
+            return Response({"error": "Upload not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        if session.status == UploadSession.STATUS_UPLOADING:
+            forget_upload(session)
+        session.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+def _release_upload_claim(session):
+    UploadSession.objects.filter(
+        id=session.id, status=UploadSession.STATUS_FINALIZING
+    ).update(status=UploadSession.STATUS_UPLOADING, updated_at=timezone.now())
+
+
+class UploadSessionFinalizeView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, upload_id):
+        # Hashing, probing and moving a large file take far too long to hold a database lock,
+        # so the session is claimed with a single UPDATE and the work runs outside any
+        # transaction.
+        now = timezone.now()
+        abandoned = now - FINALIZE_CLAIM_TIMEOUT
+        claimed = UploadSession.objects.filter(
+            Q(status=UploadSession.STATUS_UPLOADING)
+            | Q(status=UploadSession.STATUS_FINALIZING, updated_at__lte=abandoned),
+            id=upload_id,
+            user=request.user,
+        ).update(status=UploadSession.STATUS_FINALIZING, updated_at=now)
+
+        session = _get_upload_session(request, upload_id)
+        if session is None:
+            return Response({"error": "Upload not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        if not claimed:
+            if session.status == UploadSession.STATUS_COMPLETED and session.video_id:
+                return Response(VideoSerializer(session.video).data)
+            return Response(
+                {"error": "Upload is already being finalized"},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        try:
+            name, digest, metadata = finalize_upload(
+                session, Video._meta.get_field("original_video")
+            )
+        except ValueError as e:
+            _release_upload_claim(session)
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except RuntimeError:
+            _release_upload_claim(session)
+            return _probe_unavailable_response()
+        except Exception:
+            _release_upload_claim(session)
+            raise
+
+        with transaction.atomic():
+            video = Video.objects.create(
+                user=request.user,
+                original_video=name,
+                status=Video.STATUS_UPLOADED,
+                **metadata,
+            )
+            session.status = UploadSession.STATUS_COMPLETED
+            session.sha256 = digest
+            session.video = video
+            session.save(update_fields=["status", "sha256", "video", "updated_at"])
+
         serializer = VideoSerializer(video)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
@@ -48,9 +281,27 @@ class UserVideoListView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        videos = Video.objects.filter(user=request.user).order_by("-created_at")
-        serializer = VideoSerializer(videos, many=True)
-        return Response(serializer.data)
+        status_filter = request.query_params.get("status")
+        if status_filter and status_filter not in dict(Video.STATUS_CHOICES):
+            return Response(
+                {"error": "Unknown video status"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        etag, last_modified = video_list_validators(request.user, request.GET.urlencode())
+        not_modified = not_modified_response(request, etag)
+        if not_modified is not None:
+            return set_validators(not_modified, etag, last_modified)
+
+        videos = Video.objects.filter(user=request.user)
+        if status_filter:
+            videos = videos.filter(status=status_filter)
+
+        paginator = CreatedAtCursorPagination()
+        page = paginator.paginate_queryset(videos, request, view=self)
+        serializer = VideoSerializer(page, many=True)
+        response = paginator.get_paginated_response(serializer.data)
+        return set_validators(response, etag, last_modified)
 
 
 # ---------------------------
@@ -66,8 +317,13 @@ class VideoDetailView(APIView):
         except Video.DoesNotExist:
             return Response({"error": "Video not found"}, status=status.HTTP_404_NOT_FOUND)
 
+        etag, last_modified = video_validators(video)
+        not_modified = not_modified_response(request, etag)
+        if not_modified is not None:
+            return set_validators(not_modified, etag, last_modified)
+
         serializer = VideoSerializer(video)
-        return Response(serializer.data)
+        return set_validators(Response(serializer.data), etag, last_modified)
 
 
 # ---------------------------
@@ -112,5 +368,11 @@ class DubbedVideoDownloadView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        file_name = video.dubbed_video.name.split("/")[-1]
-        return FileResponse(video.dubbed_video.open("rb"), as_attachment=True, filename=file_name)
+        # Authorization happens above; with offload enabled the web server only sends the bytes.
+        etag, last_modified = video_validators(video)
+        not_modified = not_modified_response(request, etag)
+        if not_modified is not None:
+            return set_validators(not_modified, etag, last_modified)
+
+        response = download_response(request, video.dubbed_video, etag, last_modified)
+        return set_validators(response, etag, last_modified)